@@ -15,7 +15,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 # Extensions (SINGLE SOURCE OF TRUTH)
 # ----------------------------------------------------
 
-from extensions import db, jwt, limiter
+from extensions import db, jwt, limiter, sock
 
 # ----------------------------------------------------
 # Models (needed for migrations / Alembic discovery)
@@ -28,10 +28,14 @@ from face.models import FaceEmbedding
 from aurora.models_relationship import AuroraRelationship
 from aurora.models_messages import AuroraMessage
 from aurora.models_emotion import AuroraEmotion
+from aurora.models_emotion_series import AuroraEmotionSeries
 from aurora.models_session_summary import AuroraSessionSummary
+from aurora.models_session_context import AuroraSessionContext
 from aurora.models_memory import AuroraUserMemory
 from aurora.models_personality import AuroraPersonality
 from aurora.routes_emotion import aurora_emotion_bp
+from aurora.maintenance import aurora_cli
+from aurora.emotion import TEXT_EMOTION_WARMUP, text_emotion
 
 # ----------------------------------------------------
 # Blueprints
@@ -56,6 +60,7 @@ from users.oauth import oauth_bp
 from routes.aurora_routes import aurora_bp
 from routes.emotion_routes import emotion_bp
 from routes.whisper_routes import whisper_bp
+import routes.aurora_voice_ws  # noqa: F401  (registers WS route on sock)
 
 # Videos
 from videos import videos_bp
@@ -121,6 +126,8 @@ def create_app():
     jwt.init_app(app)
     migrate.init_app(app, db)
     limiter.init_app(app)
+    if sock is not None:
+        sock.init_app(app)
 
     # ----------------------------------------------------
     # Register Blueprints
@@ -154,6 +161,11 @@ def create_app():
     # Aurora emotion routes
     app.register_blueprint(aurora_emotion_bp)
 
+    # ----------------------------------------------------
+    # CLI (maintenance jobs)
+    # ----------------------------------------------------
+    app.cli.add_command(aurora_cli)
+
     # ----------------------------------------------------
     # Health Check
     # ----------------------------------------------------
@@ -165,6 +177,13 @@ def create_app():
 
 if __name__ == "__main__":
     app = create_app()
+
+    # serving processes only (gunicorn: post_fork in gunicorn.conf.py);
+    # flask CLI commands never load the models. With the debug reloader,
+    # only the child process that actually serves warms up.
+    if TEXT_EMOTION_WARMUP and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        text_emotion.warm_up_async()
+
     app.run(
         debug=True,
         host="0.0.0.0",
@@ -0,0 +1,145 @@
+# backend/aurora/audio_store.py
+#
+# Serving and retention for per-user reply audio in
+# static/audio/aurora/<user_id>/.
+#
+# File names are derived from the synthesis inputs (session + TTS cache
+# key), so a finished file never changes and can be cached by the
+# browser for a year. Delivery can be offloaded to the front proxy:
+#   AURORA_AUDIO_OFFLOAD=nginx     -> X-Accel-Redirect to
+#                                     AURORA_AUDIO_ACCEL_PREFIX/<user>/<file>
+#   AURORA_AUDIO_OFFLOAD=sendfile  -> X-Sendfile with the absolute path
+#   (unset)                        -> Flask send_file with ETag + Range
+#
+# gc_user_audio() enforces an age limit and per-user quotas:
+#   flask aurora gc-audio
+
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from typing import Dict
+
+from flask import current_app, make_response, send_file
+
+AUDIO_OFFLOAD = os.getenv("AURORA_AUDIO_OFFLOAD", "").strip().lower()
+AUDIO_ACCEL_PREFIX = os.getenv("AURORA_AUDIO_ACCEL_PREFIX", "/_protected/aurora_audio").rstrip("/")
+AUDIO_MAX_AGE = 365 * 24 * 3600
+
+AUDIO_RETENTION_DAYS = int(os.getenv("AURORA_AUDIO_RETENTION_DAYS", "30"))
+AUDIO_USER_QUOTA_MB = int(os.getenv("AURORA_AUDIO_USER_QUOTA_MB", "200"))
+AUDIO_USER_MAX_FILES = int(os.getenv("AURORA_AUDIO_USER_MAX_FILES", "2000"))
+STALE_PART_SECONDS = 3600  # abandoned in-progress renders
+
+
+def audio_root() -> Path:
+    return Path(current_app.static_folder) / "audio" / "aurora"
+
+
+# -------------------------------------------------------
+# SERVING
+# -------------------------------------------------------
+
+def _immutable(resp):
+    # private: the route is authenticated, so shared caches must not keep it
+    resp.headers["Cache-Control"] = f"private, max-age={AUDIO_MAX_AGE}, immutable"
+    return resp
+
+
+def send_user_audio(filepath: Path, user_id, filename: str):
+    """Finished audio file with long-lived caching, ETag and Range support."""
+    if AUDIO_OFFLOAD == "nginx":
+        resp = make_response("", 200)
+        resp.headers["X-Accel-Redirect"] = f"{AUDIO_ACCEL_PREFIX}/{user_id}/{filename}"
+        resp.headers["Content-Type"] = "audio/mpeg"
+        resp.headers["Content-Disposition"] = f'inline; filename="{filename}"'
+        return _immutable(resp)
+
+    if AUDIO_OFFLOAD == "sendfile":
+        resp = make_response("", 200)
+        resp.headers["X-Sendfile"] = str(filepath.resolve())
+        resp.headers["Content-Type"] = "audio/mpeg"
+        resp.headers["Content-Disposition"] = f'inline; filename="{filename}"'
+        return _immutable(resp)
+
+    resp = send_file(
+        filepath,
+        mimetype="audio/mpeg",
+        as_attachment=False,
+        download_name=filename,
+        conditional=True,   # If-None-Match / If-Modified-Since / Range
+        etag=True,
+        max_age=AUDIO_MAX_AGE,
+    )
+    return _immutable(resp)
+
+
+# -------------------------------------------------------
+# RETENTION / GC
+# -------------------------------------------------------
+
+def gc_user_audio(
+    *,
+    max_age_days: int = AUDIO_RETENTION_DAYS,
+    user_quota_bytes: int = AUDIO_USER_QUOTA_MB * 1024 * 1024,
+    user_max_files: int = AUDIO_USER_MAX_FILES,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """
+    Delete reply audio older than `max_age_days`, then trim each user's
+    directory (oldest first) to `user_quota_bytes` / `user_max_files`.
+    Abandoned .part files older than an hour are removed too.
+    """
+    root = audio_root()
+    now = time.time()
+    cutoff = now - max_age_days * 86400
+
+    stats = {"users": 0, "deleted": 0, "freed_bytes": 0, "kept": 0}
+
+    if not root.is_dir():
+        return stats
+
+    def _remove(path: Path, size: int):
+        if not dry_run:
+            try:
+                path.unlink()
+            except OSError:
+                return
+        stats["deleted"] += 1
+        stats["freed_bytes"] += size
+
+    for user_dir in root.iterdir():
+        if not user_dir.is_dir():
+            continue
+        stats["users"] += 1
+
+        files = []
+        for entry in os.scandir(user_dir):
+            if not entry.is_file():
+                continue
+            st = entry.stat()
+            path = Path(entry.path)
+
+            if entry.name.endswith(".part"):
+                if st.st_mtime < now - STALE_PART_SECONDS:
+                    _remove(path, st.st_size)
+                continue
+
+            if st.st_mtime < cutoff:
+                _remove(path, st.st_size)
+                continue
+
+            files.append((st.st_mtime, st.st_size, path))
+
+        # newest first; everything past the quota goes
+        files.sort(reverse=True)
+        used = 0
+        for n, (_, size, path) in enumerate(files):
+            if n >= user_max_files or used + size > user_quota_bytes:
+                _remove(path, size)
+                continue
+            used += size
+            stats["kept"] += 1
+
+    return stats
@@ -2,15 +2,14 @@
 
 import os
 import time
-from typing import List, Dict, Optional
+from typing import Dict, Optional
 
-from openai import OpenAI
-from aurora.models_messages import AuroraMessage
 from services.datetime_context import get_time_context
-from aurora.memory_store import fetch_user_memory
+from aurora.memory_store import retrieve_relevant_memory, format_memory_line
+from aurora.history import build_history
 from aurora.personality import resolve_effective_personality
+from services.llm_gateway import chat_completion
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 MODEL_NAME = os.getenv("AURORA_MODEL", "gpt-4o-mini")
 
 
@@ -19,6 +18,7 @@ def _build_system_prompt(
     relationship,
     guardrail_result,
     live_emotion: Optional[Dict] = None,
+    query_text: Optional[str] = None,
 ) -> str:
     familiarity = relationship.familiarity_score
     trust = relationship.trust_score
@@ -43,10 +43,11 @@ def _build_system_prompt(
         "You may naturally reference time-of-day if appropriate."
     )
 
-    memory_records = fetch_user_memory(user_id)
+    # Only memories relevant to the current message, within a token budget
+    memory_records = retrieve_relevant_memory(user_id, query_text)
     memory_instruction = ""
     if memory_records:
-        formatted_memory = [f"{m.key}: {m.value}" for m in memory_records]
+        formatted_memory = [format_memory_line(m) for m in memory_records]
         memory_instruction = "Long-term memory about this user:\n" + "\n".join(formatted_memory)
 
     relationship_instruction = (
@@ -131,29 +132,13 @@ def _build_system_prompt(
     ])
 
 
-def _fetch_recent_messages(user_id, session_id, limit: int = 10) -> List[Dict]:
-    messages = (
-        AuroraMessage.query
-        .filter_by(user_id=user_id, session_id=session_id)
-        .order_by(AuroraMessage.created_at.desc())
-        .limit(limit)
-        .all()
-    )
-
-    messages = list(reversed(messages))
-
-    return [
-        {"role": m.role, "content": m.content}
-        for m in messages
-    ]
-
-
 def generate_reply(
     user_id,
     session_id,
     relationship,
     guardrail_result,
     live_emotion: Optional[Dict] = None,
+    user_text: Optional[str] = None,
 ):
     start_time = time.time()
 
@@ -162,15 +147,18 @@ def generate_reply(
         relationship,
         guardrail_result,
         live_emotion=live_emotion,
+        query_text=user_text,
     )
 
-    conversation_history = _fetch_recent_messages(user_id, session_id)
+    # Rolling summary + newest turns, within AURORA_HISTORY_TOKEN_BUDGET
+    conversation_history, history_stats = build_history(user_id, session_id)
 
     messages_payload = [
         {"role": "system", "content": system_prompt}
     ] + conversation_history
 
-    response = client.chat.completions.create(
+    response = chat_completion(
+        "brain_user",
         model=MODEL_NAME,
         messages=messages_payload,
         max_tokens=90,
@@ -186,6 +174,7 @@ def generate_reply(
         "completion_tokens": response.usage.completion_tokens,
         "total_tokens": response.usage.total_tokens,
         "latency_ms": duration_ms,
+        **history_stats,
     }
 
     return reply_text, usage
\ No newline at end of file
@@ -0,0 +1,83 @@
+# backend/aurora/db_budget.py
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+
+# A converse turn should land in at most two transactions:
+#   1) user message + relationship update
+#   2) assistant message + memory promotion
+TURN_COMMIT_BUDGET = 2
+TURN_QUERY_BUDGET = 16
+
+
+@dataclass
+class DBBudget:
+    commits: int = 0
+    queries: int = 0
+
+    def within(self, *, commits: int = TURN_COMMIT_BUDGET, queries: int = TURN_QUERY_BUDGET) -> bool:
+        return self.commits <= commits and self.queries <= queries
+
+    def to_dict(self):
+        return {"commits": self.commits, "queries": self.queries}
+
+
+_local = threading.local()
+_installed = False
+_install_lock = threading.Lock()
+
+
+def _on_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    budget = getattr(_local, "budget", None)
+    if budget is not None:
+        budget.queries += 1
+
+
+def _on_commit(session):
+    budget = getattr(_local, "budget", None)
+    if budget is not None:
+        budget.commits += 1
+
+
+def _install_listeners():
+    """
+    Listeners are registered once, globally, and only count while a
+    tracker is active on the current thread.
+    """
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        event.listen(Engine, "before_cursor_execute", _on_cursor_execute)
+        event.listen(Session, "after_commit", _on_commit)
+        _installed = True
+
+
+@contextmanager
+def track_db_budget(label: str = "turn"):
+    """
+    Count commits and SQL statements issued on this thread.
+    Warns when the turn goes over TURN_COMMIT_BUDGET / TURN_QUERY_BUDGET.
+    """
+    _install_listeners()
+
+    previous = getattr(_local, "budget", None)
+    budget = DBBudget()
+    _local.budget = budget
+
+    try:
+        yield budget
+    finally:
+        _local.budget = previous
+
+        if not budget.within():
+            print(f"\n⚠️ DB BUDGET EXCEEDED ({label}): {budget.to_dict()} "
+                  f"(budget: {TURN_COMMIT_BUDGET} commits, {TURN_QUERY_BUDGET} queries)\n")
@@ -1,14 +1,40 @@
 # backend/aurora/emotion.py
+#
+# Text sentiment + emotion tagging as a small in-process service.
+#
+#   - warm_up() loads both models and runs one inference; create_app
+#     starts it in the background so no user pays the load stall
+#   - analyze_text_emotion(text) goes through a micro-batching queue:
+#     calls arriving within TEXT_BATCH_WAIT_MS share one forward pass
+#     per model (up to TEXT_BATCH_MAX texts)
+#   - analyze_text_emotion_bulk(texts) classifies directly in batches,
+#     for backfills (flask aurora tag-emotions)
+#   - AURORA_TEXT_EMOTION_ONNX_DIR switches to ONNX Runtime models made
+#     by `flask aurora export-text-emotion-onnx` (quantized int8 on CPU)
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, Any, Optional
+import os
+import queue
 import re
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+SENTIMENT_MODEL = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+EMOTION_MODEL = "bhadresh-savani/distilbert-base-uncased-emotion"
+
+TEXT_EMOTION_ONNX_DIR = os.getenv("AURORA_TEXT_EMOTION_ONNX_DIR", "").strip()
+TEXT_EMOTION_WARMUP = os.getenv("AURORA_TEXT_EMOTION_WARMUP", "true").lower() == "true"
 
-# Lazy-load transformers so your Flask server doesn't feel "stuck" on boot.
-_sentiment_pipe = None
-_emotion_pipe = None
+TEXT_BATCH_MAX = int(os.getenv("AURORA_TEXT_EMOTION_BATCH_MAX", "32"))
+TEXT_BATCH_WAIT_MS = float(os.getenv("AURORA_TEXT_EMOTION_BATCH_WAIT_MS", "15"))
+TEXT_RESULT_TIMEOUT = 30.0
+TEXT_MAX_TOKENS = 256
+
+QUANTIZED_FILE = "model_quantized.onnx"
 
 
 @dataclass
@@ -29,22 +55,6 @@ def _normalize(text: str) -> str:
     return text
 
 
-def _load_pipelines():
-    global _sentiment_pipe, _emotion_pipe
-    if _sentiment_pipe is None or _emotion_pipe is None:
-        from transformers import pipeline
-
-        _sentiment_pipe = pipeline(
-            "sentiment-analysis",
-            model="cardiffnlp/twitter-roberta-base-sentiment-latest"
-        )
-
-        _emotion_pipe = pipeline(
-            "text-classification",
-            model="bhadresh-savani/distilbert-base-uncased-emotion"
-        )
-
-
 def _sentiment_to_valence(label: str, score: float) -> float:
     """
     Map sentiment label -> valence in [-1, 1]
@@ -82,48 +92,229 @@ def _emotion_to_pad(label: str) -> Dict[str, float]:
     return {"valence": v, "arousal": a, "dominance": d}
 
 
+def _to_result(sent: Dict[str, Any], emo: Dict[str, Any]) -> Dict[str, Any]:
+    sentiment_label = sent.get("label")
+    sentiment_score = float(sent.get("score", 0.0))
+
+    emotion_label = emo.get("label")
+    emotion_score = float(emo.get("score", 0.0))
+
+    pad = _emotion_to_pad(emotion_label)
+
+    # Optional: valence from sentiment in [-1,1] + PAD valence in [0,1]
+    # We'll keep both: PAD is [0,1], sentiment-valence is [-1,1]
+    sentiment_valence = _sentiment_to_valence(sentiment_label, sentiment_score)
+
+    return EmotionResult(
+        sentiment_label=sentiment_label,
+        sentiment_score=round(sentiment_score, 4),
+        emotion_label=emotion_label,
+        emotion_score=round(emotion_score, 4),
+        valence=pad["valence"],
+        arousal=pad["arousal"],
+        dominance=pad["dominance"],
+        raw={
+            "sentiment_valence": round(sentiment_valence, 4),
+            "sentiment_raw": sent,
+            "emotion_raw": emo,
+        }
+    ).__dict__
+
+
+# -------------------------------------------------------
+# MODELS
+# -------------------------------------------------------
+
+def _build_pipeline(task: str, model_id: str, subdir: str):
+    from transformers import pipeline
+
+    if not TEXT_EMOTION_ONNX_DIR:
+        return pipeline(task, model=model_id)
+
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer
+
+    path = os.path.join(TEXT_EMOTION_ONNX_DIR, subdir)
+    file_name = QUANTIZED_FILE if os.path.exists(os.path.join(path, QUANTIZED_FILE)) else "model.onnx"
+    model = ORTModelForSequenceClassification.from_pretrained(path, file_name=file_name)
+    return pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(path))
+
+
+def export_onnx(out_dir: str, quantize: bool = True) -> Dict[str, str]:
+    """Export both models to ONNX (optionally dynamic int8) under out_dir."""
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    written = {}
+    for subdir, model_id in (("sentiment", SENTIMENT_MODEL), ("emotion", EMOTION_MODEL)):
+        path = os.path.join(out_dir, subdir)
+        model = ORTModelForSequenceClassification.from_pretrained(model_id, export=True)
+        model.save_pretrained(path)
+        AutoTokenizer.from_pretrained(model_id).save_pretrained(path)
+
+        if quantize:
+            quantizer = ORTQuantizer.from_pretrained(path)
+            quantizer.quantize(
+                save_dir=path,
+                quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False),
+            )
+        written[subdir] = path
+    return written
+
+
+# -------------------------------------------------------
+# SERVICE
+# -------------------------------------------------------
+
+class TextEmotionService:
+    def __init__(self):
+        self._sentiment = None
+        self._emotion = None
+        self._load_lock = threading.Lock()
+
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+        self._stats = {"texts": 0, "batches": 0, "errors": 0, "infer_ms": 0.0, "load_ms": 0.0}
+
+    # ---------------- loading ----------------
+
+    @property
+    def ready(self) -> bool:
+        return self._sentiment is not None and self._emotion is not None
+
+    def load(self):
+        if self.ready:
+            return
+        with self._load_lock:
+            if self.ready:
+                return
+            started = time.perf_counter()
+            sentiment = _build_pipeline("sentiment-analysis", SENTIMENT_MODEL, "sentiment")
+            emotion = _build_pipeline("text-classification", EMOTION_MODEL, "emotion")
+            self._sentiment, self._emotion = sentiment, emotion
+            self._stats["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            print(f"🧠 Text emotion models ready ({'onnx' if TEXT_EMOTION_ONNX_DIR else 'torch'}, "
+                  f"{self._stats['load_ms']} ms)")
+
+    def warm_up(self):
+        self.load()
+        self.classify_batch(["warming up"])
+
+    def warm_up_async(self):
+        def _run():
+            try:
+                self.warm_up()
+            except Exception as e:
+                print("\n!!!! TEXT EMOTION WARM-UP ERROR !!!!")
+                print(str(e))
+                print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+
+        threading.Thread(target=_run, name="aurora-text-emotion-warmup", daemon=True).start()
+
+    # ---------------- inference ----------------
+
+    def classify_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """One forward pass per model for all non-empty texts."""
+        self.load()
+
+        cleaned = [_normalize(t) for t in texts]
+        idx = [i for i, t in enumerate(cleaned) if t]
+        results: List[Dict[str, Any]] = [
+            EmotionResult(raw={"reason": "empty_text"}).__dict__ for _ in texts
+        ]
+        if not idx:
+            return results
+
+        batch = [cleaned[i] for i in idx]
+        started = time.perf_counter()
+        kwargs = {"batch_size": len(batch), "truncation": True, "max_length": TEXT_MAX_TOKENS}
+        sents = self._sentiment(batch, **kwargs)
+        emos = self._emotion(batch, **kwargs)
+
+        self._stats["batches"] += 1
+        self._stats["texts"] += len(batch)
+        self._stats["infer_ms"] += (time.perf_counter() - started) * 1000
+
+        for i, sent, emo in zip(idx, sents, emos):
+            results[i] = _to_result(sent, emo)
+        return results
+
+    def submit(self, text: str) -> Future:
+        self._ensure_worker()
+        fut: Future = Future()
+        self._queue.put((text, fut))
+        return fut
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="aurora-text-emotion", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + TEXT_BATCH_WAIT_MS / 1000.0
+            while len(batch) < TEXT_BATCH_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                results = self.classify_batch([t for t, _ in batch])
+                for (_, fut), res in zip(batch, results):
+                    fut.set_result(res)
+            except Exception as e:
+                self._stats["errors"] += 1
+                for _, fut in batch:
+                    fut.set_exception(e)
+
+    # ---------------- public ----------------
+
+    def analyze(self, text: str) -> Dict[str, Any]:
+        """Never throws: returns safe defaults on failure."""
+        if not _normalize(text):
+            return EmotionResult(raw={"reason": "empty_text"}).__dict__
+        try:
+            return self.submit(text).result(timeout=TEXT_RESULT_TIMEOUT)
+        except Exception as e:
+            # Never block conversation
+            return EmotionResult(raw={"error": str(e)}).__dict__
+
+    def analyze_bulk(self, texts: List[str], batch_size: int = 64) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        for i in range(0, len(texts), batch_size):
+            out.extend(self.classify_batch(texts[i:i + batch_size]))
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        s = dict(self._stats)
+        s["ready"] = self.ready
+        s["queued"] = self._queue.qsize()
+        s["avg_batch"] = round(s["texts"] / s["batches"], 2) if s["batches"] else 0.0
+        s["infer_ms"] = round(s["infer_ms"], 1)
+        return s
+
+
+text_emotion = TextEmotionService()
+
+
 def analyze_text_emotion(text: str) -> Dict[str, Any]:
     """
     Lightweight text emotion + sentiment tagging.
     Never throws: returns safe defaults on failure.
     """
-    try:
-        _load_pipelines()
+    return text_emotion.analyze(text)
 
-        t = _normalize(text)
-        if not t:
-            return EmotionResult(raw={"reason": "empty_text"}).__dict__
 
-        sent = _sentiment_pipe(t)[0]
-        emo = _emotion_pipe(t)[0]
-
-        sentiment_label = sent.get("label")
-        sentiment_score = float(sent.get("score", 0.0))
-
-        emotion_label = emo.get("label")
-        emotion_score = float(emo.get("score", 0.0))
-
-        pad = _emotion_to_pad(emotion_label)
-
-        # Optional: valence from sentiment in [-1,1] + PAD valence in [0,1]
-        # We'll keep both: PAD is [0,1], sentiment-valence is [-1,1]
-        sentiment_valence = _sentiment_to_valence(sentiment_label, sentiment_score)
-
-        return EmotionResult(
-            sentiment_label=sentiment_label,
-            sentiment_score=round(sentiment_score, 4),
-            emotion_label=emotion_label,
-            emotion_score=round(emotion_score, 4),
-            valence=pad["valence"],
-            arousal=pad["arousal"],
-            dominance=pad["dominance"],
-            raw={
-                "sentiment_valence": round(sentiment_valence, 4),
-                "sentiment_raw": sent,
-                "emotion_raw": emo,
-            }
-        ).__dict__
-
-    except Exception as e:
-        # Never block conversation
-        return EmotionResult(raw={"error": str(e)}).__dict__
+def analyze_text_emotion_bulk(texts: List[str], batch_size: int = 64) -> List[Dict[str, Any]]:
+    return text_emotion.analyze_bulk(texts, batch_size=batch_size)
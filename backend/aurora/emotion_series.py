@@ -0,0 +1,433 @@
+# backend/aurora/emotion_series.py
+#
+# Per-session PAD time series (aurora/pad_series.py), held in memory and
+# flushed to one AuroraEmotionSeries row per (session, source).
+#
+#   record_pad_samples(user_id, session_id, "face", [(t, pad), ...])
+#       frame routes (aurora/routes_emotion.py)
+#   record_pad_samples(user_id, session_id, "text", ...)
+#       emotion tagging worker + backfill (aurora/emotion_tagging.py)
+#   session_pad_summary(user_id, session_id, "text")
+#       summarize_session: count/min/mean/max per axis, O(1)
+#
+# A series belongs to the user who owns the session: a new one is only
+# started for a session that has an AuroraMessage from that user, and
+# reads/writes from any other user are refused.
+#
+# Writes only touch memory. A daemon thread upserts dirty series every
+# SERIES_FLUSH_INTERVAL_S in one statement and drops series that have
+# been idle for SERIES_IDLE_S. The upsert adds only what was recorded
+# since the last flush (count, sums, LEAST/GREATEST for min/max), so
+# workers recording into the same session never overwrite each other's
+# totals. The raw/rollup blobs are detail views and are last-writer-wins.
+
+from __future__ import annotations
+
+import atexit
+import copy
+import math
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import defer
+
+from extensions import db
+from aurora.models_emotion_series import AuroraEmotionSeries
+from aurora.models_messages import AuroraMessage
+from aurora.pad_series import AXES, PadSeries
+
+SERIES_FLUSH_INTERVAL_S = float(os.getenv("AURORA_EMOTION_SERIES_FLUSH_S", "15"))
+SERIES_IDLE_S = float(os.getenv("AURORA_EMOTION_SERIES_IDLE_S", "1800"))
+SERIES_MAX_IN_MEMORY = int(os.getenv("AURORA_EMOTION_SERIES_MAX", "5000"))
+
+SOURCES = ("face", "text")
+
+
+def _session_uuid(value) -> Optional[uuid.UUID]:
+    if isinstance(value, uuid.UUID):
+        return value
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _epoch(dt: Optional[datetime]) -> Optional[float]:
+    return dt.replace(tzinfo=timezone.utc).timestamp() if dt else None
+
+
+def _utc(ts: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None) if ts is not None else None
+
+
+def _row_totals(row: AuroraEmotionSeries) -> Dict[str, Any]:
+    totals: Dict[str, Any] = {
+        "count": row.sample_count,
+        "first_at": _epoch(row.first_at),
+        "last_at": _epoch(row.last_at),
+    }
+    for axis in AXES:
+        for stat in ("sum", "min", "max"):
+            totals[f"{axis}_{stat}"] = getattr(row, f"{axis}_{stat}")
+    return totals
+
+
+def _row_summary(row: AuroraEmotionSeries, pending: Optional["_Delta"] = None) -> Dict[str, Any]:
+    """Stored totals (every worker's flushes) plus this process's unflushed samples."""
+    extra = pending.count if pending else 0
+    count = row.sample_count + extra
+    firsts = [t for t in (_epoch(row.first_at), pending and pending.first_at) if t is not None]
+    lasts = [t for t in (_epoch(row.last_at), pending and pending.last_at) if t is not None]
+    out: Dict[str, Any] = {
+        "count": count,
+        "first_at": min(firsts) if firsts else None,
+        "last_at": max(lasts) if lasts else None,
+    }
+    for k, axis in enumerate(AXES):
+        total = (getattr(row, f"{axis}_sum") or 0.0) + (pending.sum[k] if extra else 0.0)
+        mins = [v for v in (getattr(row, f"{axis}_min"), pending.min[k] if extra else None) if v is not None]
+        maxs = [v for v in (getattr(row, f"{axis}_max"), pending.max[k] if extra else None) if v is not None]
+        out[axis] = None if not count or not mins else {
+            "min": round(min(mins), 4),
+            "mean": round(total / count, 4),
+            "max": round(max(maxs), 4),
+        }
+    return out
+
+
+@dataclass
+class _Delta:
+    """Samples recorded since the last successful flush."""
+    count: int = 0
+    first_at: Optional[float] = None
+    last_at: Optional[float] = None
+    sum: List[float] = field(default_factory=lambda: [0.0] * len(AXES))
+    min: List[float] = field(default_factory=lambda: [float("inf")] * len(AXES))
+    max: List[float] = field(default_factory=lambda: [float("-inf")] * len(AXES))
+
+    def add(self, t: float, pad: Dict[str, Any]):
+        self.count += 1
+        self.first_at = t if self.first_at is None else min(self.first_at, t)
+        self.last_at = t if self.last_at is None else max(self.last_at, t)
+        for k, axis in enumerate(AXES):
+            v = float(pad[axis])
+            self.sum[k] += v
+            self.min[k] = min(self.min[k], v)
+            self.max[k] = max(self.max[k], v)
+
+    def merge(self, other: "_Delta"):
+        """Put back a delta whose flush failed."""
+        if not other.count:
+            return
+        self.count += other.count
+        self.first_at = other.first_at if self.first_at is None else min(self.first_at, other.first_at)
+        self.last_at = other.last_at if self.last_at is None else max(self.last_at, other.last_at)
+        for k in range(len(AXES)):
+            self.sum[k] += other.sum[k]
+            self.min[k] = min(self.min[k], other.min[k])
+            self.max[k] = max(self.max[k], other.max[k])
+
+
+@dataclass
+class _Entry:
+    user_id: uuid.UUID
+    session_id: uuid.UUID
+    source: str
+    series: PadSeries
+    pending: _Delta = field(default_factory=_Delta)
+    dirty: bool = False
+    touched: float = field(default_factory=time.monotonic)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class EmotionSeriesStore:
+    def __init__(self):
+        self._entries: Dict[Tuple[uuid.UUID, str], _Entry] = {}
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._app = None
+
+        self._stats = {"samples": 0, "loaded": 0, "flushes": 0, "rows_written": 0, "evicted": 0, "rejected": 0, "errors": 0}
+
+    # ---------------- memory ----------------
+
+    def _load(self, session_id: uuid.UUID, source: str) -> Optional[_Entry]:
+        row = AuroraEmotionSeries.query.filter_by(session_id=session_id, source=source).first()
+        if row is None:
+            return None
+        series = PadSeries()
+        series.restore(row.raw_blob, row.rollup_blob, _row_totals(row))
+        self._stats["loaded"] += 1
+        return _Entry(user_id=row.user_id, session_id=session_id, source=source, series=series)
+
+    @staticmethod
+    def _owns_session(user_id: uuid.UUID, session_id: uuid.UUID) -> bool:
+        return (
+            db.session.query(AuroraMessage.id)
+            .filter_by(user_id=user_id, session_id=session_id)
+            .first()
+        ) is not None
+
+    def _entry(self, session_id: uuid.UUID, source: str, user_id: Optional[uuid.UUID] = None) -> Optional[_Entry]:
+        """Cached or stored series; with `user_id`, start one if the user owns the session."""
+        key = (session_id, source)
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        # DB reads outside the store lock; a racing loader just loses setdefault
+        entry = self._load(session_id, source)
+        if entry is None:
+            if user_id is None or not self._owns_session(user_id, session_id):
+                return None
+            entry = _Entry(user_id=user_id, session_id=session_id, source=source, series=PadSeries())
+
+        with self._lock:
+            return self._entries.setdefault(key, entry)
+
+    def record(self, user_id, session_id, source: str, samples: Iterable[Tuple[float, Dict[str, Any]]]) -> int:
+        sid = _session_uuid(session_id)
+        uid = _session_uuid(user_id)
+        if sid is None or uid is None or source not in SOURCES:
+            return 0
+
+        self._ensure_worker()
+        entry = self._entry(sid, source, user_id=uid)
+        if entry is None or entry.user_id != uid:
+            self._stats["rejected"] += 1
+            return 0
+
+        added = 0
+        with entry.lock:
+            for t, pad in samples:
+                if not math.isfinite(t) or any(pad.get(axis) is None for axis in AXES):
+                    continue
+                entry.series.add(float(t), pad)
+                entry.pending.add(float(t), pad)
+                added += 1
+            if added:
+                entry.dirty = True
+            entry.touched = time.monotonic()
+
+        self._stats["samples"] += added
+        return added
+
+    def summary(self, user_id, session_id, source: str) -> Optional[Dict[str, Any]]:
+        sid = _session_uuid(session_id)
+        uid = _session_uuid(user_id)
+        if sid is None or uid is None:
+            return None
+
+        entry = self._entries.get((sid, source))
+        if entry is not None and entry.user_id != uid:
+            return None
+
+        # the row holds what every worker has flushed; this process's
+        # cached series only knows its own samples
+        row = (
+            AuroraEmotionSeries.query
+            .options(defer(AuroraEmotionSeries.raw_blob), defer(AuroraEmotionSeries.rollup_blob))
+            .filter_by(user_id=uid, session_id=sid, source=source)
+            .first()
+        )
+        if entry is None:
+            return _row_summary(row) if row else None
+
+        with entry.lock:
+            if row is None:
+                return entry.series.summary()
+            pending = copy.deepcopy(entry.pending)
+        return _row_summary(row, pending)
+
+    def series(
+        self,
+        session_id,
+        source: str,
+        *,
+        user_id=None,
+        resolution: Optional[int] = None,
+        since: Optional[float] = None,
+        recent: int = 0,
+    ) -> Optional[Dict[str, Any]]:
+        sid = _session_uuid(session_id)
+        if sid is None:
+            return None
+
+        entry = self._entry(sid, source)
+        if entry is None or (user_id is not None and entry.user_id != _session_uuid(user_id)):
+            return None
+
+        with entry.lock:
+            entry.touched = time.monotonic()
+            out = {
+                "source": source,
+                "summary": entry.series.summary(),
+                "buckets": entry.series.downsample(resolution, since=since),
+            }
+            if recent:
+                out["recent"] = entry.series.recent(recent)
+        return out
+
+    # ---------------- flushing ----------------
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._app = current_app._get_current_object()
+                self._worker = threading.Thread(target=self._run, name="aurora-emotion-series", daemon=True)
+                self._worker.start()
+                atexit.register(self._flush_at_exit)
+
+    def _run(self):
+        while True:
+            time.sleep(SERIES_FLUSH_INTERVAL_S)
+            try:
+                with self._app.app_context():
+                    self.flush()
+                self._evict()
+            except Exception as e:
+                self._stats["errors"] += 1
+                print("\n!!!! EMOTION SERIES WORKER ERROR !!!!")
+                print(repr(e))
+                print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+
+    def _flush_at_exit(self):
+        if self._app is not None:
+            with self._app.app_context():
+                self.flush()
+
+    @staticmethod
+    def _upsert(rows: List[Dict[str, Any]]):
+        table = AuroraEmotionSeries.__table__
+        stmt = pg_insert(table).values(rows)
+        new = stmt.excluded
+
+        # add this process's delta to whatever other workers have flushed;
+        # LEAST/GREATEST skip NULLs, so an empty side never wins
+        merged = {
+            "sample_count": table.c.sample_count + new.sample_count,
+            "first_at": func.least(table.c.first_at, new.first_at),
+            "last_at": func.greatest(table.c.last_at, new.last_at),
+            "raw_blob": new.raw_blob,
+            "rollup_blob": new.rollup_blob,
+            "updated_at": new.updated_at,
+        }
+        for axis in AXES:
+            merged[f"{axis}_sum"] = func.coalesce(table.c[f"{axis}_sum"], 0.0) + func.coalesce(new[f"{axis}_sum"], 0.0)
+            merged[f"{axis}_min"] = func.least(table.c[f"{axis}_min"], new[f"{axis}_min"])
+            merged[f"{axis}_max"] = func.greatest(table.c[f"{axis}_max"], new[f"{axis}_max"])
+
+        return stmt.on_conflict_do_update(constraint="uq_aurora_emotion_series_session_source", set_=merged)
+
+    def flush(self) -> int:
+        with self._lock:
+            dirty = [e for e in self._entries.values() if e.dirty]
+        if not dirty:
+            return 0
+
+        now = datetime.utcnow()
+        rows: List[Dict[str, Any]] = []
+        taken: List[Tuple[_Entry, _Delta]] = []
+        for entry in dirty:
+            with entry.lock:
+                delta, entry.pending = entry.pending, _Delta()
+                raw = entry.series.pack_raw()
+                rollups = entry.series.pack_rollups()
+                entry.dirty = False
+
+            # one unstorable entry must not take the others' deltas with it
+            try:
+                row = {
+                    "id": uuid.uuid4(),
+                    "user_id": entry.user_id,
+                    "session_id": entry.session_id,
+                    "source": entry.source,
+                    "sample_count": delta.count,
+                    "first_at": _utc(delta.first_at),
+                    "last_at": _utc(delta.last_at),
+                    "raw_blob": raw,
+                    "rollup_blob": rollups,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for k, axis in enumerate(AXES):
+                    row[f"{axis}_sum"] = delta.sum[k] if delta.count else None
+                    row[f"{axis}_min"] = delta.min[k] if delta.count else None
+                    row[f"{axis}_max"] = delta.max[k] if delta.count else None
+            except Exception as e:
+                self._stats["errors"] += 1
+                print("\n!!!! EMOTION SERIES ROW ERROR !!!!")
+                print(entry.session_id, entry.source, repr(e))
+                print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+                continue
+            taken.append((entry, delta))
+            rows.append(row)
+
+        if not rows:
+            return 0
+
+        try:
+            db.session.execute(self._upsert(rows))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            # hand the deltas back; samples recorded meanwhile stay in place
+            for entry, delta in taken:
+                with entry.lock:
+                    entry.pending.merge(delta)
+                    entry.dirty = True
+            self._stats["errors"] += 1
+            print("\n!!!! EMOTION SERIES FLUSH ERROR !!!!")
+            print(str(e))
+            print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+            return 0
+
+        self._stats["flushes"] += 1
+        self._stats["rows_written"] += len(rows)
+        return len(rows)
+
+    def _evict(self):
+        cutoff = time.monotonic() - SERIES_IDLE_S
+        with self._lock:
+            clean = sorted(
+                (e for e in self._entries.values() if not e.dirty),
+                key=lambda e: e.touched,
+            )
+            over = max(0, len(self._entries) - SERIES_MAX_IN_MEMORY)
+            for i, entry in enumerate(clean):
+                if i >= over and entry.touched >= cutoff:
+                    break
+                del self._entries[(entry.session_id, entry.source)]
+                self._stats["evicted"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_memory = len(self._entries)
+            dirty = sum(1 for e in self._entries.values() if e.dirty)
+        return {**self._stats, "in_memory": in_memory, "dirty": dirty}
+
+
+emotion_series = EmotionSeriesStore()
+
+
+def record_pad_samples(user_id, session_id, source: str, samples: Iterable[Tuple[float, Dict[str, Any]]]) -> int:
+    return emotion_series.record(user_id, session_id, source, samples)
+
+
+def session_pad_summary(user_id, session_id, source: str) -> Optional[Dict[str, Any]]:
+    """count / first_at / last_at and min/mean/max per axis, or None."""
+    return emotion_series.summary(user_id, session_id, source)
+
+
+def emotion_series_stats() -> Dict[str, Any]:
+    return emotion_series.stats()
@@ -1,10 +1,37 @@
 # backend/aurora/emotion_state.py
+#
+# Smoothed PAD state per user.
+#
+# Engines live in a bounded store: N lock stripes, each an LRU with an
+# idle TTL, so one busy user never blocks another and users who stop
+# calling are forgotten. With AURORA_EMOTION_STORE=shared the state is
+# kept in the cross-worker session store (services/session_store.py,
+# sqlite backend) so every worker smooths the same stream; each update
+# is one read-modify-write transaction there, so concurrent frames for a
+# user from different workers are applied in turn, not lost.
+#
+# Decay toward neutral is a function of elapsed time and is applied on
+# read and before each update; nothing has to poll /emotion/decay.
 
 from __future__ import annotations
 
+import os
+import time
+import zlib
+from collections import OrderedDict
 from dataclasses import dataclass
 from threading import Lock
-from typing import Dict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.session_store import session_store
+
+EMOTION_STORE_BACKEND = os.getenv("AURORA_EMOTION_STORE", "memory").strip().lower()  # memory | shared
+EMOTION_ENGINES_MAX = int(os.getenv("AURORA_EMOTION_ENGINES_MAX", "20000"))
+EMOTION_ENGINE_TTL = float(os.getenv("AURORA_EMOTION_ENGINE_TTL_SECONDS", "3600"))
+EMOTION_LOCK_STRIPES = 64
+
+DECAY_RATE = 0.02          # pull toward neutral per DECAY_TICK_SECONDS
+DECAY_TICK_SECONDS = 1.0
 
 
 def _clip(v: float) -> float:
@@ -20,25 +47,37 @@ class PADState:
 
 class EmotionTemporalEngine:
     """
-    Process-local smoothing engine.
-    For multi-worker production, move this state to Redis or DB.
+    EMA smoothing of PAD with time-based decay toward neutral.
+    `updated_at` is the wall-clock time the state was last written.
     """
 
-    def __init__(self):
-        self.state = PADState()
+    def __init__(self, state: Optional[PADState] = None, updated_at: Optional[float] = None):
+        self.state = state or PADState()
+        self.updated_at = updated_at if updated_at is not None else time.time()
 
-    def update(self, new_pad: Dict[str, float], alpha: float = 0.22) -> Dict[str, float]:
+    def _decayed(self, now: float, rate: float = DECAY_RATE) -> PADState:
+        ticks = max(0.0, now - self.updated_at) / DECAY_TICK_SECONDS
+        keep = (1.0 - rate) ** ticks
+        neutral = 0.5
+        return PADState(
+            valence=_clip(neutral + (self.state.valence - neutral) * keep),
+            arousal=_clip(neutral + (self.state.arousal - neutral) * keep),
+            dominance=_clip(neutral + (self.state.dominance - neutral) * keep),
+        )
+
+    def update(self, new_pad: Dict[str, float], alpha: float = 0.22, now: Optional[float] = None) -> Dict[str, float]:
+        now = time.time() if now is None else now
+        self.state = self._decayed(now)
         self.state.valence = _clip((1 - alpha) * self.state.valence + alpha * new_pad["valence"])
         self.state.arousal = _clip((1 - alpha) * self.state.arousal + alpha * new_pad["arousal"])
         self.state.dominance = _clip((1 - alpha) * self.state.dominance + alpha * new_pad["dominance"])
+        self.updated_at = now
         return self.to_dict()
 
-    def decay(self, rate: float = 0.015) -> Dict[str, float]:
-        neutral = 0.5
-        self.state.valence = _clip(self.state.valence + (neutral - self.state.valence) * rate)
-        self.state.arousal = _clip(self.state.arousal + (neutral - self.state.arousal) * rate)
-        self.state.dominance = _clip(self.state.dominance + (neutral - self.state.dominance) * rate)
-        return self.to_dict()
+    def read(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Current state with decay applied; does not modify the engine."""
+        s = self._decayed(time.time() if now is None else now)
+        return {"valence": s.valence, "arousal": s.arousal, "dominance": s.dominance}
 
     def to_dict(self) -> Dict[str, float]:
         return {
@@ -47,13 +86,163 @@ class EmotionTemporalEngine:
             "dominance": _clip(self.state.dominance),
         }
 
+    def to_record(self) -> Dict[str, float]:
+        return {**self.to_dict(), "updated_at": self.updated_at}
+
+    @classmethod
+    def from_record(cls, rec: Dict[str, float]) -> "EmotionTemporalEngine":
+        return cls(
+            PADState(
+                valence=_clip(rec.get("valence", 0.5)),
+                arousal=_clip(rec.get("arousal", 0.5)),
+                dominance=_clip(rec.get("dominance", 0.5)),
+            ),
+            updated_at=float(rec.get("updated_at") or time.time()),
+        )
+
+
+# -------------------------------------------------------
+# STORE
+# -------------------------------------------------------
+
+class _Stripe:
+    __slots__ = ("lock", "engines")
+
+    def __init__(self):
+        self.lock = Lock()
+        self.engines: "OrderedDict[str, tuple]" = OrderedDict()  # user -> (last_seen, engine)
+
+
+class EmotionEngineStore:
+    def __init__(
+        self,
+        capacity: int = EMOTION_ENGINES_MAX,
+        ttl_seconds: float = EMOTION_ENGINE_TTL,
+        stripes: int = EMOTION_LOCK_STRIPES,
+        shared: bool = False,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self._stripes = [_Stripe() for _ in range(stripes)]
+        self._stripe_capacity = max(1, capacity // stripes)
+        self._shared = (
+            session_store(
+                "emotion_engine",
+                capacity=capacity,
+                ttl_seconds=ttl_seconds,
+                backend="sqlite",
+            )
+            if shared else None
+        )
+        self.evictions = 0
+
+    def _stripe(self, user_id: str) -> _Stripe:
+        return self._stripes[zlib.crc32(user_id.encode("utf-8")) % len(self._stripes)]
+
+    def _expire(self, stripe: _Stripe, now: float):
+        while stripe.engines:
+            _, (seen, _) = next(iter(stripe.engines.items()))
+            if now - seen < self.ttl_seconds:
+                break
+            stripe.engines.popitem(last=False)
+            self.evictions += 1
+
+    def _load(self, stripe: _Stripe, user_id: str, now: float, create: bool) -> Optional[EmotionTemporalEngine]:
+        if self._shared is not None:
+            rec = self._shared.get(user_id)
+            if rec is not None:
+                return EmotionTemporalEngine.from_record(rec)
+            return EmotionTemporalEngine(updated_at=now) if create else None
+
+        self._expire(stripe, now)
+        item = stripe.engines.get(user_id)
+        if item is not None:
+            stripe.engines[user_id] = (now, item[1])
+            stripe.engines.move_to_end(user_id)
+            return item[1]
+
+        if not create:
+            return None
+
+        engine = EmotionTemporalEngine(updated_at=now)
+        stripe.engines[user_id] = (now, engine)
+        while len(stripe.engines) > self._stripe_capacity:
+            stripe.engines.popitem(last=False)
+            self.evictions += 1
+        return engine
+
+    def _apply(self, user_id: str, now: float, fn: Callable[[EmotionTemporalEngine], object]):
+        """Run fn on the user's engine and persist it, atomically per backend."""
+        stripe = self._stripe(user_id)
+        with stripe.lock:
+            if self._shared is None:
+                return fn(self._load(stripe, user_id, now, create=True))
+
+            result = []
+
+            def mutate(rec):
+                engine = EmotionTemporalEngine.from_record(rec) if rec is not None else EmotionTemporalEngine(updated_at=now)
+                result.append(fn(engine))
+                return engine.to_record()
+
+            self._shared.update(user_id, mutate)
+            return result[0]
+
+    def update(self, user_id: str, pad: Dict[str, float], alpha: float = 0.22) -> Dict[str, float]:
+        now = time.time()
+        return self._apply(user_id, now, lambda engine: engine.update(pad, alpha=alpha, now=now))
+
+    def update_many(self, user_id: str, samples: List[Tuple[float, Dict[str, float]]], alpha: float = 0.22) -> List[Dict[str, float]]:
+        """
+        (wall-clock time, pad) samples, applied in time order in one
+        update; returns the smoothed state after each sample. Times are
+        client-derived: capped at now, so a future-dated batch can't
+        stall decay.
+        """
+        now = time.time()
+        ordered = sorted(samples, key=lambda s: s[0])
+        return self._apply(
+            user_id,
+            now,
+            lambda engine: [engine.update(pad, alpha=alpha, now=min(ts, now)) for ts, pad in ordered],
+        )
+
+    def read(self, user_id: str) -> Dict[str, float]:
+        """Decayed state; neutral for users we have nothing on."""
+        now = time.time()
+        stripe = self._stripe(user_id)
+        with stripe.lock:
+            engine = self._load(stripe, user_id, now, create=False)
+            if engine is None:
+                return PADState().__dict__.copy()
+            return engine.read(now)
+
+    def stats(self) -> Dict[str, object]:
+        if self._shared is not None:
+            return {**self._shared.stats(), "backend": "shared"}
+        size = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                size += len(stripe.engines)
+        return {
+            "backend": "memory",
+            "size": size,
+            "capacity": self._stripe_capacity * len(self._stripes),
+            "ttl_seconds": self.ttl_seconds,
+            "stripes": len(self._stripes),
+            "evictions": self.evictions,
+        }
+
+
+emotion_engines = EmotionEngineStore(shared=EMOTION_STORE_BACKEND == "shared")
+
+
+def update_user_emotion(user_id: str, pad: Dict[str, float], alpha: float = 0.22) -> Dict[str, float]:
+    return emotion_engines.update(user_id, pad, alpha=alpha)
+
 
-_ENGINES: Dict[str, EmotionTemporalEngine] = {}
-_ENGINES_LOCK = Lock()
+def read_user_emotion(user_id: str) -> Dict[str, float]:
+    return emotion_engines.read(user_id)
 
 
-def get_user_emotion_engine(user_id: str) -> EmotionTemporalEngine:
-    with _ENGINES_LOCK:
-        if user_id not in _ENGINES:
-            _ENGINES[user_id] = EmotionTemporalEngine()
-        return _ENGINES[user_id]
\ No newline at end of file
+def update_user_emotion_series(user_id: str, samples: List[Tuple[float, Dict[str, float]]], alpha: float = 0.22) -> List[Dict[str, float]]:
+    return emotion_engines.update_many(user_id, samples, alpha=alpha)
@@ -0,0 +1,274 @@
+# backend/aurora/emotion_tagging.py
+#
+# AuroraEmotion rows from user messages, off the request path.
+#
+# Live: converse calls enqueue_message_emotion() after the user message
+# is committed. A worker thread drains the queue in batches (one forward
+# pass per batch) and bulk-inserts the rows. The queue is bounded; when
+# it is full the message is skipped and counted as dropped, and the
+# backfill below picks it up later.
+#
+# Backfill:
+#   flask aurora tag-emotions --batch-size 64
+# Walks user messages that have no AuroraEmotion yet (keyset pagination
+# on created_at, id), classifies each page in one batch and inserts the
+# rows with a single executemany.
+#
+# Both paths also append the text PAD to the session's series
+# (aurora/emotion_series.py), which summaries read instead of the rows.
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from extensions import db
+from aurora.emotion import analyze_text_emotion_bulk, text_emotion
+from aurora.emotion_series import emotion_series, record_pad_samples
+from aurora.models_emotion import AuroraEmotion
+from aurora.models_messages import AuroraMessage
+
+
+def emotion_rows(messages, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Insert dicts for messages whose classification succeeded."""
+    rows = []
+    for msg, res in zip(messages, results):
+        if not res.get("emotion_label"):
+            continue
+        rows.append({
+            "user_id": msg.user_id,
+            "message_id": msg.id,
+            "session_id": msg.session_id,
+            "sentiment_label": res.get("sentiment_label"),
+            "sentiment_score": res.get("sentiment_score"),
+            "emotion_label": res.get("emotion_label"),
+            "emotion_score": res.get("emotion_score"),
+            "valence": res.get("valence"),
+            "arousal": res.get("arousal"),
+            "dominance": res.get("dominance"),
+            "created_at": msg.created_at,
+        })
+    return rows
+
+
+def insert_emotion_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Insert, skipping messages that already have a row (the worker and the
+    backfill can race on the same message). Returns the rows actually
+    inserted, so only those are fed to the series.
+    """
+    if not rows:
+        return []
+    stmt = (
+        pg_insert(AuroraEmotion.__table__)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["message_id"])
+        .returning(AuroraEmotion.__table__.c.message_id)
+    )
+    inserted = {r.message_id for r in db.session.execute(stmt)}
+    return [row for row in rows if row["message_id"] in inserted]
+
+
+def record_text_series(rows: List[Dict[str, Any]]):
+    """Committed AuroraEmotion rows -> per-session "text" PAD samples."""
+    by_session: Dict[tuple, list] = {}
+    for row in rows:
+        t = row["created_at"].replace(tzinfo=timezone.utc).timestamp()
+        by_session.setdefault((row["user_id"], row["session_id"]), []).append((t, row))
+    for (user_id, session_id), samples in by_session.items():
+        record_pad_samples(user_id, session_id, "text", samples)
+
+
+def backfill_message_emotions(
+    *,
+    batch_size: int = 64,
+    limit: int = 0,
+    user_id: Optional[str] = None,
+) -> Dict[str, int]:
+    stats = {"scanned": 0, "tagged": 0, "failed": 0}
+
+    untagged = ~AuroraEmotion.query.filter(AuroraEmotion.message_id == AuroraMessage.id).exists()
+    base = AuroraMessage.query.filter(AuroraMessage.role == "user", untagged)
+    if user_id:
+        base = base.filter(AuroraMessage.user_id == user_id)
+
+    cursor = None
+    while True:
+        q = base
+        if cursor is not None:
+            q = q.filter(or_(
+                AuroraMessage.created_at > cursor[0],
+                and_(AuroraMessage.created_at == cursor[0], AuroraMessage.id > cursor[1]),
+            ))
+
+        page_size = batch_size if not limit else min(batch_size, limit - stats["scanned"])
+        if page_size <= 0:
+            break
+
+        page = q.order_by(AuroraMessage.created_at.asc(), AuroraMessage.id.asc()).limit(page_size).all()
+        if not page:
+            break
+        cursor = (page[-1].created_at, page[-1].id)
+
+        results = analyze_text_emotion_bulk([m.content for m in page], batch_size=batch_size)
+        classified = emotion_rows(page, results)
+
+        try:
+            rows = insert_emotion_rows(classified)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print("\n!!!! EMOTION BACKFILL ERROR !!!!")
+            print(str(e))
+            print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+            rows = classified = []
+        record_text_series(rows)
+
+        stats["scanned"] += len(page)
+        stats["tagged"] += len(rows)
+        stats["failed"] += len(page) - len(classified)
+
+    emotion_series.flush()
+    return stats
+
+
+# -------------------------------------------------------
+# LIVE QUEUE (Used in routes_user.aurora_converse)
+# -------------------------------------------------------
+
+TAGGING_ENABLED = os.getenv("AURORA_EMOTION_TAGGING", "true").lower() == "true"
+TAG_QUEUE_MAX = int(os.getenv("AURORA_EMOTION_TAG_QUEUE_MAX", "10000"))
+TAG_BATCH_MAX = 64
+TAG_BATCH_WAIT_S = 0.5
+
+
+@dataclass
+class EmotionJob:
+    # same attribute names as AuroraMessage, for emotion_rows()
+    id: Any
+    user_id: Any
+    session_id: Any
+    content: str
+    created_at: datetime
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class EmotionTagger:
+    def __init__(self):
+        self._queue: "queue.Queue[EmotionJob]" = queue.Queue(maxsize=TAG_QUEUE_MAX)
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._app = None
+
+        self._lag = deque(maxlen=512)   # seconds, enqueue -> committed
+        self._stats = {"enqueued": 0, "tagged": 0, "failed": 0, "dropped": 0, "batches": 0}
+
+    def enqueue(self, job: EmotionJob) -> bool:
+        if not TAGGING_ENABLED or not (job.content or "").strip():
+            return False
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._stats["dropped"] += 1
+            return False
+        self._stats["enqueued"] += 1
+        return True
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._app = current_app._get_current_object()
+                self._worker = threading.Thread(target=self._run, name="aurora-emotion-tagger", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + TAG_BATCH_WAIT_S
+            while len(batch) < TAG_BATCH_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self._process(batch)
+            except Exception as e:
+                self._stats["failed"] += len(batch)
+                print("\n!!!! EMOTION TAGGING ERROR !!!!")
+                print(str(e))
+                print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+
+    def _process(self, batch: List[EmotionJob]):
+        results = text_emotion.classify_batch([j.content for j in batch])
+
+        with self._app.app_context():
+            rows = emotion_rows(batch, results)
+            try:
+                inserted = insert_emotion_rows(rows)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            record_text_series(inserted)
+
+        done = time.monotonic()
+        self._lag.extend(done - j.enqueued_at for j in batch)
+        self._stats["batches"] += 1
+        self._stats["tagged"] += len(rows)
+        self._stats["failed"] += len(batch) - len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        lag = sorted(self._lag)
+        with self._queue.mutex:
+            oldest = self._queue.queue[0].enqueued_at if self._queue.queue else None
+
+        def pct(p):
+            return round(lag[min(len(lag) - 1, int(p * len(lag)))] * 1000, 1) if lag else 0.0
+
+        return {
+            **self._stats,
+            "enabled": TAGGING_ENABLED,
+            "queued": self._queue.qsize(),
+            "oldest_queued_ms": round((time.monotonic() - oldest) * 1000, 1) if oldest else 0.0,
+            "lag_ms": {"p50": pct(0.50), "p95": pct(0.95), "max": round(lag[-1] * 1000, 1) if lag else 0.0},
+        }
+
+
+emotion_tagger = EmotionTagger()
+
+
+def emotion_job(message) -> EmotionJob:
+    """Snapshot a flushed AuroraMessage, so the worker never touches the ORM object."""
+    return EmotionJob(
+        id=message.id,
+        user_id=message.user_id,
+        session_id=message.session_id,
+        content=message.content,
+        created_at=message.created_at or datetime.utcnow(),
+    )
+
+
+def enqueue_message_emotion(job: EmotionJob) -> bool:
+    """Queue a committed user message for tagging. Never blocks."""
+    return emotion_tagger.enqueue(job)
+
+
+def emotion_tagging_stats() -> Dict[str, Any]:
+    return emotion_tagger.stats()
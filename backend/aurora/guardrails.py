@@ -4,10 +4,11 @@
 
 import os
 import re
-import requests
 from dataclasses import dataclass
 from typing import Optional, Dict, Any
 
+from services.http_client import http_post
+
 
 # ---------------------------------------------------
 # Optional remote HF toxicity check
@@ -143,11 +144,11 @@ def _hf_toxicity_score(text: str) -> Optional[float]:
         return None
 
     try:
-        r = requests.post(
+        r = http_post(
+            "hf_toxicity",
             HF_API_URL,
             headers=HF_HEADERS,
             json={"inputs": text},
-            timeout=0.8,
         )
 
         if r.status_code != 200:
@@ -0,0 +1,340 @@
+# backend/aurora/history.py
+#
+# Token-budgeted conversation history.
+#
+# The prompt gets: [rolling summary of older turns] + the newest turns
+# that fit in HISTORY_TOKEN_BUDGET. Turns that fall out of the window
+# are folded into AuroraSessionContext.rolling_summary in bounded chunks,
+# so neither generate_reply nor end-of-session summarization ever sees
+# an unbounded transcript.
+
+from __future__ import annotations
+
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from aurora.models_messages import AuroraMessage
+from aurora.models_session_context import AuroraSessionContext
+from aurora.summarizer import summarize_rolling
+from aurora.tokens import estimate_tokens, estimate_message_tokens
+
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("AURORA_HISTORY_TOKEN_BUDGET", "1200"))
+SUMMARY_INPUT_TOKEN_BUDGET = int(os.getenv("AURORA_SUMMARY_INPUT_TOKEN_BUDGET", "3000"))
+
+COMPACT_CHUNK_TOKENS = 1200   # max transcript tokens per rolling-summary call
+COMPACT_MAX_ROUNDS = 6        # bounded work per compaction run
+END_SESSION_MAX_ROUNDS = 2    # synchronous rounds in end-session
+END_SESSION_WAIT_S = 20.0     # wait for an in-flight background run
+RECENT_FETCH_LIMIT = 60       # rows read to fill the history window
+UNSUMMARIZED_FETCH_LIMIT = 400
+
+
+# -------------------------------------------------------
+# HELPERS
+# -------------------------------------------------------
+
+def get_session_context(user_id, session_id) -> AuroraSessionContext | None:
+    return AuroraSessionContext.query.filter_by(user_id=user_id, session_id=session_id).first()
+
+
+def _get_or_create_session_context(user_id, session_id) -> AuroraSessionContext:
+    ctx = get_session_context(user_id, session_id)
+    if ctx:
+        return ctx
+
+    ctx = AuroraSessionContext(
+        user_id=user_id,
+        session_id=session_id,
+        rolling_summary="",
+        summary_tokens=0,
+        summarized_count=0,
+    )
+    try:
+        # another process may create it first (unique session_id)
+        with db.session.begin_nested():
+            db.session.add(ctx)
+            db.session.flush()
+    except IntegrityError:
+        ctx = get_session_context(user_id, session_id)
+    return ctx
+
+
+def _unsummarized_query(user_id, session_id, ctx: AuroraSessionContext | None):
+    """Messages after the (created_at, id) cursor of the last folded one."""
+    q = AuroraMessage.query.filter_by(user_id=user_id, session_id=session_id)
+    if ctx and ctx.summarized_through:
+        after = AuroraMessage.created_at > ctx.summarized_through
+        if ctx.summarized_through_id is not None:
+            after = or_(after, and_(
+                AuroraMessage.created_at == ctx.summarized_through,
+                AuroraMessage.id > ctx.summarized_through_id,
+            ))
+        q = q.filter(after)
+    return q
+
+
+def _oldest_first(q):
+    return q.order_by(AuroraMessage.created_at.asc(), AuroraMessage.id.asc())
+
+
+def _newest_first(q):
+    return q.order_by(AuroraMessage.created_at.desc(), AuroraMessage.id.desc())
+
+
+def _turn_cost(m: AuroraMessage) -> int:
+    return estimate_message_tokens({"role": m.role, "content": m.content})
+
+
+def _summary_cost(ctx: AuroraSessionContext | None) -> int:
+    summary = (ctx.rolling_summary or "").strip() if ctx else ""
+    return estimate_message_tokens(_summary_message(summary)) if summary else 0
+
+
+def _summary_message(summary: str) -> Dict[str, str]:
+    return {
+        "role": "system",
+        "content": "Summary of earlier conversation in this session:\n" + summary,
+    }
+
+
+# -------------------------------------------------------
+# PROMPT HISTORY (Used in brain_user.py)
+# -------------------------------------------------------
+
+def build_history(user_id, session_id, *, token_budget: int = HISTORY_TOKEN_BUDGET) -> Tuple[List[Dict], Dict]:
+    """
+    Chat messages for the prompt, oldest first, within `token_budget`.
+    The newest message is always included.
+
+    Returns (messages, stats) where stats has history_tokens,
+    summary_tokens and history_truncated (True when unsummarized turns
+    were left out, i.e. compaction is due).
+    """
+    ctx = get_session_context(user_id, session_id)
+
+    summary = (ctx.rolling_summary or "").strip() if ctx else ""
+    head = [_summary_message(summary)] if summary else []
+    summary_cost = _summary_cost(ctx)
+
+    remaining = max(0, token_budget - summary_cost)
+
+    rows = (
+        _newest_first(_unsummarized_query(user_id, session_id, ctx))
+        .limit(RECENT_FETCH_LIMIT + 1)
+        .all()
+    )
+
+    recent: List[Dict] = []
+    used = 0
+    truncated = len(rows) > RECENT_FETCH_LIMIT
+
+    for m in rows[:RECENT_FETCH_LIMIT]:
+        cost = _turn_cost(m)
+        if recent and used + cost > remaining:
+            truncated = True
+            break
+        recent.append({"role": m.role, "content": m.content})
+        used += cost
+
+    recent.reverse()
+
+    stats = {
+        "history_tokens": used + summary_cost,
+        "summary_tokens": summary_cost,
+        "history_truncated": truncated,
+    }
+    return head + recent, stats
+
+
+# -------------------------------------------------------
+# ROLLING SUMMARY COMPACTION
+# -------------------------------------------------------
+
+def compact_session_history(
+    user_id,
+    session_id,
+    *,
+    keep_recent_tokens: int = HISTORY_TOKEN_BUDGET // 2,
+    trigger_tokens: Optional[int] = None,
+    max_rounds: int = COMPACT_MAX_ROUNDS,
+) -> int:
+    """
+    Fold the oldest unsummarized turns into the rolling summary until
+    at most `keep_recent_tokens` remain verbatim. Does nothing while the
+    unsummarized tail is under `trigger_tokens`, which defaults to the
+    point where build_history starts dropping turns (the budget left
+    after the summary, or more than RECENT_FETCH_LIMIT rows) so no turn
+    is ever missing from both the prompt and the summary.
+    Each summary call sees one chunk (<= COMPACT_CHUNK_TOKENS) plus the
+    previous summary. Returns the number of messages folded.
+    """
+    ctx = get_session_context(user_id, session_id)
+
+    rows = (
+        _oldest_first(_unsummarized_query(user_id, session_id, ctx))
+        .limit(UNSUMMARIZED_FETCH_LIMIT)
+        .all()
+    )
+    costs = [_turn_cost(m) for m in rows]
+
+    if trigger_tokens is None:
+        due = sum(costs) > max(0, HISTORY_TOKEN_BUDGET - _summary_cost(ctx)) or len(rows) > RECENT_FETCH_LIMIT
+    else:
+        due = sum(costs) > trigger_tokens
+    if not due:
+        return 0
+
+    if ctx is None:
+        ctx = _get_or_create_session_context(user_id, session_id)
+
+    # newest turns that stay verbatim
+    keep_from = len(rows)
+    kept = 0
+    while keep_from > 0 and kept + costs[keep_from - 1] <= keep_recent_tokens:
+        keep_from -= 1
+        kept += costs[keep_from]
+
+    to_fold = rows[:keep_from]
+    fold_costs = costs[:keep_from]
+
+    folded = 0
+    rounds = 0
+    i = 0
+    while i < len(to_fold) and rounds < max_rounds:
+        chunk = []
+        chunk_tokens = 0
+        while i < len(to_fold) and (not chunk or chunk_tokens + fold_costs[i] <= COMPACT_CHUNK_TOKENS):
+            chunk.append(to_fold[i])
+            chunk_tokens += fold_costs[i]
+            i += 1
+
+        new_summary = summarize_rolling(ctx.rolling_summary or "", chunk)
+        if new_summary is None:
+            break
+
+        ctx.rolling_summary = new_summary
+        ctx.summary_tokens = estimate_tokens(new_summary)
+        ctx.summarized_through = chunk[-1].created_at
+        ctx.summarized_through_id = chunk[-1].id
+        ctx.summarized_count = int(ctx.summarized_count or 0) + len(chunk)
+        ctx.updated_at = datetime.utcnow()
+
+        folded += len(chunk)
+        rounds += 1
+
+    db.session.commit()
+    return folded
+
+
+# session -> Event set when its running compaction finishes
+_COMPACTING: Dict[str, threading.Event] = {}
+_COMPACTING_LOCK = threading.Lock()
+
+
+def _try_claim(key: str):
+    """(claimed, event): our new event, or the in-flight run's."""
+    with _COMPACTING_LOCK:
+        running = _COMPACTING.get(key)
+        if running is not None:
+            return False, running
+        done = threading.Event()
+        _COMPACTING[key] = done
+        return True, done
+
+
+def _release(key: str, done: threading.Event):
+    with _COMPACTING_LOCK:
+        if _COMPACTING.get(key) is done:
+            del _COMPACTING[key]
+    done.set()
+
+
+def schedule_compaction(user_id, session_id) -> bool:
+    """
+    Run compact_session_history off the request path.
+    At most one compaction per session per process at a time.
+    """
+    key = str(session_id)
+    claimed, done = _try_claim(key)
+    if not claimed:
+        return False
+
+    app = current_app._get_current_object()
+
+    def _run():
+        try:
+            with app.app_context():
+                folded = compact_session_history(user_id, session_id)
+                if folded:
+                    print(f"\n🧠 Rolling summary folded {folded} messages for session {key}.\n")
+        except Exception as e:
+            print("\n!!!! HISTORY COMPACTION ERROR !!!!")
+            print(str(e))
+            print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+        finally:
+            _release(key, done)
+
+    threading.Thread(target=_run, name=f"aurora-compact-{key}", daemon=True).start()
+    return True
+
+
+# -------------------------------------------------------
+# END-OF-SESSION INPUT (Used in routes_user.end_session)
+# -------------------------------------------------------
+
+def load_summary_input(user_id, session_id, *, token_budget: int = SUMMARY_INPUT_TOKEN_BUDGET):
+    """
+    Bounded input for summarize_session: (messages, rolling_summary).
+    Compacts first so the verbatim tail fits in `token_budget`.
+
+    Shares the per-session guard with schedule_compaction: an in-flight
+    background run is waited for (up to END_SESSION_WAIT_S) rather than
+    raced, and the synchronous pass is capped at END_SESSION_MAX_ROUNDS.
+    If the background run is still going after the wait, we summarize
+    what it has committed so far.
+    """
+    key = str(session_id)
+    claimed, done = _try_claim(key)
+    if not claimed:
+        done.wait(END_SESSION_WAIT_S)
+        claimed, done = _try_claim(key)
+
+    if claimed:
+        try:
+            compact_session_history(
+                user_id,
+                session_id,
+                keep_recent_tokens=token_budget,
+                trigger_tokens=token_budget,
+                max_rounds=END_SESSION_MAX_ROUNDS,
+            )
+        finally:
+            _release(key, done)
+
+    ctx = get_session_context(user_id, session_id)
+    rows = (
+        _newest_first(_unsummarized_query(user_id, session_id, ctx))
+        .limit(UNSUMMARIZED_FETCH_LIMIT)
+        .all()
+    )
+
+    messages = []
+    used = 0
+    for m in rows:
+        cost = _turn_cost(m)
+        if messages and used + cost > token_budget:
+            break
+        messages.append(m)
+        used += cost
+
+    messages.reverse()
+    summary = (ctx.rolling_summary or "").strip() if ctx else ""
+    return messages, summary
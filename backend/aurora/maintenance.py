@@ -0,0 +1,110 @@
+# backend/aurora/maintenance.py
+#
+# Periodic Aurora housekeeping, run from cron / a scheduler:
+#   flask aurora compact-memory --batch-size 500
+#   flask aurora build-audio-assets          (deploy / warm-up)
+#   flask aurora refresh-intros              (cron, hourly)
+#   flask aurora gc-audio --dry-run
+#   flask aurora tag-emotions --batch-size 64      (backfill AuroraEmotion)
+#   flask aurora export-text-emotion-onnx --out models/text_emotion
+
+from __future__ import annotations
+
+import click
+from flask.cli import AppGroup
+
+from aurora.memory_store import compact_memory, PRUNE_MIN_CONFIDENCE
+from aurora.audio_store import (
+    AUDIO_RETENTION_DAYS,
+    AUDIO_USER_MAX_FILES,
+    AUDIO_USER_QUOTA_MB,
+    gc_user_audio,
+)
+
+
+aurora_cli = AppGroup("aurora", help="Aurora maintenance jobs.")
+
+
+@aurora_cli.command("compact-memory")
+@click.option("--batch-size", default=500, show_default=True, type=int)
+@click.option("--min-confidence", default=PRUNE_MIN_CONFIDENCE, show_default=True, type=float)
+def compact_memory_command(batch_size: int, min_confidence: float):
+    """Delete decayed memories for all users, in batches."""
+    deleted = compact_memory(batch_size=batch_size, min_confidence=min_confidence)
+    print(f"🧠 Memory compaction pruned {deleted} rows.")
+
+
+@aurora_cli.command("build-audio-assets")
+@click.option("--force", is_flag=True, help="Re-render phrases that already exist.")
+@click.option("--intros/--no-intros", default=True, show_default=True)
+def build_audio_assets_command(force: bool, intros: bool):
+    """Pre-render fixed phrases and fill the intro pools."""
+    from services.aurora_assets import build_phrase_assets, build_intro_pool, intro_pool_lock
+    from routes.aurora_routes import generate_intro_script
+
+    for name, status in build_phrase_assets(force=force).items():
+        print(f"🔊 {name}: {status}")
+
+    if intros:
+        with intro_pool_lock() as locked:
+            if not locked:
+                print("🎬 intro pools busy (another refresh is running), skipped")
+                return
+            for variation, size in build_intro_pool(generate_intro_script).items():
+                print(f"🎬 intro pool '{variation}': {size} assets")
+
+
+@aurora_cli.command("refresh-intros")
+def refresh_intros_command():
+    """Top up the intro pools, or rotate out each pool's oldest intro."""
+    from services.aurora_assets import refresh_intro_pools
+    from routes.aurora_routes import generate_intro_script
+
+    results = refresh_intro_pools(generate_intro_script)
+    if not results:
+        print("🎬 intro pools busy (another refresh is running), skipped")
+    for variation, status in results.items():
+        print(f"🎬 intro pool '{variation}': {status}")
+
+
+@aurora_cli.command("gc-audio")
+@click.option("--max-age-days", default=AUDIO_RETENTION_DAYS, show_default=True, type=int)
+@click.option("--user-quota-mb", default=AUDIO_USER_QUOTA_MB, show_default=True, type=int)
+@click.option("--user-max-files", default=AUDIO_USER_MAX_FILES, show_default=True, type=int)
+@click.option("--dry-run", is_flag=True, help="Report what would be deleted.")
+def gc_audio_command(max_age_days: int, user_quota_mb: int, user_max_files: int, dry_run: bool):
+    """Apply retention and per-user quotas to reply audio."""
+    stats = gc_user_audio(
+        max_age_days=max_age_days,
+        user_quota_bytes=user_quota_mb * 1024 * 1024,
+        user_max_files=user_max_files,
+        dry_run=dry_run,
+    )
+    label = "would delete" if dry_run else "deleted"
+    print(f"🔊 Audio GC {label} {stats['deleted']} files "
+          f"({stats['freed_bytes'] / 1024 / 1024:.1f} MB) across {stats['users']} users; "
+          f"kept {stats['kept']}.")
+
+
+@aurora_cli.command("tag-emotions")
+@click.option("--batch-size", default=64, show_default=True, type=int)
+@click.option("--limit", default=0, show_default=True, type=int, help="0 = all untagged messages.")
+@click.option("--user-id", default=None, help="Only this user's messages.")
+def tag_emotions_command(batch_size: int, limit: int, user_id: str | None):
+    """Classify user messages that have no AuroraEmotion row yet."""
+    from aurora.emotion_tagging import backfill_message_emotions
+
+    stats = backfill_message_emotions(batch_size=batch_size, limit=limit, user_id=user_id)
+    print(f"🏷️ Tagged {stats['tagged']} of {stats['scanned']} messages "
+          f"({stats['failed']} without a result).")
+
+
+@aurora_cli.command("export-text-emotion-onnx")
+@click.option("--out", "out_dir", required=True, help="Target dir; point AURORA_TEXT_EMOTION_ONNX_DIR here.")
+@click.option("--quantize/--no-quantize", default=True, show_default=True)
+def export_text_emotion_onnx_command(out_dir: str, quantize: bool):
+    """Export the text sentiment/emotion models to ONNX for CPU inference."""
+    from aurora.emotion import export_onnx
+
+    for name, path in export_onnx(out_dir, quantize=quantize).items():
+        print(f"📦 {name}: {path}")
@@ -0,0 +1,102 @@
+# backend/aurora/memory_index.py
+#
+# Local lexical index for long-term memory retrieval.
+# No network, no model download: term-frequency vectors are computed
+# when a memory is written (stored in meta_json["terms"]) and scored
+# against the current message with TF-IDF cosine at read time.
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List
+
+INDEX_VERSION = 1
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+STOPWORDS = {
+    "a", "about", "after", "again", "all", "am", "an", "and", "any", "are", "as", "at",
+    "be", "because", "been", "before", "being", "but", "by", "can", "could", "did", "do",
+    "does", "doing", "don't", "for", "from", "had", "has", "have", "having", "he", "her",
+    "here", "him", "his", "how", "i", "i'm", "i've", "if", "in", "into", "is", "it", "it's",
+    "its", "just", "like", "me", "more", "my", "myself", "no", "not", "now", "of", "on",
+    "or", "our", "out", "really", "she", "so", "some", "than", "that", "the", "their",
+    "them", "then", "there", "these", "they", "this", "to", "too", "up", "very", "was",
+    "we", "were", "what", "when", "where", "which", "who", "why", "will", "with", "would",
+    "you", "your", "yeah", "okay", "ok", "im", "feel", "feeling", "think", "get", "got",
+}
+
+
+def _stem(word: str) -> str:
+    # Deliberately tiny suffix stripper: enough to match
+    # "careers"/"career", "stressed"/"stress", "switching"/"switch".
+    for suffix in ("ing", "edly", "ed", "ly"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    if len(word) > 4 and word.endswith("es") and word[-3] in "sxz":
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str | None) -> List[str]:
+    words = _WORD_RE.findall((text or "").lower())
+    return [_stem(w) for w in words if w not in STOPWORDS and len(w) > 1]
+
+
+def memory_terms(key: str | None, value: str | None) -> Dict[str, int]:
+    """
+    Term-frequency vector for one memory. Key parts ("career_transition")
+    are counted too so the key alone can match.
+    """
+    key_text = (key or "").replace("_", " ")
+    return dict(Counter(tokenize(key_text) + tokenize(value)))
+
+
+def index_meta(key: str | None, value: str | None) -> Dict:
+    return {"terms": memory_terms(key, value), "index_version": INDEX_VERSION}
+
+
+def terms_for(memory) -> Dict[str, int]:
+    """
+    Stored terms when present and current; otherwise computed on the fly
+    (rows written before the index existed).
+    """
+    meta = getattr(memory, "meta_json", None) or {}
+    if meta.get("index_version") == INDEX_VERSION and isinstance(meta.get("terms"), dict):
+        return meta["terms"]
+    return memory_terms(memory.key, memory.value)
+
+
+def relevance_scores(query: str | None, docs: Iterable[Dict[str, int]]) -> List[float]:
+    """
+    TF-IDF cosine between the query and each doc, IDF taken over `docs`.
+    Returns 0.0 for every doc when the query has no usable terms.
+    """
+    docs = list(docs)
+    q_terms = Counter(tokenize(query))
+    if not docs or not q_terms:
+        return [0.0 for _ in docs]
+
+    n = len(docs)
+    df: Counter = Counter()
+    for d in docs:
+        df.update(d.keys())
+
+    def idf(term: str) -> float:
+        return math.log(1.0 + (n + 1) / (df.get(term, 0) + 0.5))
+
+    q_vec = {t: c * idf(t) for t, c in q_terms.items()}
+    q_norm = math.sqrt(sum(w * w for w in q_vec.values())) or 1.0
+
+    scores = []
+    for d in docs:
+        d_vec = {t: (1.0 + math.log(c)) * idf(t) for t, c in d.items() if c > 0}
+        d_norm = math.sqrt(sum(w * w for w in d_vec.values())) or 1.0
+        dot = sum(w * d_vec.get(t, 0.0) for t, w in q_vec.items())
+        scores.append(dot / (q_norm * d_norm))
+
+    return scores
@@ -1,146 +1,403 @@
 # backend/aurora/memory_store.py
 # backend/aurora/memory_store.py
 
+import os
 import uuid
-from typing import List, Dict
-from datetime import datetime, timedelta
+from typing import List, Dict, Iterable
+from datetime import datetime
+
+from flask import g, has_request_context
+
+from sqlalchemy import DateTime, Float, Numeric, and_, case, cast, delete, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from extensions import db
 from aurora.models_memory import AuroraUserMemory
+from aurora.memory_index import index_meta, relevance_scores, terms_for
+from aurora.tokens import estimate_tokens
+
+
+# -------------------------------------------------------
+# LAZY DECAY
+# `confidence` is the base value as of `updated_at`.
+# Effective confidence is computed at read time:
+#   max(floor, confidence * 0.5 ** (age_days / half_life_days))
+# so nothing has to rewrite rows just because time passed.
+# -------------------------------------------------------
+
+HALF_LIFE_DAYS = 45
+CONFIDENCE_FLOOR = 0.15
+PRUNE_MIN_CONFIDENCE = 0.18
+
+
+def effective_confidence_expr(
+    columns=None,
+    *,
+    now: datetime | None = None,
+    half_life_days: float = HALF_LIFE_DAYS,
+    floor: float = CONFIDENCE_FLOOR,
+):
+    """
+    SQL expression for decayed confidence.
+    `columns` defaults to the aurora_user_memory table columns.
+    """
+    c = columns if columns is not None else AuroraUserMemory.__table__.c
+    now = now or datetime.utcnow()
+
+    last = func.coalesce(c.updated_at, c.created_at)
+    age_days = func.greatest(
+        0.0,
+        func.extract("epoch", literal(now, DateTime) - last) / 86400.0,
+    )
+
+    decayed = c.confidence * func.power(0.5, age_days / float(half_life_days))
+    return func.greatest(floor, func.least(1.0, decayed))
+
+
+def effective_confidence(memory, *, now: datetime | None = None,
+                         half_life_days: float = HALF_LIFE_DAYS,
+                         floor: float = CONFIDENCE_FLOOR) -> float:
+    """
+    Python mirror of effective_confidence_expr for a loaded row.
+    """
+    now = now or datetime.utcnow()
+    last = memory.updated_at or memory.created_at or now
+    age_days = max(0.0, (now - last).total_seconds() / 86400.0)
+    decayed = float(memory.confidence or 0.0) * (0.5 ** (age_days / float(half_life_days)))
+    return max(floor, min(1.0, decayed))
 
 
 # -------------------------------------------------------
 # FETCH MEMORY (Used in brain_user.py)
 # -------------------------------------------------------
 
-def fetch_user_memory(user_id, limit: int = 20):
-    return (
-        AuroraUserMemory.query
-        .filter_by(user_id=user_id)
-        .order_by(AuroraUserMemory.updated_at.desc().nullslast(), AuroraUserMemory.created_at.desc())
+def fetch_user_memory(user_id, limit: int = 20, *, min_confidence: float = PRUNE_MIN_CONFIDENCE):
+    """
+    Strongest memories first, by decayed confidence, then recency.
+    Rows that have decayed below `min_confidence` are hidden until
+    the maintenance job deletes them.
+    Each returned row carries an `effective_confidence` attribute.
+    """
+    effective = effective_confidence_expr().label("effective_confidence")
+
+    rows = (
+        db.session.query(AuroraUserMemory, effective)
+        .filter(AuroraUserMemory.user_id == user_id)
+        .filter(effective >= min_confidence)
+        .order_by(
+            effective.desc(),
+            AuroraUserMemory.updated_at.desc().nullslast(),
+            AuroraUserMemory.created_at.desc(),
+        )
         .limit(limit)
         .all()
     )
 
+    memories = []
+    for m, eff in rows:
+        m.effective_confidence = round(float(eff), 4)
+        memories.append(m)
+
+    return memories
+
 
 # -------------------------------------------------------
-# MEMORY DECAY + REINFORCEMENT
+# RELEVANCE-RANKED RETRIEVAL (Used in brain_user.py)
+# Lexical TF-IDF relevance to the current message, blended
+# with decayed confidence and recency, cut to a token budget.
 # -------------------------------------------------------
 
-def decay_user_memory(user_id, *, half_life_days: int = 45, floor: float = 0.15):
+MEMORY_TOKEN_BUDGET = int(os.getenv("AURORA_MEMORY_TOKEN_BUDGET", "200"))
+RETRIEVAL_POOL_SIZE = 100
+MAX_MEMORY_CHARS = 280
+
+RELEVANCE_WEIGHT = 0.60
+CONFIDENCE_WEIGHT = 0.25
+RECENCY_WEIGHT = 0.15
+RECENCY_HALF_LIFE_DAYS = 14
+
+
+def format_memory_line(memory) -> str:
+    value = " ".join((memory.value or "").split())
+    if len(value) > MAX_MEMORY_CHARS:
+        value = value[: MAX_MEMORY_CHARS - 1].rstrip() + "…"
+    return f"{memory.key}: {value}"
+
+
+def _turn_cache() -> Dict | None:
     """
-    Decay confidence over time so memories feel organic.
-    half_life_days=45 => after ~45 days, confidence ~half (roughly).
+    Per-request cache so the same turn never ranks memory twice.
     """
-    rows = AuroraUserMemory.query.filter_by(user_id=user_id).all()
-    if not rows:
-        return 0
+    if not has_request_context():
+        return None
+    cache = getattr(g, "_aurora_memory_cache", None)
+    if cache is None:
+        cache = {}
+        g._aurora_memory_cache = cache
+    return cache
+
+
+def _invalidate_turn_cache(user_id):
+    cache = _turn_cache()
+    if not cache:
+        return
+    for k in [k for k in cache if k[0] == str(user_id)]:
+        cache.pop(k, None)
+
+
+def retrieve_relevant_memory(
+    user_id,
+    query_text: str | None,
+    *,
+    token_budget: int = MEMORY_TOKEN_BUDGET,
+    pool_size: int = RETRIEVAL_POOL_SIZE,
+):
+    """
+    Memories most useful for `query_text`, best first, whose formatted
+    lines fit in `token_budget` tokens. Each row carries `relevance`
+    and `retrieval_score` attributes.
+    """
+    cache = _turn_cache()
+    cache_key = (str(user_id), " ".join((query_text or "").lower().split()), int(token_budget))
+    if cache is not None and cache_key in cache:
+        return cache[cache_key]
+
+    pool = fetch_user_memory(user_id, limit=pool_size)
+    if not pool:
+        if cache is not None:
+            cache[cache_key] = []
+        return []
 
     now = datetime.utcnow()
-    changed = 0
+    relevance = relevance_scores(query_text, [terms_for(m) for m in pool])
 
-    for m in rows:
+    ranked = []
+    for m, rel in zip(pool, relevance):
         last = m.updated_at or m.created_at or now
         age_days = max(0.0, (now - last).total_seconds() / 86400.0)
+        recency = 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+        conf = float(getattr(m, "effective_confidence", m.confidence) or 0.0)
 
-        # simple exponential-ish decay approximation
-        # decay_factor ~ 0.5 every half_life_days
-        if half_life_days <= 0:
-            continue
+        m.relevance = round(rel, 4)
+        m.retrieval_score = round(
+            RELEVANCE_WEIGHT * rel + CONFIDENCE_WEIGHT * conf + RECENCY_WEIGHT * recency,
+            4,
+        )
+        ranked.append(m)
 
-        decay_steps = age_days / float(half_life_days)
-        decay_factor = 0.5 ** decay_steps
+    ranked.sort(key=lambda m: m.retrieval_score, reverse=True)
 
-        old_conf = float(m.confidence or 0.0)
-        new_conf = max(floor, min(1.0, old_conf * decay_factor))
+    selected = []
+    used = 0
+    for m in ranked:
+        cost = estimate_tokens(format_memory_line(m)) + 1
+        if used + cost > token_budget:
+            continue
+        selected.append(m)
+        used += cost
 
-        # only write if meaningful change
-        if abs(new_conf - old_conf) >= 0.01:
-            m.confidence = round(new_conf, 4)
-            changed += 1
+    if cache is not None:
+        cache[cache_key] = selected
 
-    if changed:
-        db.session.commit()
+    return selected
 
-    return changed
 
+# -------------------------------------------------------
+# PRUNE (set-based)
+# -------------------------------------------------------
 
-def prune_memory(user_id, *, min_confidence: float = 0.18):
+def prune_memory(user_id, *, min_confidence: float = PRUNE_MIN_CONFIDENCE, commit: bool = True) -> int:
     """
-    Optional: remove very weak memories.
+    Delete a user's memories whose decayed confidence fell below
+    `min_confidence`, in one DELETE.
     Keep this conservative (don’t over-delete).
     """
-    rows = AuroraUserMemory.query.filter_by(user_id=user_id).all()
-    if not rows:
-        return 0
+    table = AuroraUserMemory.__table__
+
+    result = db.session.execute(
+        delete(table)
+        .where(table.c.user_id == user_id)
+        .where(effective_confidence_expr() < min_confidence)
+    )
+
+    if commit:
+        db.session.commit()
 
-    deleted = 0
-    for m in rows:
-        if float(m.confidence or 0.0) < float(min_confidence):
-            db.session.delete(m)
-            deleted += 1
+    return result.rowcount or 0
 
-    if deleted:
+
+def compact_memory(*, batch_size: int = 500, min_confidence: float = PRUNE_MIN_CONFIDENCE) -> int:
+    """
+    Maintenance job: prune weak memories for all users in batches,
+    committing after each batch so locks stay short.
+    Returns total rows deleted.
+    """
+    table = AuroraUserMemory.__table__
+    total = 0
+
+    while True:
+        now = datetime.utcnow()
+        weak_ids = (
+            select(table.c.id)
+            .where(effective_confidence_expr(now=now) < min_confidence)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+
+        result = db.session.execute(delete(table).where(table.c.id.in_(weak_ids)))
         db.session.commit()
 
-    return deleted
+        deleted = result.rowcount or 0
+        total += deleted
+
+        if deleted < batch_size:
+            break
+
+    return total
 
 
 # -------------------------------------------------------
 # MEMORY UPSERT (reinforces on repeats)
 # -------------------------------------------------------
 
-def upsert_memory(user_id, key: str, value: str, session_id, confidence: float = 0.7):
+REINFORCE_STEP = 0.08     # same value repeated -> small boost
+BLEND_OLD_WEIGHT = 0.6    # value changed -> don't instantly trust it
+BLEND_NEW_WEIGHT = 0.4
+DEFAULT_CONFIDENCE = 0.6  # candidates without a confidence
+
+
+def _round4(expr):
+    return cast(func.round(cast(expr, Numeric), 4), Float)
+
+
+def _memory_rows(user_id, items: Iterable[Dict], session_id, now: datetime) -> List[Dict]:
     """
-    Insert or update memory.
-    Reinforce if same key repeats.
+    Normalize candidates into insert rows, one per key.
+    ON CONFLICT can't touch the same row twice in one statement,
+    so a later duplicate key wins.
     """
-    key = (key or "").strip().lower()
-    if not key:
-        return
+    rows: Dict[str, Dict] = {}
 
-    existing = AuroraUserMemory.query.filter_by(
-        user_id=user_id,
-        key=key
-    ).first()
+    for item in items or []:
+        key = (item.get("key") or "").strip().lower()
+        if not key:
+            continue
+
+        confidence = item.get("confidence")
+        confidence = DEFAULT_CONFIDENCE if confidence is None else float(confidence)
+        confidence = max(0.0, min(1.0, confidence))
+
+        value = (item.get("value") or "").strip()
 
+        rows[key] = {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "session_id": session_id,
+            "key": key,
+            "value": value,
+            # raw value so the blend below uses it; new rows are floored
+            # after the upsert
+            "confidence": round(confidence, 4),
+            # lexical index terms, updated incrementally with each write
+            "meta_json": index_meta(key, value),
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    return list(rows.values())
+
+
+def upsert_memories(user_id, items: Iterable[Dict], session_id, *, commit: bool = True) -> int:
+    """
+    Upsert all of a turn's memory candidates in one
+    INSERT ... ON CONFLICT (user_id, key) DO UPDATE.
+
+    Reinforcement rules run in SQL so concurrent writers stay correct,
+    starting from the decayed (effective) confidence:
+    - same value (case-insensitive) -> confidence + 0.08, capped at 1.0
+    - new value -> replace value, confidence = 0.6 * current + 0.4 * new,
+      clamped to [0.15, 1.0]
+    """
     now = datetime.utcnow()
-    confidence = float(confidence or 0.7)
-    confidence = max(0.0, min(1.0, confidence))
+    rows = _memory_rows(user_id, items, session_id, now)
+    if not rows:
+        return 0
 
-    if existing:
-        # if value matches (or is near-identical), reinforce confidence
-        old_val = (existing.value or "").strip()
-        new_val = (value or "").strip()
-
-        if new_val and old_val and new_val.lower() == old_val.lower():
-            old_conf = float(existing.confidence or 0.5)
-            boosted = min(1.0, old_conf + 0.08)  # small reinforcement
-            existing.confidence = round(boosted, 4)
-        else:
-            # value changed -> update, but don’t instantly trust it
-            existing.value = new_val or old_val
-            old_conf = float(existing.confidence or 0.5)
-            blended = (0.6 * old_conf) + (0.4 * confidence)
-            existing.confidence = round(min(1.0, max(0.15, blended)), 4)
-
-        existing.session_id = session_id
-        existing.updated_at = now
+    table = AuroraUserMemory.__table__
+    stmt = pg_insert(table).values(rows)
+    excluded = stmt.excluded
 
-    else:
-        new_memory = AuroraUserMemory(
-            id=uuid.uuid4(),
-            user_id=user_id,
-            session_id=session_id,
-            key=key,
-            value=(value or "").strip(),
-            confidence=round(max(0.15, confidence), 4),
-            created_at=now,
-            updated_at=now,
+    same_value = and_(
+        excluded.value != "",
+        table.c.value != "",
+        func.lower(excluded.value) == func.lower(func.trim(table.c.value)),
+    )
+
+    # Reinforce from the decayed value; the write re-bases confidence at now.
+    current = effective_confidence_expr(table.c, now=now)
+
+    reinforced = func.least(1.0, current + REINFORCE_STEP)
+    blended = func.least(
+        1.0,
+        func.greatest(
+            CONFIDENCE_FLOOR,
+            (BLEND_OLD_WEIGHT * current) + (BLEND_NEW_WEIGHT * excluded.confidence),
+        ),
+    )
+
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_aurora_user_memory_user_key",
+        set_={
+            "confidence": _round4(case((same_value, reinforced), else_=blended)),
+            "value": case(
+                (same_value, table.c.value),
+                (excluded.value != "", excluded.value),
+                else_=table.c.value,
+            ),
+            "meta_json": case(
+                (excluded.value != "", table.c.meta_json.op("||")(excluded.meta_json)),
+                else_=table.c.meta_json,
+            ),
+            "session_id": excluded.session_id,
+            "updated_at": excluded.updated_at,
+        },
+    )
+
+    db.session.execute(stmt)
+
+    # Fresh inserts keep the raw value; apply the floor the old insert
+    # path had. Updated rows are already >= the floor.
+    low_keys = [r["key"] for r in rows if r["confidence"] < CONFIDENCE_FLOOR]
+    if low_keys:
+        db.session.execute(
+            update(table)
+            .where(
+                table.c.user_id == user_id,
+                table.c.key.in_(low_keys),
+                table.c.confidence < CONFIDENCE_FLOOR,
+            )
+            .values(confidence=CONFIDENCE_FLOOR)
         )
-        db.session.add(new_memory)
 
-    db.session.commit()
+    _invalidate_turn_cache(user_id)
+
+    if commit:
+        db.session.commit()
+
+    return len(rows)
+
+
+def upsert_memory(user_id, key: str, value: str, session_id, confidence: float = 0.7, *, commit: bool = True):
+    """
+    Insert or update a single memory.
+    Reinforce if same key repeats.
+    """
+    return upsert_memories(
+        user_id,
+        [{"key": key, "value": value, "confidence": confidence}],
+        session_id,
+        commit=commit,
+    )
 
 
 # -------------------------------------------------------
@@ -21,6 +21,7 @@ class AuroraEmotion(db.Model):
         db.UUID(as_uuid=True),
         db.ForeignKey("aurora_messages.id"),
         nullable=False,
+        unique=True,
         index=True
     )
 
@@ -0,0 +1,70 @@
+# backend/aurora/models_emotion_series.py
+
+import uuid
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import UUID
+from extensions import db
+
+
+class AuroraEmotionSeries(db.Model):
+    """
+    Packed PAD time series for one session and source ("face" / "text").
+    Totals are plain columns so summaries and analytics read them
+    without decoding; `raw_blob` / `rollup_blob` hold the columnar
+    ring and min/mean/max buckets (aurora/pad_series.py).
+    """
+    __tablename__ = "aurora_emotion_series"
+    __table_args__ = (
+        db.UniqueConstraint("session_id", "source", name="uq_aurora_emotion_series_session_source"),
+    )
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    user_id = db.Column(UUID(as_uuid=True), nullable=False, index=True)
+    session_id = db.Column(UUID(as_uuid=True), nullable=False, index=True)
+    source = db.Column(db.String(16), nullable=False)
+
+    sample_count = db.Column(db.Integer, nullable=False, default=0)
+    first_at = db.Column(db.DateTime, nullable=True)
+    last_at = db.Column(db.DateTime, nullable=True)
+
+    valence_sum = db.Column(db.Float, nullable=True)
+    valence_min = db.Column(db.Float, nullable=True)
+    valence_max = db.Column(db.Float, nullable=True)
+    arousal_sum = db.Column(db.Float, nullable=True)
+    arousal_min = db.Column(db.Float, nullable=True)
+    arousal_max = db.Column(db.Float, nullable=True)
+    dominance_sum = db.Column(db.Float, nullable=True)
+    dominance_min = db.Column(db.Float, nullable=True)
+    dominance_max = db.Column(db.Float, nullable=True)
+
+    raw_blob = db.Column(db.LargeBinary, nullable=True)
+    rollup_blob = db.Column(db.LargeBinary, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def mean(self, axis: str):
+        total = getattr(self, f"{axis}_sum")
+        return total / self.sample_count if self.sample_count and total is not None else None
+
+    def to_dict(self):
+        return {
+            "id": str(self.id),
+            "user_id": str(self.user_id),
+            "session_id": str(self.session_id),
+            "source": self.source,
+            "sample_count": self.sample_count,
+            "first_at": self.first_at.isoformat() if self.first_at else None,
+            "last_at": self.last_at.isoformat() if self.last_at else None,
+            **{
+                axis: None if not self.sample_count else {
+                    "min": getattr(self, f"{axis}_min"),
+                    "mean": self.mean(axis),
+                    "max": getattr(self, f"{axis}_max"),
+                }
+                for axis in ("valence", "arousal", "dominance")
+            },
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
@@ -26,6 +26,11 @@ class AuroraUserMemory(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # One row per (user, key) so upserts can use ON CONFLICT
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "key", name="uq_aurora_user_memory_user_key"),
+    )
+
     def to_dict(self):
         return {
             "id": str(self.id),
@@ -0,0 +1,47 @@
+# backend/aurora/models_session_context.py
+
+import uuid
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import UUID
+from extensions import db
+
+
+class AuroraSessionContext(db.Model):
+    """
+    Rolling conversation state for one session.
+    Older turns are folded into `rolling_summary`; only messages
+    after the (`summarized_through`, `summarized_through_id`) cursor are
+    sent verbatim.
+    """
+    __tablename__ = "aurora_session_context"
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    user_id = db.Column(UUID(as_uuid=True), nullable=False, index=True)
+    session_id = db.Column(UUID(as_uuid=True), nullable=False, unique=True, index=True)
+
+    rolling_summary = db.Column(db.Text, nullable=False, default="")
+    summary_tokens = db.Column(db.Integer, nullable=False, default=0)
+
+    # (created_at, id) of the newest message folded into the summary;
+    # the id breaks ties between messages with the same timestamp
+    summarized_through = db.Column(db.DateTime, nullable=True)
+    summarized_through_id = db.Column(UUID(as_uuid=True), nullable=True)
+    summarized_count = db.Column(db.Integer, nullable=False, default=0)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": str(self.id),
+            "user_id": str(self.user_id),
+            "session_id": str(self.session_id),
+            "rolling_summary": self.rolling_summary or "",
+            "summary_tokens": self.summary_tokens,
+            "summarized_through": self.summarized_through.isoformat() if self.summarized_through else None,
+            "summarized_through_id": str(self.summarized_through_id) if self.summarized_through_id else None,
+            "summarized_count": self.summarized_count,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
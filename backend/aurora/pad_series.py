@@ -0,0 +1,264 @@
+# backend/aurora/pad_series.py
+#
+# Compact valence/arousal/dominance time series for one session.
+#
+#   - raw samples live in a fixed-capacity ring of typed arrays
+#     (float64 time, float32 v/a/d), so memory per session is bounded
+#   - every sample is also folded into min/sum/max buckets at each of
+#     RESOLUTIONS; each level keeps the newest LEVEL_BUCKETS buckets
+#   - whole-session totals (count, sum, min, max per axis) are kept
+#     alongside, so summary() is O(1) however long the session runs
+#   - pack_raw()/pack_rollups()/restore() turn the ring and rollups into columnar
+#     little-endian blobs for AuroraEmotionSeries
+#
+# Stdlib only; times are epoch seconds.
+
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+AXES = ("valence", "arousal", "dominance")
+
+RAW_CAPACITY = 512
+RESOLUTIONS = (10, 60, 600)          # seconds per bucket
+LEVEL_BUCKETS = 360                  # 1h @10s, 6h @60s, 60h @600s
+
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<HII")      # version, capacity/resolution, count
+_LITTLE = sys.byteorder == "little"
+
+
+def _to_bytes(arr: array) -> bytes:
+    if _LITTLE:
+        return arr.tobytes()
+    swapped = array(arr.typecode, arr)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def _from_bytes(typecode: str, data: bytes) -> array:
+    arr = array(typecode)
+    arr.frombytes(data)
+    if not _LITTLE:
+        arr.byteswap()
+    return arr
+
+
+def _pad(values: Dict[str, Any]) -> Tuple[float, float, float]:
+    return tuple(float(values[k]) for k in AXES)
+
+
+class Rollup:
+    """min/sum/max per axis in fixed-width time buckets, columnar."""
+
+    def __init__(self, resolution: int, max_buckets: int = LEVEL_BUCKETS):
+        self.resolution = int(resolution)
+        self.max_buckets = max_buckets
+        self.start = array("q")
+        self.count = array("I")
+        self.mins = [array("f") for _ in AXES]
+        self.sums = [array("f") for _ in AXES]
+        self.maxs = [array("f") for _ in AXES]
+
+    def _columns(self) -> List[array]:
+        return [self.start, self.count, *self.mins, *self.sums, *self.maxs]
+
+    def add(self, t: float, pad: Sequence[float]):
+        bucket = int(t // self.resolution) * self.resolution
+
+        if self.start and bucket == self.start[-1]:
+            i = len(self.start) - 1
+        elif not self.start or bucket > self.start[-1]:
+            i = self._insert(len(self.start), bucket)
+        else:
+            # late sample (batch uploads): usually lands in a recent bucket
+            i = bisect_left(self.start, bucket)
+            if i >= len(self.start) or self.start[i] != bucket:
+                if i == 0 and len(self.start) >= self.max_buckets:
+                    return  # older than everything we keep
+                i = self._insert(i, bucket)
+
+        self.count[i] += 1
+        for k, v in enumerate(pad):
+            self.sums[k][i] += v
+            if v < self.mins[k][i]:
+                self.mins[k][i] = v
+            if v > self.maxs[k][i]:
+                self.maxs[k][i] = v
+
+        if len(self.start) > self.max_buckets:
+            drop = len(self.start) - self.max_buckets
+            for col in self._columns():
+                del col[:drop]
+
+    def _insert(self, i: int, bucket: int) -> int:
+        self.start.insert(i, bucket)
+        self.count.insert(i, 0)
+        for k in range(len(AXES)):
+            self.mins[k].insert(i, float("inf"))
+            self.sums[k].insert(i, 0.0)
+            self.maxs[k].insert(i, float("-inf"))
+        return i
+
+    def buckets(self, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        lo = bisect_left(self.start, int(since // self.resolution) * self.resolution) if since else 0
+        out = []
+        for i in range(lo, len(self.start)):
+            n = self.count[i]
+            out.append({
+                "t": self.start[i],
+                "n": n,
+                **{
+                    axis: {
+                        "min": round(self.mins[k][i], 4),
+                        "mean": round(self.sums[k][i] / n, 4),
+                        "max": round(self.maxs[k][i], 4),
+                    }
+                    for k, axis in enumerate(AXES)
+                },
+            })
+        return out
+
+    def pack(self) -> bytes:
+        head = _HEADER.pack(FORMAT_VERSION, self.resolution, len(self.start))
+        return head + b"".join(_to_bytes(col) for col in self._columns())
+
+    @classmethod
+    def unpack(cls, data: bytes, offset: int = 0) -> Tuple["Rollup", int]:
+        _, resolution, n = _HEADER.unpack_from(data, offset)
+        offset += _HEADER.size
+        level = cls(resolution)
+        for col in level._columns():
+            size = n * col.itemsize
+            col.extend(_from_bytes(col.typecode, data[offset:offset + size]))
+            offset += size
+        return level, offset
+
+
+class PadSeries:
+    def __init__(self, capacity: int = RAW_CAPACITY, resolutions: Sequence[int] = RESOLUTIONS):
+        self.capacity = capacity
+        self.t = array("d", bytes(8 * capacity))
+        self.values = [array("f", bytes(4 * capacity)) for _ in AXES]
+        self.head = 0                 # next write slot
+        self.size = 0
+
+        self.levels = [Rollup(r) for r in resolutions]
+
+        self.n = 0
+        self.first_at: Optional[float] = None
+        self.last_at: Optional[float] = None
+        self.sum = [0.0] * len(AXES)
+        self.min = [float("inf")] * len(AXES)
+        self.max = [float("-inf")] * len(AXES)
+
+    # ---------------- writes ----------------
+
+    def add(self, t: float, values: Dict[str, Any]):
+        pad = _pad(values)
+
+        self.t[self.head] = t
+        for k, v in enumerate(pad):
+            self.values[k][self.head] = v
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+        for level in self.levels:
+            level.add(t, pad)
+
+        self.n += 1
+        self.first_at = t if self.first_at is None else min(self.first_at, t)
+        self.last_at = t if self.last_at is None else max(self.last_at, t)
+        for k, v in enumerate(pad):
+            self.sum[k] += v
+            self.min[k] = min(self.min[k], v)
+            self.max[k] = max(self.max[k], v)
+
+    # ---------------- reads ----------------
+
+    def summary(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"count": self.n, "first_at": self.first_at, "last_at": self.last_at}
+        for k, axis in enumerate(AXES):
+            out[axis] = None if not self.n else {
+                "min": round(self.min[k], 4),
+                "mean": round(self.sum[k] / self.n, 4),
+                "max": round(self.max[k], 4),
+            }
+        return out
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, float]]:
+        """Raw samples still in the ring, in arrival order."""
+        count = self.size if limit is None else min(limit, self.size)
+        out = []
+        for j in range(count):
+            i = (self.head - count + j) % self.capacity
+            out.append({"t": self.t[i], **{axis: round(self.values[k][i], 4) for k, axis in enumerate(AXES)}})
+        return out
+
+    def downsample(self, resolution: Optional[int] = None, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Buckets from the finest level at least `resolution` seconds wide."""
+        level = self.levels[-1]
+        for candidate in self.levels:
+            if resolution is None or candidate.resolution >= resolution:
+                level = candidate
+                break
+        return level.buckets(since)
+
+    # ---------------- packing ----------------
+
+    def pack_raw(self) -> bytes:
+        """Ring contents in arrival order (columnar: t, then one column per axis)."""
+        order = [(self.head - self.size + j) % self.capacity for j in range(self.size)]
+        cols = [array("d", (self.t[i] for i in order))]
+        cols += [array("f", (col[i] for i in order)) for col in self.values]
+        return _HEADER.pack(FORMAT_VERSION, self.capacity, self.size) + b"".join(_to_bytes(c) for c in cols)
+
+    def pack_rollups(self) -> bytes:
+        return struct.pack("<H", len(self.levels)) + b"".join(level.pack() for level in self.levels)
+
+    def restore(self, raw: Optional[bytes], rollups: Optional[bytes], totals: Dict[str, Any]):
+        """Rebuild from pack_raw()/pack_rollups() plus the stored totals."""
+        if raw:
+            _, _, n = _HEADER.unpack_from(raw)
+            offset = _HEADER.size
+            t = _from_bytes("d", raw[offset:offset + 8 * n])
+            offset += 8 * n
+            cols = []
+            for _ in AXES:
+                cols.append(_from_bytes("f", raw[offset:offset + 4 * n]))
+                offset += 4 * n
+            for j in range(max(0, n - self.capacity), n):
+                self.t[self.head] = t[j]
+                for k in range(len(AXES)):
+                    self.values[k][self.head] = cols[k][j]
+                self.head = (self.head + 1) % self.capacity
+                self.size = min(self.size + 1, self.capacity)
+
+        if rollups:
+            (count,) = struct.unpack_from("<H", rollups)
+            offset = 2
+            levels = []
+            for _ in range(count):
+                level, offset = Rollup.unpack(rollups, offset)
+                levels.append(level)
+            self.levels = levels
+
+        self.n = int(totals.get("count") or 0)
+        self.first_at = totals.get("first_at")
+        self.last_at = totals.get("last_at")
+        if self.n:
+            self.sum = [float(totals[f"{axis}_sum"]) for axis in AXES]
+            self.min = [float(totals[f"{axis}_min"]) for axis in AXES]
+            self.max = [float(totals[f"{axis}_max"]) for axis in AXES]
+
+    def totals(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"count": self.n, "first_at": self.first_at, "last_at": self.last_at}
+        for k, axis in enumerate(AXES):
+            out[f"{axis}_sum"] = self.sum[k] if self.n else None
+            out[f"{axis}_min"] = self.min[k] if self.n else None
+            out[f"{axis}_max"] = self.max[k] if self.n else None
+        return out
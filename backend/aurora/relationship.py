@@ -6,7 +6,7 @@ from aurora.models_relationship import AuroraRelationship
 def _clamp(n: int, lo: int = 0, hi: int = 100) -> int:
     return max(lo, min(hi, n))
 
-def get_or_create_relationship(user_id):
+def get_or_create_relationship(user_id, *, commit: bool = True):
     rel = AuroraRelationship.query.filter_by(user_id=user_id).first()
     if rel:
         return rel
@@ -30,15 +30,26 @@ def get_or_create_relationship(user_id):
     )
 
     db.session.add(rel)
-    db.session.commit()
+    if commit:
+        db.session.commit()
+    else:
+        db.session.flush()
     return rel
 
-def update_on_message(user_id, *, user_text: str, safety_flag: bool = False, sentiment_hint: float | None = None):
+def update_on_message(
+    user_id,
+    *,
+    user_text: str,
+    safety_flag: bool = False,
+    sentiment_hint: float | None = None,
+    commit: bool = True,
+):
     """
     Called after each user message is stored (or at least after it's received).
     sentiment_hint: optional -1..+1 (if you already compute text sentiment elsewhere)
+    commit=False flushes only, so the caller can batch this into its own transaction.
     """
-    rel = get_or_create_relationship(user_id)
+    rel = get_or_create_relationship(user_id, commit=commit)
 
     rel.interaction_count += 1
     rel.last_seen_at = datetime.utcnow()
@@ -78,7 +89,10 @@ def update_on_message(user_id, *, user_text: str, safety_flag: bool = False, sen
 
     rel.trust_score = _clamp(rel.trust_score + trust_delta)
 
-    db.session.commit()
+    if commit:
+        db.session.commit()
+    else:
+        db.session.flush()
     return rel
 
 def apply_ritual_preference(user_id, *, preferred_name: str | None = None, prefers_concise: bool | None = None):
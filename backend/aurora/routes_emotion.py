@@ -2,11 +2,16 @@
 
 from __future__ import annotations
 
+import json
+import math
+import time
+
 from flask import Blueprint, jsonify, request
 
-from services.hf_emotion import analyze_emotion, EmotionServiceError
+from services.emotion_backends import analyze_emotion, analyze_emotion_batch, EmotionServiceError
 from aurora.emotion_fusion import fuse_face_text
-from aurora.emotion_state import get_user_emotion_engine
+from aurora.emotion_series import SERIES_IDLE_S, emotion_series, record_pad_samples
+from aurora.emotion_state import read_user_emotion, update_user_emotion, update_user_emotion_series
 from utils.decorators import token_required
 
 aurora_emotion_bp = Blueprint(
@@ -15,6 +20,12 @@ aurora_emotion_bp = Blueprint(
     url_prefix="/api/user/aurora"
 )
 
+MAX_FRAME_BYTES = 2_000_000
+MAX_BATCH_FRAMES = 16
+MAX_BATCH_BYTES = 8_000_000
+MAX_SERIES_RECENT = 512
+MAX_SERIES_RESOLUTION = 86_400
+
 
 def _safe_float(value):
     try:
@@ -25,6 +36,45 @@ def _safe_float(value):
         return None
 
 
+def _finite_arg(name, lo, hi):
+    """Query arg as a float clamped to [lo, hi]; None if missing, nan or inf."""
+    value = _safe_float(request.args.get(name))
+    if value is None or not math.isfinite(value):
+        return None
+    return max(lo, min(value, hi))
+
+
+def _text_pad():
+    text_v = _safe_float(request.form.get("text_valence"))
+    text_a = _safe_float(request.form.get("text_arousal"))
+    text_d = _safe_float(request.form.get("text_dominance"))
+
+    if text_v is None or text_a is None or text_d is None:
+        return None
+    return {
+        "valence": text_v,
+        "arousal": text_a,
+        "dominance": text_d,
+    }
+
+
+def _session_id():
+    """
+    Conversation session (AuroraMessage.session_id) the frames belong to.
+    Client-supplied: the series store only records into sessions the
+    caller owns.
+    """
+    return request.form.get("session_id") or request.args.get("session_id")
+
+
+def _face_pad(face):
+    return {
+        "valence": float(face["valence"]),
+        "arousal": float(face["arousal"]),
+        "dominance": float(face["dominance"]),
+    }
+
+
 @aurora_emotion_bp.post("/emotion")
 @token_required
 def detect_face_emotion(current_user):
@@ -36,51 +86,161 @@ def detect_face_emotion(current_user):
     if not image_bytes:
         return jsonify({"error": "empty_frame"}), 400
 
-    if len(image_bytes) > 2_000_000:
+    if len(image_bytes) > MAX_FRAME_BYTES:
         return jsonify({"error": "frame_too_large"}), 400
 
     try:
-        face = analyze_emotion(image_bytes)
+        face = analyze_emotion(image_bytes, session_key=str(current_user.id))
     except EmotionServiceError as e:
         return jsonify({"error": str(e)}), 502
     except Exception as e:
         return jsonify({"error": f"emotion_detection_failed: {e}"}), 500
 
-    text_v = _safe_float(request.form.get("text_valence"))
-    text_a = _safe_float(request.form.get("text_arousal"))
-    text_d = _safe_float(request.form.get("text_dominance"))
-
-    text_pad = None
-    if text_v is not None and text_a is not None and text_d is not None:
-        text_pad = {
-            "valence": text_v,
-            "arousal": text_a,
-            "dominance": text_d,
-        }
-
-    face_pad = {
-        "valence": float(face["valence"]),
-        "arousal": float(face["arousal"]),
-        "dominance": float(face["dominance"]),
-    }
-
-    fused = fuse_face_text(face_pad=face_pad, text_pad=text_pad)
-    engine = get_user_emotion_engine(str(current_user.id))
-    smoothed = engine.update(fused, alpha=0.22)
+    face_pad = _face_pad(face)
+    fused = fuse_face_text(face_pad=face_pad, text_pad=_text_pad())
+    smoothed = update_user_emotion(str(current_user.id), fused, alpha=0.22)
+    record_pad_samples(current_user.id, _session_id(), "face", [(time.time(), face_pad)])
 
-    return jsonify({
+    payload = {
         "emotion": face["emotion"],
         "score": face["score"],
         "face_pad": face_pad,
         "fused_pad": fused,
         "smoothed_pad": smoothed,
         "raw": face.get("raw", []),
-    }), 200
+        "backend": face.get("backend"),
+    }
+    # vision backend: frame dedupe + adaptive polling hints
+    for key in ("cached", "next_poll_ms"):
+        if key in face:
+            payload[key] = face[key]
+
+    return jsonify(payload), 200
+
+
+# ------------------------------------------------------------
+# Batch: N frames per request
+#   frames      multipart files, repeated
+#   timestamps  JSON array of client times in ms, one per frame
+#               (optional; upload order otherwise)
+#   text_*      optional text PAD, fused into every frame
+#   session_id  optional conversation session; face PADs go to
+#               its series (aurora/emotion_series.py), as on /emotion.
+#               Ignored unless the session is the caller's.
+# ------------------------------------------------------------
+@aurora_emotion_bp.post("/emotion/batch")
+@token_required
+def detect_face_emotion_batch(current_user):
+    files = request.files.getlist("frames")
+    if not files:
+        return jsonify({"error": "frames_required"}), 400
+    if len(files) > MAX_BATCH_FRAMES:
+        return jsonify({"error": "too_many_frames", "max": MAX_BATCH_FRAMES}), 400
+
+    images = [f.read() for f in files]
+    if any(len(b) > MAX_FRAME_BYTES for b in images) or sum(len(b) for b in images) > MAX_BATCH_BYTES:
+        return jsonify({"error": "frame_too_large"}), 400
 
+    try:
+        timestamps = json.loads(request.form.get("timestamps") or "null")
+        if timestamps is None:
+            timestamps = list(range(len(images)))
+        timestamps = [float(t) for t in timestamps]
+    except (TypeError, ValueError):
+        return jsonify({"error": "invalid_timestamps"}), 400
+    # json.loads takes NaN / Infinity
+    if not all(math.isfinite(t) for t in timestamps):
+        return jsonify({"error": "invalid_timestamps"}), 400
+    if len(timestamps) != len(images):
+        return jsonify({"error": "timestamps_mismatch"}), 400
+
+    # process in capture order
+    order = sorted(range(len(images)), key=lambda i: timestamps[i])
+    images = [images[i] for i in order]
+    timestamps = [timestamps[i] for i in order]
 
-@aurora_emotion_bp.post("/emotion/decay")
+    try:
+        faces = analyze_emotion_batch(images, session_key=str(current_user.id))
+    except EmotionServiceError as e:
+        return jsonify({"error": str(e)}), 502
+    except Exception as e:
+        return jsonify({"error": f"emotion_detection_failed: {e}"}), 500
+
+    # client clock -> server clock, anchored on the newest frame; a
+    # bogus span is clamped to the window a live series still covers
+    now = time.time()
+    newest = timestamps[-1]
+    oldest_ok = now - SERIES_IDLE_S
+
+    text_pad = _text_pad()
+    frames, samples, face_samples = [], [], []
+    for ts, face in zip(timestamps, faces):
+        if "emotion" not in face:
+            frames.append({"ts": ts, "error": face.get("error") or "emotion_detection_failed"})
+            continue
+        face_pad = _face_pad(face)
+        fused = fuse_face_text(face_pad=face_pad, text_pad=text_pad)
+        frames.append({
+            "ts": ts,
+            "emotion": face["emotion"],
+            "score": face["score"],
+            "face_pad": face_pad,
+            "fused_pad": fused,
+            "cached": face.get("cached", False),
+        })
+        t = max(oldest_ok, now - (newest - ts) / 1000.0)
+        samples.append((t, fused))
+        face_samples.append((t, face_pad))
+
+    smoothed = update_user_emotion_series(str(current_user.id), samples, alpha=0.22) if samples else []
+    record_pad_samples(current_user.id, _session_id(), "face", face_samples)
+    ok_frames = [f for f in frames if "error" not in f]
+    for frame, pad in zip(ok_frames, smoothed):
+        frame["smoothed_pad"] = pad
+
+    payload = {
+        "frames": frames,
+        "smoothed_pad": smoothed[-1] if smoothed else read_user_emotion(str(current_user.id)),
+        "backend": faces[0].get("backend") if faces else None,
+    }
+    if faces and "next_poll_ms" in faces[-1]:
+        payload["next_poll_ms"] = faces[-1]["next_poll_ms"]
+
+    return jsonify(payload), 200
+
+
+# Decay is time-based and applied on read now; kept for existing clients.
+@aurora_emotion_bp.route("/emotion/decay", methods=["GET", "POST"])
 @token_required
 def decay_emotion(current_user):
-    engine = get_user_emotion_engine(str(current_user.id))
-    decayed = engine.decay(rate=0.02)
-    return jsonify({"smoothed_pad": decayed}), 200
\ No newline at end of file
+    return jsonify({"smoothed_pad": read_user_emotion(str(current_user.id))}), 200
+
+
+# ------------------------------------------------------------
+# Session PAD series (downsampled)
+#   session_id  required
+#   source      face | text (default face)
+#   resolution  bucket width in seconds; finest level >= this
+#   since       epoch seconds
+#   recent      raw samples to include from the ring (0..512)
+# ------------------------------------------------------------
+@aurora_emotion_bp.get("/emotion/series")
+@token_required
+def emotion_series_view(current_user):
+    source = request.args.get("source", "face")
+    resolution = _finite_arg("resolution", 1, MAX_SERIES_RESOLUTION)
+    since = _finite_arg("since", 0, time.time())
+    recent = _finite_arg("recent", 0, MAX_SERIES_RECENT)
+
+    series = emotion_series.series(
+        request.args.get("session_id"),
+        source,
+        user_id=current_user.id,
+        resolution=int(resolution) if resolution else None,
+        since=since,
+        recent=int(recent or 0),
+    )
+    if series is None:
+        return jsonify({"error": "series_not_found"}), 404
+
+    return jsonify(series), 200
@@ -3,24 +3,25 @@
 from __future__ import annotations
 import re
 import uuid
-from pathlib import Path
-from flask import Blueprint, jsonify, request, send_file, current_app
+from flask import Blueprint, Response, jsonify, request
 from extensions import db, limiter
 from utils.decorators import token_required
 
-from aurora.speech_user import generate_and_store_user_speech
+from aurora.speech_user import start_user_speech, stream_pending_audio
+from aurora.audio_store import audio_root, send_user_audio
 from aurora.models_messages import AuroraMessage
 from aurora.relationship import update_on_message, get_or_create_relationship
 from aurora.guardrails import check_guardrails
 from aurora.brain_user import generate_reply
+from aurora.db_budget import track_db_budget
+from aurora.history import schedule_compaction, load_summary_input
+from aurora.emotion_tagging import emotion_job, enqueue_message_emotion
 from services.datetime_context import get_time_context
 
 
 from aurora.memory_store import (
     extract_memory_candidates,
-    upsert_memory,
-    decay_user_memory,
-    prune_memory,
+    upsert_memories,
     fetch_user_memory,
 )
 
@@ -102,7 +103,7 @@ def greet(current_user):
     name = _first_name_from_user(current_user)
     assistant_reply = _build_greeting(name)
 
-    audio_url = generate_and_store_user_speech(
+    audio_url = start_user_speech(
         text=assistant_reply,
         user_id=str(current_user.id),
         session_id=str(session_uuid),
@@ -139,6 +140,12 @@ def greet(current_user):
 # -------------------------------------------------------
 # CONVERSE
 # EMOTION ANALYTICS DISABLED FOR NOW
+#
+# Writes are grouped into two transactions:
+#   1) user message + relationship update
+#   2) assistant message + memory promotion
+# Best-effort parts run inside savepoints so their failure
+# never loses the messages.
 # -------------------------------------------------------
 @aurora_user_bp.post("/converse")
 @token_required
@@ -158,170 +165,209 @@ def converse(current_user):
     if session_uuid is None:
         session_uuid = uuid.uuid4()
 
-    # --------------------------------------------------
-    # 1) Guardrails
-    # --------------------------------------------------
-    guardrail_result = check_guardrails(user_text)
-
-    # --------------------------------------------------
-    # 2) Emotion analytics disabled for now
-    # --------------------------------------------------
-    emotion_data = {}
-
-    # --------------------------------------------------
-    # 3) Store User Message
-    # --------------------------------------------------
-    try:
-        user_msg = AuroraMessage(
-            user_id=current_user.id,
-            session_id=session_uuid,
-            role="user",
-            content=user_text,
-            meta_json={
-                "guardrail": {
-                    "triggered": guardrail_result.triggered,
-                    "category": guardrail_result.category,
-                    "severity": guardrail_result.severity,
-                    "meta": guardrail_result.meta,
+    with track_db_budget("converse") as budget:
+        # --------------------------------------------------
+        # 1) Guardrails
+        # --------------------------------------------------
+        guardrail_result = check_guardrails(user_text)
+
+        # --------------------------------------------------
+        # 2) Emotion analytics run after commit, off the request
+        #    path (aurora/emotion_tagging.py -> AuroraEmotion)
+        # --------------------------------------------------
+        emotion_data = {}
+
+        # --------------------------------------------------
+        # 3) Store User Message (transaction 1)
+        # --------------------------------------------------
+        try:
+            user_msg = AuroraMessage(
+                user_id=current_user.id,
+                session_id=session_uuid,
+                role="user",
+                content=user_text,
+                meta_json={
+                    "guardrail": {
+                        "triggered": guardrail_result.triggered,
+                        "category": guardrail_result.category,
+                        "severity": guardrail_result.severity,
+                        "meta": guardrail_result.meta,
+                    },
+                    "emotion": emotion_data,
                 },
-                "emotion": emotion_data,
-            },
-        )
-        db.session.add(user_msg)
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        print("\n!!!! AURORA USER MESSAGE SAVE ERROR !!!!")
-        print(str(e))
-        print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
-        return jsonify({"error": "failed_to_store_user_message"}), 500
+            )
+            db.session.add(user_msg)
+            db.session.flush()
+            user_emotion_job = emotion_job(user_msg)
+        except Exception as e:
+            db.session.rollback()
+            print("\n!!!! AURORA USER MESSAGE SAVE ERROR !!!!")
+            print(str(e))
+            print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+            return jsonify({"error": "failed_to_store_user_message"}), 500
 
-    # --------------------------------------------------
-    # 4) Relationship Update
-    # --------------------------------------------------
-    try:
-        rel = update_on_message(
-            current_user.id,
-            user_text=user_text,
-            safety_flag=guardrail_result.triggered,
-            sentiment_hint=None,
-        )
-    except Exception as e:
-        print("\n!!!! AURORA RELATIONSHIP UPDATE ERROR !!!!")
-        print(str(e))
-        print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
-        rel = get_or_create_relationship(current_user.id)
+        # --------------------------------------------------
+        # 4) Relationship Update (savepoint, same transaction)
+        # --------------------------------------------------
+        rel = None
+        try:
+            with db.session.begin_nested():
+                rel = update_on_message(
+                    current_user.id,
+                    user_text=user_text,
+                    safety_flag=guardrail_result.triggered,
+                    sentiment_hint=None,
+                    commit=False,
+                )
+        except Exception as e:
+            print("\n!!!! AURORA RELATIONSHIP UPDATE ERROR !!!!")
+            print(str(e))
+            print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+            rel = None
 
-    # --------------------------------------------------
-    # 5) Assistant Response
-    # --------------------------------------------------
-    try:
-        if guardrail_result.triggered:
-            assistant_reply = guardrail_result.response_override
-            usage = {}
-        else:
-            assistant_reply, usage = generate_reply(
-                current_user.id,
-                session_uuid,
-                rel,
-                guardrail_result,
-                live_emotion=None,
-            )
-    except Exception as e:
-        print("\n!!!! AURORA GENERATE REPLY ERROR !!!!")
-        print(str(e))
-        print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
-        return jsonify({"error": "failed_to_generate_reply"}), 500
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print("\n!!!! AURORA USER MESSAGE SAVE ERROR !!!!")
+            print(str(e))
+            print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+            return jsonify({"error": "failed_to_store_user_message"}), 500
 
-    if not assistant_reply:
-        assistant_reply = "I'm here with you."
-        usage = usage if isinstance(usage, dict) else {}
+        enqueue_message_emotion(user_emotion_job)
 
-    # --------------------------------------------------
-    # 6) Voice Generation
-    #    Keep isolated so TTS failure doesn't kill response
-    # --------------------------------------------------
-    voice_enabled = (getattr(rel, "ritual_preferences", {}) or {}).get("voice_enabled", True)
+        # Fallback only; a new row rides along with transaction 2.
+        if rel is None:
+            rel = get_or_create_relationship(current_user.id, commit=False)
 
-    audio_url = None
-    if voice_enabled and assistant_reply:
+        # --------------------------------------------------
+        # 5) Assistant Response
+        # --------------------------------------------------
         try:
-            audio_url = generate_and_store_user_speech(
-                text=assistant_reply,
-                user_id=str(current_user.id),
-                session_id=str(session_uuid),
-            )
+            if guardrail_result.triggered:
+                assistant_reply = guardrail_result.response_override
+                usage = {}
+            else:
+                assistant_reply, usage = generate_reply(
+                    current_user.id,
+                    session_uuid,
+                    rel,
+                    guardrail_result,
+                    live_emotion=None,
+                    user_text=user_text,
+                )
         except Exception as e:
-            print("\n!!!! AURORA VOICE GENERATION ERROR !!!!")
+            print("\n!!!! AURORA GENERATE REPLY ERROR !!!!")
             print(str(e))
             print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
-            audio_url = None
+            return jsonify({"error": "failed_to_generate_reply"}), 500
+
+        if not assistant_reply:
+            assistant_reply = "I'm here with you."
+            usage = usage if isinstance(usage, dict) else {}
+
+        # --------------------------------------------------
+        # 6) Voice Generation
+        #    Queued, not awaited: the URL streams while ElevenLabs
+        #    renders, so the text reply doesn't wait on speech.
+        #    Keep isolated so TTS failure doesn't kill response
+        # --------------------------------------------------
+        voice_enabled = (getattr(rel, "ritual_preferences", {}) or {}).get("voice_enabled", True)
+
+        audio_url = None
+        if voice_enabled and assistant_reply:
+            try:
+                audio_url = start_user_speech(
+                    text=assistant_reply,
+                    user_id=str(current_user.id),
+                    session_id=str(session_uuid),
+                )
+            except Exception as e:
+                print("\n!!!! AURORA VOICE GENERATION ERROR !!!!")
+                print(str(e))
+                print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+                audio_url = None
+
+        # --------------------------------------------------
+        # 7) Store Assistant Message (transaction 2)
+        # --------------------------------------------------
+        try:
+            assistant_msg = AuroraMessage(
+                user_id=current_user.id,
+                session_id=session_uuid,
+                role="assistant",
+                content=assistant_reply,
+                meta_json={
+                    "guardrail_response": guardrail_result.triggered,
+                    "usage": usage if isinstance(usage, dict) else {},
+                    "audio_url": audio_url,
+                    "emotion_context_used": None,
+                },
+            )
+            db.session.add(assistant_msg)
+            db.session.flush()
+        except Exception as e:
+            db.session.rollback()
+            print("\n!!!! AURORA ASSISTANT MESSAGE SAVE ERROR !!!!")
+            print(str(e))
+            print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+            return jsonify({"error": "failed_to_store_assistant_message"}), 500
 
-    # --------------------------------------------------
-    # 7) Store Assistant Message
-    # --------------------------------------------------
-    try:
-        assistant_msg = AuroraMessage(
-            user_id=current_user.id,
-            session_id=session_uuid,
-            role="assistant",
-            content=assistant_reply,
-            meta_json={
-                "guardrail_response": guardrail_result.triggered,
-                "usage": usage if isinstance(usage, dict) else {},
-                "audio_url": audio_url,
-                "emotion_context_used": None,
-            },
-        )
-        db.session.add(assistant_msg)
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        print("\n!!!! AURORA ASSISTANT MESSAGE SAVE ERROR !!!!")
-        print(str(e))
-        print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
-        return jsonify({"error": "failed_to_store_assistant_message"}), 500
+        # --------------------------------------------------
+        # 8) Memory Promotion Layer
+        #    Best-effort only; savepoint so it never blocks response
+        # --------------------------------------------------
+        try:
+            print("\n========== MEMORY DEBUG ==========")
+            print("User text:", user_text)
 
-    # --------------------------------------------------
-    # 8) Memory Promotion Layer
-    #    Best-effort only; never block response
-    # --------------------------------------------------
-    try:
-        print("\n========== MEMORY DEBUG ==========")
-        print("User text:", user_text)
+            memory_candidates = extract_memory_candidates(user_text)
+            print("Memory candidates detected:", memory_candidates)
 
-        memory_candidates = extract_memory_candidates(user_text)
-        print("Memory candidates detected:", memory_candidates)
+            with db.session.begin_nested():
+                upserted = upsert_memories(
+                    current_user.id,
+                    memory_candidates,
+                    session_uuid,
+                    commit=False,
+                )
 
-        for item in memory_candidates:
-            print("Upserting memory item:", item)
+            print(f"Memory upsert completed ({upserted} rows, one statement).")
+            print("==================================\n")
 
-            upsert_memory(
-                user_id=current_user.id,
-                key=item.get("key"),
-                value=item.get("value"),
-                session_id=session_uuid,
-                confidence=float(item.get("confidence", 0.6)),
-            )
+        except Exception as e:
+            print("\n!!!! MEMORY ERROR !!!!")
+            print(str(e))
+            print("!!!!!!!!!!!!!!!!!!!!!!\n")
 
-        print("Memory upsert completed.")
-        print("==================================\n")
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print("\n!!!! AURORA ASSISTANT MESSAGE SAVE ERROR !!!!")
+            print(str(e))
+            print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+            return jsonify({"error": "failed_to_store_assistant_message"}), 500
 
-    except Exception as e:
-        print("\n!!!! MEMORY ERROR !!!!")
-        print(str(e))
-        print("!!!!!!!!!!!!!!!!!!!!!!\n")
+        # Fold turns that fell out of the history window into the
+        # rolling summary, off the request path.
+        if isinstance(usage, dict) and usage.get("history_truncated"):
+            schedule_compaction(current_user.id, session_uuid)
+
+        relationship_payload = {
+            "familiarity_score": getattr(rel, "familiarity_score", 0),
+            "trust_score": getattr(rel, "trust_score", 0),
+            "interaction_count": getattr(rel, "interaction_count", 0),
+        }
+
+    print(f"\n🧮 Converse DB budget: {budget.commits} commits, {budget.queries} queries.\n")
 
     # --------------------------------------------------
     # 9) Response
     # --------------------------------------------------
     return jsonify({
         "session_id": str(session_uuid),
-        "relationship": {
-            "familiarity_score": getattr(rel, "familiarity_score", 0),
-            "trust_score": getattr(rel, "trust_score", 0),
-            "interaction_count": getattr(rel, "interaction_count", 0),
-        },
+        "relationship": relationship_payload,
         "guardrail": {
             "triggered": guardrail_result.triggered,
             "category": guardrail_result.category,
@@ -351,20 +397,17 @@ def end_session(current_user):
     if session_uuid is None:
         return jsonify({"error": "invalid_session_id"}), 400
 
-    messages = (
-        AuroraMessage.query
-        .filter_by(user_id=current_user.id, session_id=session_uuid)
-        .order_by(AuroraMessage.created_at.asc())
-        .all()
-    )
+    # Bounded input: rolling summary + the newest turns that fit
+    messages, prior_summary = load_summary_input(current_user.id, session_uuid)
 
-    if not messages:
+    if not messages and not prior_summary:
         return jsonify({"error": "no_messages_found"}), 404
 
     summary_dict = summarize_session(
         user_id=current_user.id,
         session_id=session_uuid,
         messages=messages,
+        prior_summary=prior_summary,
     )
 
     try:
@@ -408,14 +451,8 @@ def end_session(current_user):
         print(str(e))
         print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
 
-    try:
-        decayed = decay_user_memory(current_user.id, half_life_days=45, floor=0.15)
-        pruned = prune_memory(current_user.id, min_confidence=0.18)
-        print(f"\n🧠 Memory decay updated {decayed} rows, pruned {pruned} rows.\n")
-    except Exception as e:
-        print("\n!!!! MEMORY DECAY ERROR !!!!")
-        print(str(e))
-        print("!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+    # Memory decay is computed at read time (fetch_user_memory) and weak
+    # rows are pruned by `flask aurora compact-memory`, not here.
 
     return jsonify({
         "message": "session_summarized",
@@ -440,7 +477,8 @@ def personality_state(current_user):
         {
             "key": m.key,
             "value": m.value,
-            "confidence": float(m.confidence or 0.0),
+            "confidence": float(getattr(m, "effective_confidence", m.confidence) or 0.0),
+            "base_confidence": float(m.confidence or 0.0),
             "created_at": m.created_at.isoformat() if m.created_at else None,
             "updated_at": (
                 m.updated_at.isoformat()
@@ -480,20 +518,24 @@ def serve_aurora_audio(current_user, user_id, filename):
         return jsonify({"error": "forbidden"}), 403
 
     try:
-        static_root = Path(current_app.static_folder)
-        filepath = static_root / "audio" / "aurora" / str(user_id) / filename
+        filepath = audio_root() / str(user_id) / filename
 
         if not filepath.exists() or not filepath.is_file():
-            return jsonify({"error": "audio_not_found"}), 404
-
-        return send_file(
-            filepath,
-            mimetype="audio/mpeg",
-            as_attachment=False,
-            download_name=filename,
-            conditional=False,
-            max_age=0,
-        )
+            # still rendering: stream what's there and follow the writer
+            pending = stream_pending_audio(filepath)
+            if pending is None:
+                # the render may have renamed .part into place between
+                # the exists() check and opening it
+                if filepath.is_file():
+                    return send_user_audio(filepath, user_id, filename)
+                return jsonify({"error": "audio_not_found"}), 404
+
+            resp = Response(pending, mimetype="audio/mpeg", direct_passthrough=True)
+            resp.headers["Content-Disposition"] = f'inline; filename="{filename}"'
+            resp.headers["Cache-Control"] = "no-store"
+            return resp
+
+        return send_user_audio(filepath, user_id, filename)
     except Exception as e:
         print("\n!!!! AURORA AUDIO SERVE ERROR !!!!")
         print(str(e))
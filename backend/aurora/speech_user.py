@@ -3,23 +3,41 @@
 from __future__ import annotations
 
 import os
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, Iterator
 
-import requests
 from flask import current_app
 
+from services.http_client import http_post
+from services.tts_cache import STREAM_CHUNK_BYTES, primed, tts_cache, tts_cache_key
+
 
 ELEVEN_KEY = os.getenv("ELEVENLABS_API_KEY")
 VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID")
 APP_BASE_URL = os.getenv("APP_BASE_URL", "http://localhost:5000")
 
+TTS_WORKERS = int(os.getenv("AURORA_TTS_WORKERS", "4"))
+PENDING_IDLE_TIMEOUT = float(os.getenv("AURORA_PENDING_AUDIO_TIMEOUT", "20"))
+PENDING_SUFFIX = ".part"
+
+MODEL_ID = "eleven_turbo_v2"
+VOICE_SETTINGS = {
+    "stability": 0.35,
+    "similarity_boost": 0.55,
+    "style": 0.65,
+    "use_speaker_boost": True,
+}
+
 
 class AuroraSpeechError(Exception):
     pass
 
 
-def text_to_speech_bytes(text: str) -> bytes:
+def _check(text: str):
     if not ELEVEN_KEY:
         raise AuroraSpeechError("Missing ELEVENLABS_API_KEY")
 
@@ -29,7 +47,36 @@ def text_to_speech_bytes(text: str) -> bytes:
     if not text or not text.strip():
         raise AuroraSpeechError("Cannot generate speech from empty text")
 
+
+def _cache_key(text: str) -> str:
+    return tts_cache_key(
+        text,
+        voice_id=VOICE_ID,
+        model_id=MODEL_ID,
+        voice_settings=VOICE_SETTINGS,
+    )
+
+
+def text_to_speech_bytes(text: str) -> bytes:
+    _check(text)
+    # Greetings, "Go ahead — I'm listening." and guardrail overrides
+    # repeat constantly; only a cache miss reaches ElevenLabs.
+    return tts_cache.get_or_synthesize(_cache_key(text), lambda: _synthesize(text))
+
+
+def text_to_speech_stream(text: str) -> Iterator[bytes]:
+    """
+    MP3 chunks as ElevenLabs produces them, tee'd into the TTS cache.
+    Provider errors raise here, before the first chunk is returned.
+    """
+    _check(text)
+    return primed(tts_cache.stream(_cache_key(text), lambda: _stream_chunks(text)))
+
+
+def _request(text: str, *, stream: bool = False):
     url = f"https://api.elevenlabs.io/v1/text-to-speech/{VOICE_ID}"
+    if stream:
+        url += "/stream"
 
     headers = {
         "xi-api-key": ELEVEN_KEY,
@@ -38,31 +85,50 @@ def text_to_speech_bytes(text: str) -> bytes:
     }
 
     payload = {
-        "model_id": "eleven_turbo_v2",
+        "model_id": MODEL_ID,
         "text": text,
-        "voice_settings": {
-            "stability": 0.35,
-            "similarity_boost": 0.55,
-            "style": 0.65,
-            "use_speaker_boost": True,
-        },
+        "voice_settings": VOICE_SETTINGS,
         "optimize_streaming_latency": 2,
     }
 
     try:
-        res = requests.post(url, headers=headers, json=payload, timeout=20)
+        res = http_post("elevenlabs", url, headers=headers, json=payload, stream=stream)
     except Exception as e:
         raise AuroraSpeechError(f"ElevenLabs request failed: {e}")
 
     if res.status_code != 200:
         raise AuroraSpeechError(f"ElevenLabs Error {res.status_code}: {res.text}")
 
+    return res
+
+
+def _synthesize(text: str) -> bytes:
+    res = _request(text)
+
     if not res.content:
         raise AuroraSpeechError("ElevenLabs returned empty audio content")
 
     return res.content
 
 
+def _stream_chunks(text: str) -> Iterator[bytes]:
+    res = _request(text, stream=True)
+    try:
+        for chunk in res.iter_content(chunk_size=STREAM_CHUNK_BYTES):
+            if chunk:
+                yield chunk
+    finally:
+        res.close()
+
+
+def audio_filename(text: str, session_id) -> str:
+    """
+    Immutable name: the TTS cache key fixes the audio content, so a given
+    file never changes and can be cached by clients indefinitely.
+    """
+    return f"{session_id}_{_cache_key(text)[:32]}.mp3"
+
+
 def generate_and_store_user_speech(
     text: str,
     user_id: str,
@@ -72,26 +138,32 @@ def generate_and_store_user_speech(
     Generates Aurora reply audio, stores it inside Flask's real static folder,
     and returns a dedicated Aurora audio endpoint URL.
     """
+    tmp = None
     try:
-        audio_bytes = text_to_speech_bytes(text)
+        chunks = text_to_speech_stream(text)
 
         static_root = Path(current_app.static_folder)
         user_dir = static_root / "audio" / "aurora" / str(user_id)
         user_dir.mkdir(parents=True, exist_ok=True)
 
-        filename = f"{session_id}_{uuid.uuid4().hex}.mp3"
+        filename = audio_filename(text, session_id)
         filepath = user_dir / filename
 
-        with open(filepath, "wb") as f:
-            f.write(audio_bytes)
-
-        if not filepath.exists():
-            raise AuroraSpeechError(f"Audio file was not created: {filepath}")
+        # write chunks as they arrive (the clip is never fully in memory)
+        # into a temp sibling: the final name is served as immutable, so
+        # it only ever appears complete
+        tmp = filepath.with_name(f"{filename}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
 
-        file_size = filepath.stat().st_size
+        file_size = tmp.stat().st_size
         if file_size <= 0:
             raise AuroraSpeechError(f"Audio file is empty: {filepath}")
 
+        os.replace(tmp, filepath)
+        tmp = None
+
         public_url = f"{APP_BASE_URL}/api/user/aurora/audio/{user_id}/{filename}"
 
         print("\n===== AURORA AUDIO DEBUG =====")
@@ -107,9 +179,161 @@ def generate_and_store_user_speech(
         print("\n!!!! AURORA SPEECH ERROR !!!!")
         print(str(e))
         print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+        if tmp is not None:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
         return None
 
 
+# -------------------------------------------------------
+# PENDING AUDIO (text returns first, audio streams while it renders)
+# -------------------------------------------------------
+#
+# start_user_speech() picks the final filename, creates "<file>.part"
+# and renders into it on a worker thread. The audio URL is valid at
+# once: while the .part exists the serve route tails it; when rendering
+# finishes the .part is renamed to the final name and served as a file.
+
+_tts_executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="aurora-tts")
+
+_pending: Dict[str, threading.Condition] = {}
+_pending_lock = threading.Lock()
+
+
+def user_audio_dir(user_id) -> Path:
+    return Path(current_app.static_folder) / "audio" / "aurora" / str(user_id)
+
+
+def pending_path(filepath: Path) -> Path:
+    return filepath.with_name(filepath.name + PENDING_SUFFIX)
+
+
+def _render_pending(text: str, filepath: Path, part: Path, cond: threading.Condition):
+    try:
+        chunks = text_to_speech_stream(text)
+        with open(part, "ab") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                f.flush()
+                with cond:
+                    cond.notify_all()
+
+        if part.stat().st_size <= 0:
+            raise AuroraSpeechError(f"Audio file is empty: {part}")
+
+        os.replace(part, filepath)
+
+    except Exception as e:
+        print("\n!!!! AURORA SPEECH ERROR !!!!")
+        print(str(e))
+        print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+        try:
+            part.unlink()
+        except OSError:
+            pass
+
+    finally:
+        with _pending_lock:
+            _pending.pop(str(filepath), None)
+        with cond:
+            cond.notify_all()
+
+
+def start_user_speech(
+    text: str,
+    user_id: str,
+    session_id: str,
+) -> str | None:
+    """
+    Queue reply audio and return its URL immediately.
+    The URL streams while synthesis is in progress and serves the
+    finished file afterwards.
+    """
+    try:
+        user_dir = user_audio_dir(user_id)
+        user_dir.mkdir(parents=True, exist_ok=True)
+
+        filename = audio_filename(text, session_id)
+        filepath = user_dir / filename
+        part = pending_path(filepath)
+        public_url = f"{APP_BASE_URL}/api/user/aurora/audio/{user_id}/{filename}"
+
+        # same reply already rendered (or rendering) in this session
+        if filepath.exists():
+            os.utime(filepath, None)  # still in use: keep it out of GC
+            return public_url
+        if part.exists():
+            return public_url
+
+        # visible as "pending" to every worker before rendering starts
+        part.touch()
+
+        cond = threading.Condition()
+        with _pending_lock:
+            _pending[str(filepath)] = cond
+
+        _tts_executor.submit(_render_pending, text, filepath, part, cond)
+
+        return public_url
+
+    except Exception as e:
+        print("\n!!!! AURORA SPEECH ERROR !!!!")
+        print(str(e))
+        print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+        return None
+
+
+def stream_pending_audio(filepath: Path) -> Iterator[bytes] | None:
+    """
+    Tail a clip that is still rendering, or None if nothing is pending.
+    Ends when the clip is finished (renamed), failed (.part removed) or
+    has made no progress for PENDING_IDLE_TIMEOUT seconds.
+    """
+    part = pending_path(filepath)
+    try:
+        f = open(part, "rb")
+    except OSError:
+        return None
+
+    with _pending_lock:
+        cond = _pending.get(str(filepath))
+
+    def _gen():
+        idle_since = time.monotonic()
+        with f:
+            while True:
+                chunk = f.read(STREAM_CHUNK_BYTES)
+                if chunk:
+                    idle_since = time.monotonic()
+                    yield chunk
+                    continue
+
+                # Finished (renamed) or failed (removed) since the read
+                # above: the open handle still sees every byte written
+                # before that, including a last chunk appended between
+                # our empty read and the rename, so drain it to EOF.
+                if filepath.exists() or not part.exists():
+                    while True:
+                        chunk = f.read(STREAM_CHUNK_BYTES)
+                        if not chunk:
+                            return
+                        yield chunk
+
+                if time.monotonic() - idle_since > PENDING_IDLE_TIMEOUT:
+                    return
+
+                if cond is not None:
+                    with cond:
+                        cond.wait(0.05)
+                else:
+                    # rendering on another worker process
+                    time.sleep(0.05)
+
+    return _gen()
+
+
 """"""""""""""""""""""""""""""""""""""""
 # backend/aurora/speech_user.py
 from __future__ import annotations
@@ -2,22 +2,77 @@
 
 # backend/aurora/summarizer.py
 
+from __future__ import annotations
+
 import os
 import json
-from openai import OpenAI
 
 from aurora.models_messages import AuroraMessage
 from aurora.models_emotion import AuroraEmotion
+from aurora.emotion_series import session_pad_summary
+from services.llm_gateway import chat_completion
 
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 MODEL_NAME = os.getenv("AURORA_MODEL", "gpt-4o-mini")
 
 
-def summarize_session(user_id, session_id, messages=None):
+ROLLING_SUMMARY_MAX_TOKENS = int(os.getenv("AURORA_ROLLING_SUMMARY_MAX_TOKENS", "250"))
+
+
+def summarize_rolling(previous_summary: str, messages) -> str | None:
+    """
+    Fold a chunk of older turns into the running session summary.
+    Input is bounded by the caller (one chunk + previous summary).
+    Returns None on failure so the caller keeps the turns unsummarized.
+    """
+    transcript = "\n".join(f"{m.role}: {m.content}" for m in messages)
+    if not transcript:
+        return previous_summary or ""
+
+    system_prompt = (
+        "You maintain a running summary of a conversation between a user and Aurora, "
+        "an emotionally intelligent companion. Merge the new turns into the existing summary. "
+        "Keep facts the user shared, their feelings, open threads and anything Aurora promised. "
+        "Write compact plain prose in third person. No markdown. "
+        f"Stay under {ROLLING_SUMMARY_MAX_TOKENS} tokens."
+    )
+
+    user_prompt = f"""
+Existing summary:
+{previous_summary or "(none yet)"}
+
+New turns:
+{transcript}
+
+Return the updated summary only.
+"""
+
+    try:
+        response = chat_completion(
+            "rolling_summary",
+            model=MODEL_NAME,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=0.2,
+            max_tokens=ROLLING_SUMMARY_MAX_TOKENS,
+        )
+        return (response.choices[0].message.content or "").strip() or None
+
+    except Exception as e:
+        print("\n!!!! ROLLING SUMMARY ERROR !!!!")
+        print(str(e))
+        print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+        return None
+
+
+def summarize_session(user_id, session_id, messages=None, prior_summary: str | None = None):
     """
     Generates structured session summary using OpenAI.
     Returns a Python dict.
+    `prior_summary` is the rolling summary of turns not included in
+    `messages`, so long sessions stay within a bounded prompt.
     """
 
     # --------------------------------------------------
@@ -32,18 +87,16 @@ def summarize_session(user_id, session_id, messages=None):
             .all()
         )
 
-    if not messages:
+    if not messages and not prior_summary:
         return {}
 
     # --------------------------------------------------
-    # 2️⃣ Fetch Emotion Records
+    # 2️⃣ Emotion Aggregates (O(1) from the session's PAD series;
+    #    sessions recorded before the series existed scan rows)
     # --------------------------------------------------
 
-    emotions = (
-        AuroraEmotion.query
-        .filter_by(user_id=user_id, session_id=session_id)
-        .all()
-    )
+    text_pad = session_pad_summary(user_id, session_id, "text")
+    face_pad = session_pad_summary(user_id, session_id, "face")
 
     # --------------------------------------------------
     # 3️⃣ Build Conversation Text
@@ -54,11 +107,25 @@ def summarize_session(user_id, session_id, messages=None):
     )
 
     avg_valence = None
-    if emotions:
+    if text_pad and text_pad["valence"]:
+        avg_valence = text_pad["valence"]["mean"]
+    else:
+        emotions = (
+            AuroraEmotion.query
+            .filter_by(user_id=user_id, session_id=session_id)
+            .all()
+        )
         valid_vals = [e.valence for e in emotions if e.valence is not None]
         if valid_vals:
             avg_valence = sum(valid_vals) / len(valid_vals)
 
+    face_line = ""
+    if face_pad and face_pad["valence"]:
+        face_line = (
+            f"Facial Valence (min/mean/max): {face_pad['valence']['min']} / "
+            f"{face_pad['valence']['mean']} / {face_pad['valence']['max']}\n"
+        )
+
     # --------------------------------------------------
     # 4️⃣ Structured System Prompt
     # --------------------------------------------------
@@ -75,12 +142,14 @@ def summarize_session(user_id, session_id, messages=None):
         "No commentary. No markdown. JSON only."
     )
 
+    earlier = f"Earlier in the session (summary):\n{prior_summary}\n\n" if prior_summary else ""
+
     user_prompt = f"""
-Conversation:
+{earlier}Conversation:
 {conversation_text}
 
 Average Valence: {avg_valence}
-
+{face_line}
 Generate structured session summary.
 """
 
@@ -89,7 +158,8 @@ Generate structured session summary.
     # --------------------------------------------------
 
     try:
-        response = client.chat.completions.create(
+        response = chat_completion(
+            "session_summary",
             model=MODEL_NAME,
             messages=[
                 {"role": "system", "content": system_prompt},
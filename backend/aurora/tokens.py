@@ -0,0 +1,48 @@
+# backend/aurora/tokens.py
+
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+
+# tiktoken is optional; fall back to a chars/4 estimate (close enough
+# for budgeting English prompts) when it isn't installed.
+try:
+    import tiktoken
+except Exception:
+    tiktoken = None
+
+
+TOKENIZER_MODEL = os.getenv("AURORA_MODEL", "gpt-4o-mini")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(TOKENIZER_MODEL)
+    except Exception:
+        try:
+            return tiktoken.get_encoding("o200k_base")
+        except Exception:
+            return None
+
+
+def estimate_tokens(text: str | None) -> int:
+    """
+    Local token count for prompt budgeting. Never calls the network.
+    """
+    if not text:
+        return 0
+
+    enc = _encoding()
+    if enc is not None:
+        return len(enc.encode(text))
+
+    return max(1, (len(text) + 3) // 4)
+
+
+def estimate_message_tokens(message: dict) -> int:
+    # ~4 tokens of per-message overhead in the chat format
+    return 4 + estimate_tokens(message.get("content") or "")
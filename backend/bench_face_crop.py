@@ -0,0 +1,108 @@
+# backend/bench_face_crop.py
+#
+# Micro-benchmark: vision emotion face crop, old path vs current path.
+#
+#   python bench_face_crop.py                     # synthetic 1280x720 frame
+#   python bench_face_crop.py path/to/frame.jpg -n 200
+#
+# Reports per-frame wall time (median / p95), tracemalloc peak per
+# frame (NumPy buffers are traced) and the size of what would be sent
+# to the vision model. Use a real webcam frame with a face in it to
+# measure the crop path; the synthetic frame exercises the no-face path.
+
+import argparse
+import io
+import statistics
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from services.vision_emotion import FACE_CASCADE, _extract_face
+
+
+def legacy_extract_face(image_bytes: bytes) -> bytes:
+    """_extract_face as it was: PIL decode, full-size gray, PIL re-encode."""
+    img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    img_np = np.array(img)
+    gray = cv2.cvtColor(img_np, cv2.COLOR_RGB2GRAY)
+
+    faces = FACE_CASCADE.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(80, 80))
+    if len(faces) == 0:
+        return image_bytes
+
+    x, y, w, h = faces[0]
+    face_img = Image.fromarray(img_np[y : y + h, x : x + w])
+    buf = io.BytesIO()
+    face_img.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def synthetic_frame(width: int = 1280, height: int = 720) -> bytes:
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    frame = cv2.GaussianBlur(frame, (0, 0), 3)
+    ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return buf.tobytes()
+
+
+def bench(fn, image_bytes: bytes, n: int):
+    fn(image_bytes)  # warm
+
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn(image_bytes)
+        times.append((time.perf_counter() - t0) * 1000)
+
+    tracemalloc.start()
+    out = fn(image_bytes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if isinstance(out, tuple):
+        out = out[0]
+
+    times.sort()
+    return {
+        "median_ms": statistics.median(times),
+        "p95_ms": times[int(0.95 * (len(times) - 1))],
+        "peak_kb": peak / 1024,
+        "out_kb": len(out) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Face crop micro-benchmark")
+    parser.add_argument("image", nargs="?", help="JPEG/PNG frame (default: synthetic 1280x720)")
+    parser.add_argument("-n", type=int, default=100, help="iterations per path")
+    args = parser.parse_args()
+
+    if args.image:
+        with open(args.image, "rb") as f:
+            image_bytes = f.read()
+    else:
+        image_bytes = synthetic_frame()
+
+    print(f"📷 input: {len(image_bytes) / 1024:.1f} KB, {args.n} iterations\n")
+
+    results = {
+        "legacy": bench(legacy_extract_face, image_bytes, args.n),
+        "current": bench(_extract_face, image_bytes, args.n),
+    }
+
+    print(f"{'path':<10}{'median ms':>12}{'p95 ms':>10}{'peak KB':>12}{'sent KB':>10}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['median_ms']:>12.2f}{r['p95_ms']:>10.2f}{r['peak_kb']:>12.0f}{r['out_kb']:>10.1f}")
+
+    old, new = results["legacy"], results["current"]
+    print(
+        f"\n✅ {old['median_ms'] / max(new['median_ms'], 1e-6):.1f}x faster, "
+        f"{old['peak_kb'] / max(new['peak_kb'], 1e-6):.1f}x less peak allocation"
+    )
+
+
+if __name__ == "__main__":
+    main()
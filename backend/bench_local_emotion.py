@@ -0,0 +1,51 @@
+# backend/bench_local_emotion.py
+#
+# Per-frame latency of the local (CPU) emotion backend.
+#
+#   python bench_local_emotion.py path/to/frame.jpg -n 200
+#   AURORA_LOCAL_EMOTION_DET_SIZE=256 python bench_local_emotion.py frame.jpg
+#
+# Decodes the frame once, then times analyze_image() and reports
+# median / p95 of the detector, the landmark model and the whole call
+# (from the det_ms / landmark_ms / ms fields the backend records). Use a
+# webcam-sized frame with one face in it.
+
+import argparse
+import statistics
+
+import cv2
+
+from services.local_emotion import DET_SIZE, analyze_image, warm_up
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[int(p * (len(values) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local emotion backend latency")
+    parser.add_argument("image", help="JPEG/PNG frame with a face")
+    parser.add_argument("-n", type=int, default=100, help="iterations")
+    args = parser.parse_args()
+
+    img = cv2.imread(args.image, cv2.IMREAD_COLOR)
+    if img is None:
+        raise SystemExit(f"Could not read {args.image}")
+
+    warm_up()
+    analyze_image(img)  # first call pays ONNX Runtime session setup
+
+    runs = [analyze_image(img)["raw"] for _ in range(args.n)]
+    if "landmark_ms" not in runs[0]:
+        raise SystemExit("No face found in the frame; nothing to time past detection.")
+
+    print(f"📷 {img.shape[1]}x{img.shape[0]}, det_size {DET_SIZE}, {args.n} iterations\n")
+    print(f"{'stage':<12}{'median ms':>12}{'p95 ms':>10}")
+    for key, label in (("det_ms", "detector"), ("landmark_ms", "landmarks"), ("ms", "total")):
+        values = [r[key] for r in runs]
+        print(f"{label:<12}{statistics.median(values):>12.2f}{pct(values, 0.95):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,15 @@ limiter = Limiter(
     default_limits=["200 per day", "50 per hour"]
 )
 
+# ----------------------------------------------------
+# WebSockets (optional: /api/aurora/voice)
+# ----------------------------------------------------
+try:
+    from flask_sock import Sock
+    sock = Sock()
+except ImportError:
+    sock = None
+
 
 """""""""
 from flask_sqlalchemy import SQLAlchemy
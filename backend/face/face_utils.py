@@ -2,9 +2,10 @@
 import os
 import numpy as np
 import cv2
-import requests
 from insightface.app import FaceAnalysis
 
+from services.http_client import http_get
+
 # ---------------- Paths ----------------
 _BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 _MODELS_DIR = os.path.join(_BACKEND_DIR, "models")
@@ -55,7 +56,7 @@ def get_embedding_from_bytes(image_bytes: bytes):
 
 def get_embedding_from_gcs(bucket: str, object_path: str):
     url = f"https://storage.googleapis.com/{bucket}/{object_path}"
-    resp = requests.get(url, timeout=10)
+    resp = http_get("gcs", url)
     if resp.status_code != 200:
         return None
     return get_embedding_from_bytes(resp.content)
@@ -0,0 +1,15 @@
+# backend/gunicorn.conf.py
+#
+# Picked up automatically when gunicorn starts from backend/:
+#   gunicorn "app:create_app()"
+#
+# Model warm-up belongs to serving processes only, so it runs per
+# worker here rather than in create_app() (which every `flask` CLI
+# command also calls).
+
+
+def post_fork(server, worker):
+    from aurora.emotion import TEXT_EMOTION_WARMUP, text_emotion
+
+    if TEXT_EMOTION_WARMUP:
+        text_emotion.warm_up_async()
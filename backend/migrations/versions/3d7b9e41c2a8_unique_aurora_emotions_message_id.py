@@ -0,0 +1,35 @@
+"""unique aurora_emotions.message_id
+
+Revision ID: 3d7b9e41c2a8
+Revises: 8c4e2b7a1f93
+Create Date: 2026-10-19 18:12:44.502913
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3d7b9e41c2a8'
+down_revision = '8c4e2b7a1f93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # keep the oldest row per message; the backfill and the tagging worker
+    # could both have tagged the same message
+    op.execute("""
+        DELETE FROM aurora_emotions e
+        USING aurora_emotions d
+        WHERE e.message_id = d.message_id
+          AND (e.created_at, e.id) > (d.created_at, d.id)
+    """)
+    with op.batch_alter_table('aurora_emotions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_aurora_emotions_message_id'))
+        batch_op.create_index(batch_op.f('ix_aurora_emotions_message_id'), ['message_id'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('aurora_emotions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_aurora_emotions_message_id'))
+        batch_op.create_index(batch_op.f('ix_aurora_emotions_message_id'), ['message_id'], unique=False)
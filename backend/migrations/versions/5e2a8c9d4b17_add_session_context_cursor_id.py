@@ -0,0 +1,26 @@
+"""add aurora_session_context.summarized_through_id
+
+Revision ID: 5e2a8c9d4b17
+Revises: 3d7b9e41c2a8
+Create Date: 2026-10-19 20:05:31.774102
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2a8c9d4b17'
+down_revision = '3d7b9e41c2a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('aurora_session_context', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('summarized_through_id', sa.UUID(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('aurora_session_context', schema=None) as batch_op:
+        batch_op.drop_column('summarized_through_id')
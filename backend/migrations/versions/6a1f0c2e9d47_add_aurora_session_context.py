@@ -0,0 +1,42 @@
+"""add aurora_session_context
+
+Revision ID: 6a1f0c2e9d47
+Revises: bec9035e45dc
+Create Date: 2026-10-19 11:02:17.440912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a1f0c2e9d47'
+down_revision = 'bec9035e45dc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('aurora_session_context',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('session_id', sa.UUID(), nullable=False),
+    sa.Column('rolling_summary', sa.Text(), nullable=False),
+    sa.Column('summary_tokens', sa.Integer(), nullable=False),
+    sa.Column('summarized_through', sa.DateTime(), nullable=True),
+    sa.Column('summarized_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('aurora_session_context', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_aurora_session_context_session_id'), ['session_id'], unique=True)
+        batch_op.create_index(batch_op.f('ix_aurora_session_context_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('aurora_session_context', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_aurora_session_context_user_id'))
+        batch_op.drop_index(batch_op.f('ix_aurora_session_context_session_id'))
+
+    op.drop_table('aurora_session_context')
@@ -0,0 +1,54 @@
+"""add aurora_emotion_series
+
+Revision ID: 8c4e2b7a1f93
+Revises: 6a1f0c2e9d47
+Create Date: 2026-10-19 16:40:05.118274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e2b7a1f93'
+down_revision = '6a1f0c2e9d47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('aurora_emotion_series',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('session_id', sa.UUID(), nullable=False),
+    sa.Column('source', sa.String(length=16), nullable=False),
+    sa.Column('sample_count', sa.Integer(), nullable=False),
+    sa.Column('first_at', sa.DateTime(), nullable=True),
+    sa.Column('last_at', sa.DateTime(), nullable=True),
+    sa.Column('valence_sum', sa.Float(), nullable=True),
+    sa.Column('valence_min', sa.Float(), nullable=True),
+    sa.Column('valence_max', sa.Float(), nullable=True),
+    sa.Column('arousal_sum', sa.Float(), nullable=True),
+    sa.Column('arousal_min', sa.Float(), nullable=True),
+    sa.Column('arousal_max', sa.Float(), nullable=True),
+    sa.Column('dominance_sum', sa.Float(), nullable=True),
+    sa.Column('dominance_min', sa.Float(), nullable=True),
+    sa.Column('dominance_max', sa.Float(), nullable=True),
+    sa.Column('raw_blob', sa.LargeBinary(), nullable=True),
+    sa.Column('rollup_blob', sa.LargeBinary(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('session_id', 'source', name='uq_aurora_emotion_series_session_source')
+    )
+    with op.batch_alter_table('aurora_emotion_series', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_aurora_emotion_series_session_id'), ['session_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_aurora_emotion_series_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('aurora_emotion_series', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_aurora_emotion_series_user_id'))
+        batch_op.drop_index(batch_op.f('ix_aurora_emotion_series_session_id'))
+
+    op.drop_table('aurora_emotion_series')
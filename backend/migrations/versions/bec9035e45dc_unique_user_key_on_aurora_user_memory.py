@@ -0,0 +1,38 @@
+"""unique (user_id, key) on aurora_user_memory
+
+Revision ID: bec9035e45dc
+Revises: ce347fdbcad8
+Create Date: 2026-10-19 10:14:52.118304
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'bec9035e45dc'
+down_revision = 'ce347fdbcad8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Collapse any duplicate (user_id, key) rows left by the old
+    # SELECT-then-INSERT upsert, keeping the most recently updated one.
+    op.execute(
+        """
+        DELETE FROM aurora_user_memory a
+        USING aurora_user_memory b
+        WHERE a.user_id = b.user_id
+          AND a.key = b.key
+          AND (a.updated_at < b.updated_at
+               OR (a.updated_at = b.updated_at AND a.id < b.id))
+        """
+    )
+
+    with op.batch_alter_table('aurora_user_memory', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_aurora_user_memory_user_key', ['user_id', 'key'])
+
+
+def downgrade():
+    with op.batch_alter_table('aurora_user_memory', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_aurora_user_memory_user_key', type_='unique')
@@ -1,30 +1,43 @@
 # backend/routes/aurora_routes.py
 # backend/routes/aurora_routes.py
 
-import io
-import time
-import os
-from flask import Blueprint, request, send_file, jsonify, make_response
-from openai import OpenAI
+from flask import Blueprint, Response, request, send_file, jsonify, make_response
 
 from services.aurora_whisper import (
     speech_to_text,
     aurora_whisper_reply,
     extract_explicit_name,
+    load_context,
     lock_name,
+    save_context,
 )
 
-from services.aurora_speech import text_to_speech
+from services.aurora_speech import text_to_speech_stream
+from services.tts_cache import tts_cache
+from services.http_client import provider_stats
+from services.llm_gateway import chat_completion, llm_stats
+from services.aurora_assets import (
+    GREETINGS,
+    RETRY_PROMPT,
+    TTS_ERROR,
+    TTS_FALLBACK,
+    asset_for_text,
+    phrase_asset,
+    pick_intro,
+)
+from admin.decorators import admin_token_required
 from services.datetime_context import get_time_context
+from services.session_store import clean_session_id, new_session_id, session_store_stats
+from aurora.emotion import text_emotion
+from aurora.emotion_tagging import emotion_tagging_stats
+from aurora.emotion_series import emotion_series_stats
 
 
-# ------------------------------------------------------
-# OpenAI Client
-# ------------------------------------------------------
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
 aurora_bp = Blueprint("aurora", __name__, url_prefix="/api/aurora")
 
+# conversation id for /converse: header, or "session_id" form field
+SESSION_HEADER = "X-Aurora-Session"
+
 
 # ======================================================
 # CORS HELPERS (force headers even on send_file responses)
@@ -32,7 +45,8 @@ aurora_bp = Blueprint("aurora", __name__, url_prefix="/api/aurora")
 
 def corsify(resp):
     resp.headers["Access-Control-Allow-Origin"] = "*"
-    resp.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+    resp.headers["Access-Control-Allow-Headers"] = f"Content-Type, Authorization, {SESSION_HEADER}"
+    resp.headers["Access-Control-Expose-Headers"] = SESSION_HEADER
     resp.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
     resp.headers["Access-Control-Max-Age"] = "86400"
     return resp
@@ -43,42 +57,61 @@ def preflight_ok():
     return corsify(make_response(("", 204)))
 
 
+def with_session(result, session_id: str):
+    # result may be a response or a (response, status) tuple
+    resp = result[0] if isinstance(result, tuple) else result
+    resp.headers[SESSION_HEADER] = session_id
+    return result
+
+
 # ======================================================
 # SAFE TTS WRAPPER
 # ======================================================
 
+def send_audio_asset(path: str, filename: str):
+    resp = send_file(
+        path,
+        mimetype="audio/mpeg",
+        as_attachment=False,
+        download_name=filename,
+    )
+    return corsify(resp)
+
+
+def stream_audio(chunks, filename: str):
+    # bytes go to the client as ElevenLabs produces them
+    resp = Response(chunks, mimetype="audio/mpeg", direct_passthrough=True)
+    resp.headers["Content-Disposition"] = f'inline; filename="{filename}"'
+    resp.headers["Cache-Control"] = "no-store"
+    return corsify(resp)
+
+
 def safe_tts(text: str, filename: str = "aurora.mp3"):
-    MAX_RETRIES = 3
+    # fixed phrases are prebuilt: serve from disk, no provider call
+    asset = asset_for_text(text)
+    if asset:
+        try:
+            return send_audio_asset(asset, filename)
+        except OSError:
+            pass
 
-    for attempt in range(MAX_RETRIES):
+    # retries/backoff for 429s and 5xx live in the shared http client
+    # (services/http_client.py); a failure here is final
+    try:
+        return stream_audio(text_to_speech_stream(text), filename)
+    except Exception as e:
+        print("SAFE_TTS ERROR:", repr(e))
+
+    # fallback speech (prebuilt, so it doesn't fail the same way TTS just did)
+    asset = phrase_asset("tts_fallback")
+    if asset:
         try:
-            audio_bytes = text_to_speech(text)
-            resp = send_file(
-                io.BytesIO(audio_bytes),
-                mimetype="audio/mpeg",
-                as_attachment=False,
-                download_name=filename,
-            )
-            return corsify(resp)
-        except Exception as e:
-            err = str(e).lower()
-            if "429" in err or "rate" in err or "limit" in err:
-                time.sleep(0.4 * (attempt + 1))
-                continue
-            break
+            return send_audio_asset(asset, filename)
+        except OSError:
+            pass
 
-    # fallback speech
     try:
-        fallback = text_to_speech(
-            "I'm having a little trouble speaking right now, but I'm here."
-        )
-        resp = send_file(
-            io.BytesIO(fallback),
-            mimetype="audio/mpeg",
-            as_attachment=False,
-            download_name=filename,
-        )
-        return corsify(resp)
+        return stream_audio(text_to_speech_stream(TTS_FALLBACK), filename)
     except Exception as e:
         print("SAFE_TTS FATAL ERROR:", repr(e))
         return corsify(jsonify({"error": "TTS failed"})), 500
@@ -98,7 +131,8 @@ def generate_intro_script(variation: str = "neutral") -> str:
     user_prompt = f"Create a {variation} introduction for first-time guests."
 
     try:
-        response = client.chat.completions.create(
+        response = chat_completion(
+            "aurora_intro",
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -131,6 +165,44 @@ def aurora_ping():
     return corsify(jsonify({"ok": True, "service": "aurora"})), 200
 
 
+# Operational stats (provider errors, volumes, queues): admin token required.
+
+@aurora_bp.get("/tts/stats")
+@admin_token_required
+def aurora_tts_stats(current_admin):
+    return jsonify(tts_cache.stats()), 200
+
+
+@aurora_bp.get("/providers/stats")
+@admin_token_required
+def aurora_provider_stats(current_admin):
+    return jsonify(provider_stats()), 200
+
+
+@aurora_bp.get("/llm/stats")
+@admin_token_required
+def aurora_llm_stats(current_admin):
+    return jsonify(llm_stats()), 200
+
+
+@aurora_bp.get("/sessions/stats")
+@admin_token_required
+def aurora_session_stats(current_admin):
+    return jsonify(session_store_stats()), 200
+
+
+@aurora_bp.get("/emotion-tagging/stats")
+@admin_token_required
+def aurora_emotion_tagging_stats(current_admin):
+    return jsonify({"tagger": emotion_tagging_stats(), "model": text_emotion.stats()}), 200
+
+
+@aurora_bp.get("/emotion-series/stats")
+@admin_token_required
+def aurora_emotion_series_stats(current_admin):
+    return jsonify(emotion_series_stats()), 200
+
+
 # ======================================================
 # /greet
 # ======================================================
@@ -142,31 +214,7 @@ def aurora_greet():
 
     ctx = get_time_context()
     tod = ctx.get("time_of_day", "night")
-
-    if tod == "morning":
-        text = (
-            "Good morning. I’m Aurora. "
-            "This is a space where you can talk things through… "
-            "What feels like a good beginning today?"
-        )
-    elif tod == "afternoon":
-        text = (
-            "Good afternoon. I’m Aurora. "
-            "If your day feels busy, we can slow it down for a moment… "
-            "What would help right now?"
-        )
-    elif tod == "evening":
-        text = (
-            "Good evening. I’m Aurora. "
-            "This is a place to unwind… "
-            "How are you feeling tonight?"
-        )
-    else:
-        text = (
-            "Hi. I’m Aurora. "
-            "It’s okay to slow down here… "
-            "I’m here with you."
-        )
+    text = GREETINGS.get(tod, GREETINGS["night"])
 
     return safe_tts(text, filename="aurora_greet.mp3")
 
@@ -184,16 +232,17 @@ def aurora_intro():
         data = request.get_json(silent=True) or {}
         variation = (data.get("variation") or "neutral").strip()
 
-        intro_text = generate_intro_script(variation)
-        audio_bytes = text_to_speech(intro_text)
+        # pooled, pre-rendered intro when one exists for this variation
+        # (pools are filled/rotated by `flask aurora refresh-intros`)
+        intro_path = pick_intro(variation)
+        if intro_path:
+            try:
+                return send_audio_asset(intro_path, "aurora_intro.mp3")
+            except OSError:
+                pass  # rotated out between pick and send
 
-        resp = send_file(
-            io.BytesIO(audio_bytes),
-            mimetype="audio/mpeg",
-            as_attachment=False,
-            download_name="aurora_intro.mp3",
-        )
-        return corsify(resp)
+        intro_text = generate_intro_script(variation)
+        return stream_audio(text_to_speech_stream(intro_text), "aurora_intro.mp3")
 
     except Exception as e:
         print("INTRO ROUTE ERROR:", repr(e))
@@ -218,6 +267,15 @@ def aurora_converse():
     if not audio_bytes:
         return corsify(jsonify({"error": "empty audio"})), 400
 
+    # ---------------- SESSION ----------------
+    # clients without an id get a fresh one back in the response header
+    session_id = (
+        clean_session_id(request.headers.get(SESSION_HEADER))
+        or clean_session_id(request.form.get("session_id"))
+        or new_session_id()
+    )
+    ctx = load_context(session_id)
+
     # ---------------- STT ----------------
     try:
         user_text = speech_to_text(audio_bytes)
@@ -226,18 +284,19 @@ def aurora_converse():
         user_text = None
 
     if not user_text:
-        return safe_tts("Go ahead — I’m listening.", filename="aurora_retry.mp3")
+        return with_session(safe_tts(RETRY_PROMPT, filename="aurora_retry.mp3"), session_id)
 
     print("AURORA USER TEXT >>>", user_text)
 
     # ---------------- FAST NAME INTRO ----------------
     explicit_name = extract_explicit_name(user_text)
     if explicit_name:
-        lock_name(explicit_name)
-        return safe_tts(
+        lock_name(explicit_name, ctx)
+        save_context(session_id, ctx)
+        return with_session(safe_tts(
             f"It’s nice to meet you, {explicit_name.capitalize()}.",
             filename="aurora_name_intro.mp3",
-        )
+        ), session_id)
 
     # ---------------- EMOTION CONTEXT ----------------
     def to_float(v, default=0.5):
@@ -259,28 +318,24 @@ def aurora_converse():
             valence=face_valence,
             arousal=face_arousal,
             dominance=face_dominance,
+            ctx=ctx,
         )
     except Exception as e:
         print("GPT ERROR:", repr(e))
         reply_text = "I’m here with you."
 
+    save_context(session_id, ctx)
+
     # ---------------- TTS ----------------
     try:
-        audio_out = text_to_speech(reply_text)
-        resp = send_file(
-            io.BytesIO(audio_out),
-            mimetype="audio/mpeg",
-            as_attachment=False,
-            download_name="aurora_reply.mp3",
+        return with_session(
+            stream_audio(text_to_speech_stream(reply_text), "aurora_reply.mp3"),
+            session_id,
         )
-        return corsify(resp)
 
     except Exception as e:
         print("TTS ERROR:", repr(e))
-        return safe_tts(
-            "I'm having a small technical issue, but I'm still here with you.",
-            filename="aurora_error.mp3",
-        )
+        return with_session(safe_tts(TTS_ERROR, filename="aurora_error.mp3"), session_id)
 
 """"""""""
 # backend/routes/aurora_routes.py
@@ -0,0 +1,93 @@
+# backend/routes/aurora_voice_ws.py
+#
+# Full-duplex voice: WS /api/aurora/voice
+#
+# Client -> server
+#   text   {"type": "start", "face_emotion": ..., "valence": ..., ...}
+#   binary PCM16 little-endian, 16 kHz mono, any frame size (20-60 ms is typical)
+#   text   {"type": "emotion", ...}        updated face/PAD signal
+#   text   {"type": "end_of_speech"}       optional, push-to-talk
+#   text   {"type": "barge_in"}            stop Aurora's current reply
+#   text   {"type": "reset"} / {"type": "ping"} / {"type": "stop"}
+#
+# Server -> client
+#   {"type": "ready"}, {"type": "transcript"}, {"type": "reply_text"},
+#   {"type": "audio_start"}, binary MP3 chunks, {"type": "audio_end"} or
+#   {"type": "audio_cancelled"}, {"type": "error"}
+#
+# Limits: VOICE_MAX_SESSION_S per connection and MAX_TURNS_PER_MIN
+# (services/voice_session.py) per connection; going over either sends
+# an {"type": "error"} and closes the socket with 1008.
+#
+# Needs flask-sock; without it the route is simply not registered and
+# the HTTP /api/aurora/converse flow keeps working.
+
+import json
+import os
+import time
+
+from extensions import sock
+from services.voice_session import VoiceSession
+
+VOICE_IDLE_TIMEOUT = float(os.getenv("AURORA_VOICE_IDLE_TIMEOUT", "120"))
+VOICE_MAX_SESSION_S = float(os.getenv("AURORA_VOICE_MAX_SESSION_S", "1800"))
+
+POLICY_VIOLATION = 1008
+
+
+def _serve(ws):
+    session = VoiceSession(
+        send_json=lambda msg: ws.send(json.dumps(msg)),
+        send_bytes=ws.send,
+    )
+    deadline = time.monotonic() + VOICE_MAX_SESSION_S
+    limit = None
+
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                limit = "session too long"
+                session.send({"type": "error", "error": "session length limit reached"})
+                break
+
+            msg = ws.receive(timeout=min(VOICE_IDLE_TIMEOUT, remaining))
+            if msg is None:
+                if time.monotonic() >= deadline:
+                    continue  # reported at the top of the loop
+                break  # idle
+
+            if isinstance(msg, (bytes, bytearray)):
+                session.feed_audio(bytes(msg))
+            else:
+                try:
+                    control = json.loads(msg)
+                except ValueError:
+                    session.send({"type": "error", "error": "invalid JSON"})
+                    continue
+
+                if control.get("type") == "stop":
+                    break
+                session.handle_control(control)
+
+            if session.limit_exceeded:
+                limit = session.limit_exceeded
+                break
+
+    except Exception as e:
+        # ConnectionClosed lands here too
+        if e.__class__.__name__ != "ConnectionClosed":
+            print("\n!!!! VOICE WS ERROR !!!!")
+            print(repr(e))
+            print("!!!!!!!!!!!!!!!!!!!!!!!!\n")
+    finally:
+        session.close()
+        if limit:
+            try:
+                ws.close(reason=POLICY_VIOLATION, message=limit)
+            except Exception:
+                pass
+
+
+if sock is not None:
+    sock.route("/api/aurora/voice")(_serve)
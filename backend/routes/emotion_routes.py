@@ -4,7 +4,8 @@
 
 
 from flask import Blueprint, request, jsonify
-from services.hf_emotion import analyze_emotion, EmotionServiceError
+from services.emotion_backends import analyze_emotion, EmotionServiceError
+from services.session_store import clean_session_id
 
 emotion_bp = Blueprint("emotion", __name__, url_prefix="/api/emotion")
 
@@ -19,7 +20,8 @@ def allowed_file(filename: str) -> bool:
 def analyze():
     """
     Accepts multipart/form-data with field "image"
-    Calls HF GPU emotion service (hf_emotion.analyze_emotion)
+    Optional form field "session_id" enables per-session caching
+    Calls the configured emotion backend (AURORA_EMOTION_BACKEND)
     """
     if "image" not in request.files:
         return jsonify({"error": "image file required"}), 400
@@ -38,12 +40,15 @@ def analyze():
         if not image_bytes:
             return jsonify({"error": "empty image data"}), 400
 
-        result = analyze_emotion(image_bytes)
+        result = analyze_emotion(
+            image_bytes,
+            session_key=clean_session_id(request.form.get("session_id")),
+        )
         # result already has emotion, confidence, valence, arousal, dominance
         return jsonify(result), 200
 
     except EmotionServiceError as e:
-        print("HF EmotionServiceError:", repr(e))
+        print("EmotionServiceError:", repr(e))
         return jsonify({"error": str(e)}), 502
 
     except Exception as e:
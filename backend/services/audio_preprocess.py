@@ -0,0 +1,262 @@
+# backend/services/audio_preprocess.py
+#
+# Local audio preparation before speech-to-text.
+#
+#   browser webm/ogg/mp4 -> 16 kHz mono PCM (ffmpeg)
+#                        -> voice-activity trim (webrtcvad if installed,
+#                           energy gate otherwise)
+#                        -> Opus in Ogg, ~24 kbps (ffmpeg)
+#
+# Silence-only clips are rejected here, without any API call. When the
+# ffmpeg binary is not available the original bytes pass through
+# unchanged and only the old size gate applies.
+
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import webrtcvad  # optional, better than the energy gate on noisy input
+except Exception:
+    webrtcvad = None
+
+
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+FFMPEG_TIMEOUT = float(os.getenv("AURORA_FFMPEG_TIMEOUT", "20"))
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+
+VAD_AGGRESSIVENESS = int(os.getenv("AURORA_VAD_AGGRESSIVENESS", "2"))  # webrtcvad 0..3
+ENERGY_FLOOR_DBFS = -50.0     # frames quieter than this are never speech
+ENERGY_MARGIN_DB = 12.0       # speech = this far above the clip's noise floor
+MIN_SPEECH_MS = 250           # less voiced audio than this counts as silence
+PAD_MS = 200                  # kept around the voiced region
+OPUS_BITRATE = os.getenv("AURORA_STT_OPUS_BITRATE", "24k")
+
+LEGACY_MIN_BYTES = 5000       # pass-through mode only
+
+
+@dataclass
+class PreparedAudio:
+    data: bytes                    # what to upload
+    filename: str                  # extension tells the API the codec
+    silent: bool = False
+    duration_s: float = 0.0        # decoded length before trimming
+    speech_s: float = 0.0          # voiced audio kept
+    original_bytes: int = 0
+    pcm: Optional[np.ndarray] = None   # trimmed 16 kHz mono int16, if decoded
+
+    def to_dict(self):
+        return {
+            "silent": self.silent,
+            "duration_s": round(self.duration_s, 2),
+            "speech_s": round(self.speech_s, 2),
+            "original_bytes": self.original_bytes,
+            "upload_bytes": len(self.data),
+            "filename": self.filename,
+        }
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which(FFMPEG_BIN) is not None
+
+
+def _ffmpeg(args: List[str], data: bytes) -> bytes:
+    proc = subprocess.run(
+        [FFMPEG_BIN, "-hide_banner", "-loglevel", "error", *args],
+        input=data,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        timeout=FFMPEG_TIMEOUT,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.decode("utf-8", "ignore").strip() or "ffmpeg failed")
+    return proc.stdout
+
+
+# -------------------------------------------------------
+# DECODE / ENCODE
+# -------------------------------------------------------
+
+def decode_pcm16(audio_bytes: bytes) -> np.ndarray:
+    """Any container/codec ffmpeg understands -> 16 kHz mono int16."""
+    raw = _ffmpeg(
+        ["-i", "pipe:0", "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "pipe:1"],
+        audio_bytes,
+    )
+    return np.frombuffer(raw, dtype=np.int16)
+
+
+def encode_opus(pcm: np.ndarray) -> bytes:
+    return _ffmpeg(
+        [
+            "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1", "-i", "pipe:0",
+            "-c:a", "libopus", "-b:a", OPUS_BITRATE, "-application", "voip",
+            "-f", "ogg", "pipe:1",
+        ],
+        pcm.astype(np.int16).tobytes(),
+    )
+
+
+# -------------------------------------------------------
+# VOICE ACTIVITY
+# -------------------------------------------------------
+
+def _frames(pcm: np.ndarray) -> np.ndarray:
+    n = len(pcm) // FRAME_SAMPLES
+    return pcm[: n * FRAME_SAMPLES].reshape(n, FRAME_SAMPLES)
+
+
+def voiced_frames(pcm: np.ndarray) -> np.ndarray:
+    """Boolean mask, one entry per FRAME_MS frame."""
+    frames = _frames(pcm)
+    if len(frames) == 0:
+        return np.zeros(0, dtype=bool)
+
+    if webrtcvad is not None:
+        vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+        return np.array(
+            [vad.is_speech(f.tobytes(), SAMPLE_RATE) for f in frames],
+            dtype=bool,
+        )
+
+    rms = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1)) + 1e-9
+    dbfs = 20.0 * np.log10(rms / 32768.0)
+    noise_floor = float(np.percentile(dbfs, 10))
+    threshold = max(ENERGY_FLOOR_DBFS, noise_floor + ENERGY_MARGIN_DB)
+    return dbfs > threshold
+
+
+def voiced_regions(mask: np.ndarray, *, min_gap_frames: int = 10) -> List[Tuple[int, int]]:
+    """
+    [start, end) frame ranges of speech; gaps shorter than
+    `min_gap_frames` are bridged.
+    """
+    regions: List[Tuple[int, int]] = []
+    start = None
+    for i, v in enumerate(mask):
+        if v and start is None:
+            start = i
+        elif not v and start is not None:
+            regions.append((start, i))
+            start = None
+    if start is not None:
+        regions.append((start, len(mask)))
+
+    merged: List[Tuple[int, int]] = []
+    for r in regions:
+        if merged and r[0] - merged[-1][1] < min_gap_frames:
+            merged[-1] = (merged[-1][0], r[1])
+        else:
+            merged.append(r)
+    return merged
+
+
+def trim_silence(pcm: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Cut leading/trailing silence. Returns (trimmed pcm, voiced seconds)."""
+    mask = voiced_frames(pcm)
+    voiced_s = float(mask.sum()) * FRAME_MS / 1000.0
+    if not mask.any():
+        return pcm[:0], 0.0
+
+    idx = np.flatnonzero(mask)
+    pad = PAD_MS // FRAME_MS
+    first = max(0, int(idx[0]) - pad) * FRAME_SAMPLES
+    last = min(len(mask), int(idx[-1]) + 1 + pad) * FRAME_SAMPLES
+    return pcm[first:last], voiced_s
+
+
+class StreamingVAD:
+    """
+    Frame-by-frame voice activity for live PCM16 (16 kHz mono).
+    push() returns one bool per completed FRAME_MS frame. Without
+    webrtcvad the energy gate tracks the noise floor as it goes.
+    """
+
+    def __init__(self):
+        self._vad = webrtcvad.Vad(VAD_AGGRESSIVENESS) if webrtcvad is not None else None
+        self._rest = np.zeros(0, dtype=np.int16)
+        self._noise_dbfs = -60.0
+
+    def push(self, pcm: np.ndarray) -> List[bool]:
+        buf = np.concatenate([self._rest, pcm.astype(np.int16)])
+        frames = _frames(buf)
+        self._rest = buf[len(frames) * FRAME_SAMPLES:]
+
+        out: List[bool] = []
+        for f in frames:
+            if self._vad is not None:
+                out.append(self._vad.is_speech(f.tobytes(), SAMPLE_RATE))
+                continue
+
+            rms = float(np.sqrt(np.mean(f.astype(np.float32) ** 2))) + 1e-9
+            dbfs = 20.0 * np.log10(rms / 32768.0)
+            voiced = dbfs > max(ENERGY_FLOOR_DBFS, self._noise_dbfs + ENERGY_MARGIN_DB)
+            if not voiced:
+                self._noise_dbfs = 0.95 * self._noise_dbfs + 0.05 * dbfs
+            out.append(voiced)
+        return out
+
+
+# -------------------------------------------------------
+# ENTRY POINT (Used in aurora_whisper.speech_to_text)
+# -------------------------------------------------------
+
+def prepare_for_stt(audio_bytes: bytes, filename: str = "speech.webm") -> PreparedAudio:
+    original = len(audio_bytes or b"")
+
+    if not ffmpeg_available():
+        return PreparedAudio(
+            data=audio_bytes or b"",
+            filename=filename,
+            silent=original < LEGACY_MIN_BYTES,
+            original_bytes=original,
+        )
+
+    try:
+        pcm = decode_pcm16(audio_bytes)
+    except Exception as e:
+        print("STT PREPROCESS DECODE ERROR:", repr(e))
+        return PreparedAudio(
+            data=audio_bytes or b"",
+            filename=filename,
+            silent=original < LEGACY_MIN_BYTES,
+            original_bytes=original,
+        )
+
+    duration_s = len(pcm) / SAMPLE_RATE
+    trimmed, voiced_s = trim_silence(pcm)
+
+    if voiced_s * 1000 < MIN_SPEECH_MS:
+        return PreparedAudio(
+            data=b"",
+            filename=filename,
+            silent=True,
+            duration_s=duration_s,
+            speech_s=voiced_s,
+            original_bytes=original,
+        )
+
+    try:
+        data, out_name = encode_opus(trimmed), "speech.ogg"
+    except Exception as e:
+        print("STT PREPROCESS ENCODE ERROR:", repr(e))
+        data, out_name = audio_bytes, filename
+
+    return PreparedAudio(
+        data=data,
+        filename=out_name,
+        duration_s=duration_s,
+        speech_s=voiced_s,
+        original_bytes=original,
+        pcm=trimmed,
+    )
@@ -0,0 +1,267 @@
+# backend/services/aurora_assets.py
+#
+# Prebuilt audio for Aurora's fixed phrases and intro pool.
+#
+# Fixed phrases (greetings, retry prompt, TTS fallbacks) are rendered once
+# at deploy / warm-up time:
+#   flask aurora build-audio-assets
+# and served straight from disk. File names carry a hash of the text, so
+# editing a phrase produces a new asset instead of serving a stale one.
+#
+# Intros keep a small rotating pool of generated variations per
+# `variation`. One scheduled job (not every web worker) swaps the oldest
+# out, so guests don't hear the same intro forever:
+#   flask aurora refresh-intros          (cron, e.g. hourly)
+# Pool writers take a file lock on the intros dir, so overlapping runs
+# skip instead of writing and trimming the same pool.
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from services.aurora_speech import text_to_speech
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ASSET_DIR = os.getenv("AURORA_ASSET_DIR", os.path.join(_BACKEND_DIR, "static", "audio", "aurora_assets"))
+
+INTRO_VARIATIONS = [
+    v.strip()
+    for v in os.getenv("AURORA_INTRO_VARIATIONS", "neutral").split(",")
+    if v.strip()
+]
+INTRO_POOL_SIZE = int(os.getenv("AURORA_INTRO_POOL_SIZE", "4"))
+
+
+# -------------------------------------------------------
+# FIXED PHRASES
+# -------------------------------------------------------
+
+GREETINGS = {
+    "morning": (
+        "Good morning. I’m Aurora. "
+        "This is a space where you can talk things through… "
+        "What feels like a good beginning today?"
+    ),
+    "afternoon": (
+        "Good afternoon. I’m Aurora. "
+        "If your day feels busy, we can slow it down for a moment… "
+        "What would help right now?"
+    ),
+    "evening": (
+        "Good evening. I’m Aurora. "
+        "This is a place to unwind… "
+        "How are you feeling tonight?"
+    ),
+    "night": (
+        "Hi. I’m Aurora. "
+        "It’s okay to slow down here… "
+        "I’m here with you."
+    ),
+}
+
+RETRY_PROMPT = "Go ahead — I’m listening."
+TTS_FALLBACK = "I'm having a little trouble speaking right now, but I'm here."
+TTS_ERROR = "I'm having a small technical issue, but I'm still here with you."
+
+PHRASES: Dict[str, str] = {
+    **{f"greet_{tod}": text for tod, text in GREETINGS.items()},
+    "retry": RETRY_PROMPT,
+    "tts_fallback": TTS_FALLBACK,
+    "tts_error": TTS_ERROR,
+}
+
+_PHRASE_BY_TEXT = {text: name for name, text in PHRASES.items()}
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()[:12]
+
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def phrase_path(name: str) -> str:
+    return os.path.join(ASSET_DIR, "phrases", f"{name}-{_text_hash(PHRASES[name])}.mp3")
+
+
+def phrase_asset(name: str) -> Optional[str]:
+    """Path of the prebuilt asset for a named phrase, or None if not built."""
+    if name not in PHRASES:
+        return None
+    path = phrase_path(name)
+    return path if os.path.isfile(path) and os.path.getsize(path) > 0 else None
+
+
+def asset_for_text(text: str | None) -> Optional[str]:
+    """Prebuilt asset whose phrase is exactly `text`, if any."""
+    name = _PHRASE_BY_TEXT.get((text or "").strip())
+    return phrase_asset(name) if name else None
+
+
+def build_phrase_assets(*, force: bool = False) -> Dict[str, str]:
+    """
+    Render every fixed phrase that isn't on disk yet.
+    Returns {name: "built" | "cached" | "error: ..."}.
+    """
+    results = {}
+    for name, text in PHRASES.items():
+        path = phrase_path(name)
+        if not force and os.path.isfile(path) and os.path.getsize(path) > 0:
+            results[name] = "cached"
+            continue
+        try:
+            _write_atomic(path, text_to_speech(text))
+            results[name] = "built"
+        except Exception as e:
+            results[name] = f"error: {e}"
+    return results
+
+
+# -------------------------------------------------------
+# INTRO POOL
+# -------------------------------------------------------
+
+_SLUG_RE = re.compile(r"[^a-z0-9_-]+")
+
+_rotation: Dict[str, int] = {}
+_rotation_lock = threading.Lock()
+
+
+def _variation_slug(variation: str | None) -> str:
+    return _SLUG_RE.sub("-", (variation or "neutral").strip().lower()).strip("-") or "neutral"
+
+
+def _intro_dir(variation: str) -> str:
+    return os.path.join(ASSET_DIR, "intros", _variation_slug(variation))
+
+
+def intro_pool(variation: str) -> List[str]:
+    """Intro asset paths for `variation`, oldest first."""
+    d = _intro_dir(variation)
+    if not os.path.isdir(d):
+        return []
+    paths = [
+        os.path.join(d, name)
+        for name in os.listdir(d)
+        if name.endswith(".mp3")
+    ]
+    return sorted(paths, key=lambda p: os.path.getmtime(p))
+
+
+def pick_intro(variation: str) -> Optional[str]:
+    """Next intro from the pool, round-robin from a random start."""
+    pool = intro_pool(variation)
+    if not pool:
+        return None
+
+    slug = _variation_slug(variation)
+    with _rotation_lock:
+        i = _rotation.get(slug)
+        if i is None:
+            i = random.randrange(len(pool))
+        _rotation[slug] = i + 1
+
+    return pool[i % len(pool)]
+
+
+def add_intro(variation: str, script_fn: Callable[[str], str]) -> str:
+    """Generate one intro, add it to the pool and drop the oldest overflow."""
+    text = script_fn(variation)
+    audio = text_to_speech(text)
+
+    path = os.path.join(_intro_dir(variation), f"{int(time.time())}-{uuid.uuid4().hex[:8]}.mp3")
+    _write_atomic(path, audio)
+
+    pool = intro_pool(variation)
+    for old in pool[: max(0, len(pool) - INTRO_POOL_SIZE)]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+
+    return path
+
+
+def build_intro_pool(
+    script_fn: Callable[[str], str],
+    variations: List[str] | None = None,
+    *,
+    pool_size: int = INTRO_POOL_SIZE,
+) -> Dict[str, int]:
+    """Fill each variation's pool up to `pool_size`. Returns {variation: pool size}."""
+    results = {}
+    for variation in variations or INTRO_VARIATIONS:
+        missing = max(0, pool_size - len(intro_pool(variation)))
+        for _ in range(missing):
+            try:
+                add_intro(variation, script_fn)
+            except Exception as e:
+                print("\n!!!! INTRO ASSET ERROR !!!!")
+                print(variation, str(e))
+                print("!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+                break
+        results[variation] = len(intro_pool(variation))
+    return results
+
+
+# -------------------------------------------------------
+# SCHEDULED REFRESH (flask aurora refresh-intros)
+# -------------------------------------------------------
+
+@contextmanager
+def intro_pool_lock():
+    """Non-blocking host-wide lock on the intro pools; yields False if held."""
+    d = os.path.join(ASSET_DIR, "intros")
+    os.makedirs(d, exist_ok=True)
+    with open(os.path.join(d, ".lock"), "w") as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def refresh_intro_pools(script_fn: Callable[[str], str]) -> Dict[str, str]:
+    """
+    Top up each pool, or replace its oldest intro when it is full.
+    Returns {variation: "filled" | "rotated" | "error"}, or {} when
+    another run holds the lock.
+    """
+    results: Dict[str, str] = {}
+    with intro_pool_lock() as locked:
+        if not locked:
+            return results
+
+        for variation in INTRO_VARIATIONS:
+            try:
+                if len(intro_pool(variation)) < INTRO_POOL_SIZE:
+                    build_intro_pool(script_fn, [variation])
+                    results[variation] = "filled"
+                else:
+                    add_intro(variation, script_fn)
+                    results[variation] = "rotated"
+            except Exception as e:
+                print("\n!!!! INTRO REFRESH ERROR !!!!")
+                print(variation, str(e))
+                print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+                results[variation] = "error"
+    return results
@@ -1,15 +1,26 @@
 # backend/services/aurora_speech.py
 import os
-import requests
+from typing import Iterator
+
+from services.http_client import http_post
+from services.tts_cache import STREAM_CHUNK_BYTES, primed, tts_cache, tts_cache_key
 
 ELEVEN_KEY = os.getenv("ELEVENLABS_API_KEY")
 VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID")
 
+MODEL_ID = "eleven_turbo_v2"  # ✅ FAST MODEL
+VOICE_SETTINGS = {
+    "stability": 0.35,          # ✅ removes robotic monotone
+    "similarity_boost": 0.55,
+    "style": 0.65,              # ✅ emotional cadence
+    "use_speaker_boost": True,
+}
+
 class SpeechServiceError(Exception):
     pass
 
 
-def text_to_speech(text: str) -> bytes:
+def _check(text: str):
     if not ELEVEN_KEY:
         raise SpeechServiceError("Missing ELEVENLABS_API_KEY")
 
@@ -19,7 +30,37 @@ def text_to_speech(text: str) -> bytes:
     if not text or not text.strip():
         raise SpeechServiceError("Cannot generate speech from empty text")
 
+
+def _cache_key(text: str) -> str:
+    # Same text + voice + model + settings -> same audio
+    return tts_cache_key(
+        text,
+        voice_id=VOICE_ID,
+        model_id=MODEL_ID,
+        voice_settings=VOICE_SETTINGS,
+    )
+
+
+def text_to_speech(text: str) -> bytes:
+    _check(text)
+    # serve from the shared cache and only call ElevenLabs on a miss
+    return tts_cache.get_or_synthesize(_cache_key(text), lambda: _synthesize(text))
+
+
+def text_to_speech_stream(text: str) -> Iterator[bytes]:
+    """
+    MP3 chunks as ElevenLabs produces them (cached audio if we have it),
+    tee'd into the TTS cache. Provider errors raise here, before the
+    first byte is handed to the caller.
+    """
+    _check(text)
+    return primed(tts_cache.stream(_cache_key(text), lambda: _stream_chunks(text)))
+
+
+def _request(text: str, *, stream: bool = False):
     url = f"https://api.elevenlabs.io/v1/text-to-speech/{VOICE_ID}"
+    if stream:
+        url += "/stream"
 
     headers = {
         "xi-api-key": ELEVEN_KEY,
@@ -27,26 +68,35 @@ def text_to_speech(text: str) -> bytes:
     }
 
     payload = {
-        "model_id": "eleven_turbo_v2",  # ✅ FAST MODEL
+        "model_id": MODEL_ID,
         "text": text,
-        "voice_settings": {
-            "stability": 0.35,          # ✅ removes robotic monotone
-            "similarity_boost": 0.55, 
-            "style": 0.65,              # ✅ emotional cadence
-            "use_speaker_boost": True,
-        },
+        "voice_settings": VOICE_SETTINGS,
         "optimize_streaming_latency": 2,  # ✅ MAJOR speed-up
     }
 
     try:
-        res = requests.post(url, headers=headers, json=payload, timeout=15)
+        res = http_post("elevenlabs", url, headers=headers, json=payload, stream=stream)
     except Exception as e:
         raise SpeechServiceError(f"Request failed: {e}")
 
     if res.status_code != 200:
         raise SpeechServiceError(f"ElevenLabs Error {res.status_code}: {res.text}")
 
-    return res.content
+    return res
+
+
+def _synthesize(text: str) -> bytes:
+    return _request(text).content
+
+
+def _stream_chunks(text: str) -> Iterator[bytes]:
+    res = _request(text, stream=True)
+    try:
+        for chunk in res.iter_content(chunk_size=STREAM_CHUNK_BYTES):
+            if chunk:
+                yield chunk
+    finally:
+        res.close()
 
 
 
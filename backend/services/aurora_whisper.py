@@ -1,21 +1,67 @@
 # backend/services/aurora_whisper.py
 
-import os
 import io
+import os
 import re
+from dataclasses import dataclass, field
 from typing import List, Dict
-from openai import OpenAI
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from services.llm_gateway import chat_completion, transcribe
+from services.audio_preprocess import prepare_for_stt
+from services.stt_longform import STTChunkError, is_longform, transcribe_longform
+from services.session_store import session_store
 
 # -------------------------------------------------------------------
 # 1. SHORT-TERM MEMORY + HARD NAME LOCK
 # -------------------------------------------------------------------
 
-CONTEXT_BUFFER: List[Dict[str, str]] = []
 MAX_TURNS = 2
 
-LOCKED_USER_NAME: str | None = None
+VOICE_SESSION_CAPACITY = int(os.getenv("AURORA_VOICE_SESSIONS_MAX", "10000"))
+VOICE_SESSION_TTL = float(os.getenv("AURORA_VOICE_SESSION_TTL_SECONDS", "1800"))
+
+
+@dataclass
+class VoiceContext:
+    """
+    Rolling two-turn context + locked first name for one conversation.
+    Voice sessions (WebSocket) own one per connection; the HTTP
+    /api/aurora/converse endpoint loads it by session id (load_context).
+    """
+    turns: List[Dict[str, str]] = field(default_factory=list)
+    locked_name: str | None = None
+
+    def to_dict(self) -> Dict:
+        return {"turns": self.turns, "locked_name": self.locked_name}
+
+    @classmethod
+    def from_dict(cls, data: Dict | None) -> "VoiceContext":
+        data = data or {}
+        return cls(
+            turns=list(data.get("turns") or [])[-MAX_TURNS * 2:],
+            locked_name=data.get("locked_name"),
+        )
+
+
+def _ctx(ctx: VoiceContext | None) -> VoiceContext:
+    # no context -> nothing is remembered between calls
+    return ctx if ctx is not None else VoiceContext()
+
+
+# bounded LRU + idle TTL, optionally shared across workers (sqlite)
+_voice_contexts = session_store(
+    "voice_context",
+    capacity=VOICE_SESSION_CAPACITY,
+    ttl_seconds=VOICE_SESSION_TTL,
+)
+
+
+def load_context(session_id: str) -> VoiceContext:
+    return VoiceContext.from_dict(_voice_contexts.get(session_id))
+
+
+def save_context(session_id: str, ctx: VoiceContext):
+    _voice_contexts.put(session_id, ctx.to_dict())
 
 
 # -------------------------------------------------------------------
@@ -52,73 +98,98 @@ def extract_explicit_name(text: str) -> str | None:
     return None
 
 
-def lock_name(name: str):
+def lock_name(name: str, ctx: VoiceContext | None = None):
     """
     Permanently store first name for session.
     """
-    global LOCKED_USER_NAME
-
     if not name:
         return
 
     nm = name.strip().split(" ")[0].lower()
 
     if len(nm) >= 2:
-        LOCKED_USER_NAME = nm
-        print("✅ HARD NAME LOCK:", LOCKED_USER_NAME)
+        _ctx(ctx).locked_name = nm
+        print("✅ HARD NAME LOCK:", nm)
 
 
-def get_locked_name() -> str:
-    return LOCKED_USER_NAME or ""
+def get_locked_name(ctx: VoiceContext | None = None) -> str:
+    return _ctx(ctx).locked_name or ""
 
 
 # -------------------------------------------------------------------
 # CONTEXT BUFFER
 # -------------------------------------------------------------------
 
-def add_to_context(role: str, content: str):
+def add_to_context(role: str, content: str, ctx: VoiceContext | None = None):
     if not content:
         return
 
-    CONTEXT_BUFFER.append({"role": role, "content": content})
+    turns = _ctx(ctx).turns
+    turns.append({"role": role, "content": content})
 
     # keep rolling window
-    while len(CONTEXT_BUFFER) > MAX_TURNS * 2:
-        CONTEXT_BUFFER.pop(0)
+    while len(turns) > MAX_TURNS * 2:
+        turns.pop(0)
 
 
-def get_recent_context():
-    return CONTEXT_BUFFER[-MAX_TURNS * 2:]
+def get_recent_context(ctx: VoiceContext | None = None):
+    return _ctx(ctx).turns[-MAX_TURNS * 2:]
 
 
 # -------------------------------------------------------------------
 # 2. WHISPER STT
 # -------------------------------------------------------------------
 
+STT_MODEL = "gpt-4o-transcribe"
+
+
+def transcribe_audio_file(data: bytes, filename: str, label: str = "whisper_stt") -> str:
+    audio_file = io.BytesIO(data)
+    audio_file.name = filename
+
+    transcript = transcribe(
+        label,
+        model=STT_MODEL,
+        file=audio_file,
+        language="en",
+    )
+    return (transcript.text or "").strip()
+
+
 def speech_to_text(audio_bytes: bytes) -> str:
     """
     Converts audio bytes to text using OpenAI transcription.
+    Audio is trimmed to its voiced region and re-encoded as 16 kHz mono
+    Opus first; silence-only clips return "" without an API call.
+    Long notes (>= AURORA_STT_LONGFORM_MIN_SECONDS) are split at pauses
+    and transcribed in parallel; if a chunk fails the note is treated as
+    not heard ("") rather than answered with a gap in it.
     """
-    if not audio_bytes or len(audio_bytes) < 5000:
+    if not audio_bytes:
         return ""
 
-    try:
-        audio_file = io.BytesIO(audio_bytes)
-        audio_file.name = "speech.webm"
-
-        transcript = client.audio.transcriptions.create(
-            model="gpt-4o-transcribe",
-            file=audio_file,
-            language="en",
-        )
+    prepared = prepare_for_stt(audio_bytes)
+    if prepared.silent:
+        return ""
 
-        text = (transcript.text or "").strip()
+    try:
+        if is_longform(prepared.pcm):
+            text = transcribe_longform(
+                prepared.pcm,
+                lambda data, name: transcribe_audio_file(data, name, "whisper_stt_chunk"),
+            )
+        else:
+            text = transcribe_audio_file(prepared.data, prepared.filename)
 
         if not text or len(text) < 2:
             return ""
 
         return text
 
+    except STTChunkError as e:
+        print("Whisper STT Error: incomplete long-form note,", str(e))
+        return ""
+
     except Exception as e:
         print("Whisper STT Error:", repr(e))
         return ""
@@ -156,6 +227,7 @@ def aurora_brain_reply(
     valence: float = 0.5,
     arousal: float = 0.5,
     dominance: float = 0.5,
+    ctx: VoiceContext | None = None,
 ) -> str:
 
     if not user_text:
@@ -167,9 +239,9 @@ def aurora_brain_reply(
 
     explicit = extract_explicit_name(user_text)
     if explicit:
-        lock_name(explicit)
+        lock_name(explicit, ctx)
 
-    locked_name = get_locked_name()
+    locked_name = get_locked_name(ctx)
 
     # ---------------------------------------------------
     # BUILD MESSAGES
@@ -199,15 +271,16 @@ def aurora_brain_reply(
             "content": "The user seems emotionally activated."
         })
 
-    add_to_context("user", user_text)
-    messages.extend(get_recent_context())
+    add_to_context("user", user_text, ctx)
+    messages.extend(get_recent_context(ctx))
 
     # ---------------------------------------------------
     # GPT CALL
     # ---------------------------------------------------
 
     try:
-        resp = client.chat.completions.create(
+        resp = chat_completion(
+            "whisper_reply",
             model="gpt-4o-mini",
             temperature=0.75,
             max_tokens=60,
@@ -216,7 +289,7 @@ def aurora_brain_reply(
 
         reply = resp.choices[0].message.content.strip()
 
-        add_to_context("assistant", reply)
+        add_to_context("assistant", reply, ctx)
 
         print("AURORA REPLY >>>", reply)
 
@@ -238,6 +311,7 @@ def aurora_whisper_reply(
     valence: float = 0.5,
     arousal: float = 0.5,
     dominance: float = 0.5,
+    ctx: VoiceContext | None = None,
 ) -> str:
     return aurora_brain_reply(
         user_text=user_text,
@@ -246,6 +320,7 @@ def aurora_whisper_reply(
         valence=valence,
         arousal=arousal,
         dominance=dominance,
+        ctx=ctx,
     )
 
 
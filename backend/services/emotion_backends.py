@@ -0,0 +1,139 @@
+# backend/services/emotion_backends.py
+#
+# One interface for facial emotion, several implementations:
+#
+#   hf      HuggingFace endpoint (services/hf_emotion.py)   - default
+#   vision  GPT-4o-mini vision   (services/vision_emotion.py)
+#   local   landmarks on CPU     (services/local_emotion.py)
+#
+# AURORA_EMOTION_BACKEND picks one per deployment. Backend modules are
+# imported on first use, so a deployment only needs the settings and
+# packages of the backend it runs. Every backend returns:
+#   {"emotion", "score", "valence", "arousal", "dominance", "raw", ...}
+#
+# analyze_batch() takes frames in time order. The vision backend packs
+# them into shared calls; the others run them on a small thread pool.
+
+from __future__ import annotations
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+EMOTION_BACKEND = os.getenv("AURORA_EMOTION_BACKEND", "hf").strip().lower()
+EMOTION_BATCH_WORKERS = int(os.getenv("AURORA_EMOTION_BATCH_WORKERS", "4"))
+
+_batch_executor = ThreadPoolExecutor(max_workers=EMOTION_BATCH_WORKERS, thread_name_prefix="aurora-emotion")
+
+
+class EmotionServiceError(Exception):
+    pass
+
+
+class EmotionBackend(ABC):
+    name = ""
+
+    @abstractmethod
+    def analyze(self, image_bytes: bytes, session_key: Optional[str] = None) -> Dict[str, Any]:
+        """One frame -> {"emotion", "score", "valence", "arousal", "dominance", "raw", ...}."""
+
+    def analyze_batch(self, images: List[bytes], session_key: Optional[str] = None) -> List[Dict[str, Any]]:
+        """One result per frame; a failed frame is {"error": ...}."""
+        def one(image_bytes):
+            try:
+                return self.analyze(image_bytes, session_key=session_key)
+            except Exception as e:
+                return {"error": str(e)}
+
+        return list(_batch_executor.map(one, images))
+
+    def warm_up(self):
+        pass
+
+
+class HFEmotionBackend(EmotionBackend):
+    name = "hf"
+
+    def analyze(self, image_bytes, session_key=None):
+        from services import hf_emotion
+
+        try:
+            return hf_emotion.analyze_emotion(image_bytes)
+        except hf_emotion.EmotionServiceError as e:
+            raise EmotionServiceError(str(e))
+
+
+class VisionEmotionBackend(EmotionBackend):
+    name = "vision"
+
+    def analyze(self, image_bytes, session_key=None):
+        from services import vision_emotion
+
+        try:
+            return vision_emotion.analyze_emotion(image_bytes, session_key=session_key)
+        except vision_emotion.EmotionServiceError as e:
+            raise EmotionServiceError(str(e))
+
+    def analyze_batch(self, images, session_key=None):
+        from services import vision_emotion
+
+        return vision_emotion.analyze_emotion_batch(images, session_key=session_key)
+
+
+class LocalEmotionBackend(EmotionBackend):
+    name = "local"
+
+    def analyze(self, image_bytes, session_key=None):
+        from services import local_emotion
+
+        try:
+            return local_emotion.analyze_emotion(image_bytes)
+        except local_emotion.LocalEmotionError as e:
+            raise EmotionServiceError(str(e))
+
+    def warm_up(self):
+        from services import local_emotion
+
+        local_emotion.warm_up()
+
+
+BACKENDS = {
+    "hf": HFEmotionBackend,
+    "vision": VisionEmotionBackend,
+    "local": LocalEmotionBackend,
+}
+
+_instances: Dict[str, EmotionBackend] = {}
+_instances_lock = threading.Lock()
+
+
+def get_emotion_backend(name: Optional[str] = None) -> EmotionBackend:
+    name = (name or EMOTION_BACKEND).strip().lower()
+    if name not in BACKENDS:
+        raise EmotionServiceError(f"Unknown emotion backend: {name}")
+
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = BACKENDS[name]()
+        return _instances[name]
+
+
+def analyze_emotion(
+    image_bytes: bytes,
+    session_key: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> Dict[str, Any]:
+    impl = get_emotion_backend(backend)
+    result = impl.analyze(image_bytes, session_key=session_key)
+    return {**result, "backend": impl.name}
+
+
+def analyze_emotion_batch(
+    images: List[bytes],
+    session_key: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    impl = get_emotion_backend(backend)
+    return [{**r, "backend": impl.name} for r in impl.analyze_batch(images, session_key=session_key)]
@@ -0,0 +1,104 @@
+# backend/services/frame_dedupe.py
+#
+# Skip emotion calls for frames that haven't changed.
+#
+# Each session keeps the difference hash (dHash, 64 bits) of the last
+# face crop that was actually analyzed, plus that result. A new frame
+# whose hash is within DEDUPE_MAX_DISTANCE bits reuses the result (for
+# at most DEDUPE_MAX_AGE_S, so a slowly drifting face is still
+# re-checked). An "activity" average of how much frames move drives the
+# recommended next poll interval: still faces are polled slowly, moving
+# ones fast.
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+from services.session_store import MemorySessionStore
+
+DEDUPE_ENABLED = os.getenv("AURORA_FRAME_DEDUPE", "true").lower() == "true"
+DEDUPE_MAX_DISTANCE = int(os.getenv("AURORA_FRAME_DEDUPE_DISTANCE", "6"))   # of 64 bits
+DEDUPE_MAX_AGE_S = float(os.getenv("AURORA_FRAME_DEDUPE_MAX_AGE", "5"))
+ACTIVE_DISTANCE = 16          # hash distance treated as "fully moving"
+ACTIVITY_ALPHA = 0.4
+
+POLL_MIN_MS = int(os.getenv("AURORA_EMOTION_POLL_MIN_MS", "400"))
+POLL_MAX_MS = int(os.getenv("AURORA_EMOTION_POLL_MAX_MS", "3000"))
+
+FRAME_SESSIONS_MAX = 5000
+FRAME_SESSION_TTL = 600
+
+
+def dhash(gray: np.ndarray) -> int:
+    """64-bit difference hash of a grayscale image."""
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+@dataclass
+class FrameState:
+    phash: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+    result_at: float = 0.0
+    activity: float = 0.5
+
+
+class FrameDeduper:
+    def __init__(self, capacity: int = FRAME_SESSIONS_MAX, ttl_seconds: float = FRAME_SESSION_TTL):
+        self._sessions = MemorySessionStore("vision_frames", capacity, ttl_seconds)
+
+    def _state(self, session_key: str) -> FrameState:
+        state = self._sessions.get(session_key)
+        if state is None:
+            state = FrameState()
+            self._sessions.put(session_key, state)
+        return state
+
+    def check(self, session_key: str, phash: int) -> Optional[Dict[str, Any]]:
+        """Previous result if this frame is a near-duplicate, else None."""
+        state = self._state(session_key)
+        if state.phash is None:
+            return None
+
+        distance = hamming(state.phash, phash)
+        moved = min(1.0, distance / ACTIVE_DISTANCE)
+        state.activity = (1 - ACTIVITY_ALPHA) * state.activity + ACTIVITY_ALPHA * moved
+
+        if (
+            DEDUPE_ENABLED
+            and state.result is not None
+            and distance <= DEDUPE_MAX_DISTANCE
+            and time.time() - state.result_at <= DEDUPE_MAX_AGE_S
+        ):
+            return state.result
+        return None
+
+    def remember(self, session_key: str, phash: int, result: Dict[str, Any]):
+        state = self._state(session_key)
+        if state.result is not None and state.result.get("emotion") != result.get("emotion"):
+            # expression changed: poll fast for a while
+            state.activity = max(state.activity, 1.0)
+        state.phash = phash
+        state.result = result
+        state.result_at = time.time()
+
+    def next_poll_ms(self, session_key: str) -> int:
+        activity = self._state(session_key).activity
+        return int(POLL_MAX_MS - (POLL_MAX_MS - POLL_MIN_MS) * max(0.0, min(1.0, activity)))
+
+    def stats(self) -> Dict[str, Any]:
+        return self._sessions.stats()
+
+
+frame_deduper = FrameDeduper()
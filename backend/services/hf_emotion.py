@@ -1,10 +1,11 @@
 # backend/services/hf_emotion.py
 
 import os
-import requests
 from typing import Dict, Any
 import base64
 
+from services.http_client import http_post
+
 HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
 HF_EMOTION_ENDPOINT = os.getenv("HF_EMOTION_ENDPOINT")
 
@@ -30,11 +31,11 @@ def _call_hf_api(image_bytes: bytes) -> Any:
     }
 
     try:
-        response = requests.post(
+        response = http_post(
+            "huggingface",
             HF_EMOTION_ENDPOINT,
             headers=headers,
             json=payload,
-            timeout=60,
         )
     except Exception as e:
         raise EmotionServiceError(f"HF API request failed: {e}")
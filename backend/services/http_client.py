@@ -0,0 +1,283 @@
+# backend/services/http_client.py
+#
+# Shared outbound HTTP layer for provider calls (ElevenLabs, HuggingFace,
+# GCS). One pooled keep-alive requests.Session per provider, so repeat
+# calls skip the TCP+TLS handshake, plus per-provider:
+#   - (connect, read) timeouts
+#   - retry budget with full-jitter backoff (honours Retry-After); a
+#     POST that timed out reading may already have run upstream, so it is
+#     only retried for providers that opt in (retry_unsafe_read_timeout)
+#   - client-side token-bucket rate limit
+#   - latency / error metrics (see provider_stats)
+#
+# Usage:
+#   res = http_post("elevenlabs", url, headers=..., json=payload)
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class ProviderRateLimited(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class ProviderConfig:
+    name: str
+    connect_timeout: float = 3.05
+    read_timeout: float = 15.0
+    retries: int = 2
+    backoff_base: float = 0.25
+    backoff_max: float = 4.0
+    rate_per_sec: float = 10.0       # 0 disables the limiter
+    burst: int = 10
+    max_rate_wait: float = 2.0       # longest we queue for a token
+    pool_maxsize: int = 16
+    retry_statuses: tuple = (429, 500, 502, 503, 504)
+    retry_unsafe_read_timeout: bool = False
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _provider(name: str, **overrides) -> ProviderConfig:
+    """Every field overridable per provider, e.g. HTTP_ELEVENLABS_READ_TIMEOUT=30."""
+    base = ProviderConfig(name=name, **overrides)
+    prefix = f"HTTP_{name.upper()}_"
+    env = {}
+    for f in fields(ProviderConfig):
+        if f.name in ("name", "retry_statuses"):
+            continue
+        value = getattr(base, f.name)
+        env[f.name] = type(value)(_env_float(prefix + f.name.upper(), value))
+    return replace(base, **env)
+
+
+PROVIDERS: Dict[str, ProviderConfig] = {
+    "elevenlabs": _provider("elevenlabs", read_timeout=20.0, retries=2, rate_per_sec=5.0, burst=5),
+    # inference POSTs are pure functions of the input; safe to resend
+    "huggingface": _provider("huggingface", read_timeout=60.0, retries=1, rate_per_sec=10.0, burst=10,
+                             retry_unsafe_read_timeout=True),
+    # inline on the converse path: fail fast, never retry
+    "hf_toxicity": _provider("hf_toxicity", connect_timeout=0.5, read_timeout=0.8, retries=0,
+                             rate_per_sec=20.0, burst=20, max_rate_wait=0.0),
+    "gcs": _provider("gcs", read_timeout=10.0, retries=2, rate_per_sec=50.0, burst=50),
+}
+
+# ---------------------------------------------------
+# Rate limiting
+# ---------------------------------------------------
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, max_wait: float) -> float:
+        """Take a token, sleeping up to `max_wait`. Returns seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                need = (1 - self.tokens) / self.rate
+
+            if waited + need > max_wait:
+                raise ProviderRateLimited(f"client-side rate limit ({self.rate}/s)")
+            time.sleep(need)
+            waited += need
+
+
+# ---------------------------------------------------
+# Metrics
+# ---------------------------------------------------
+
+class _ProviderMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.rate_wait_s = 0.0
+        self.status: Dict[str, int] = {}
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.recent = deque(maxlen=256)
+
+    def observe(self, latency: float, status: Optional[int], error: bool):
+        with self.lock:
+            self.requests += 1
+            self.latency_sum += latency
+            self.latency_max = max(self.latency_max, latency)
+            self.recent.append(latency)
+            key = str(status) if status is not None else "exception"
+            self.status[key] = self.status.get(key, 0) + 1
+            if error:
+                self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            recent = sorted(self.recent)
+
+            def pct(p):
+                if not recent:
+                    return 0.0
+                return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 1)
+
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "rate_wait_ms": round(self.rate_wait_s * 1000, 1),
+                "status": dict(self.status),
+                "latency_ms": {
+                    "avg": round(self.latency_sum / self.requests * 1000, 1) if self.requests else 0.0,
+                    "p50": pct(0.50),
+                    "p95": pct(0.95),
+                    "max": round(self.latency_max * 1000, 1),
+                },
+            }
+
+
+# ---------------------------------------------------
+# Client
+# ---------------------------------------------------
+
+_sessions: Dict[str, requests.Session] = {}
+_buckets: Dict[str, _TokenBucket] = {}
+_metrics: Dict[str, _ProviderMetrics] = {}
+_registry_lock = threading.Lock()
+
+_UNSAFE_METHODS = {"POST", "PATCH"}
+
+
+def _config(provider: str) -> ProviderConfig:
+    return PROVIDERS.get(provider) or ProviderConfig(name=provider)
+
+
+def _state(provider: str):
+    with _registry_lock:
+        session = _sessions.get(provider)
+        if session is None:
+            cfg = _config(provider)
+            session = requests.Session()
+            # retries are handled below (jitter + metrics), not by urllib3
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=cfg.pool_maxsize, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[provider] = session
+            _buckets[provider] = _TokenBucket(cfg.rate_per_sec, cfg.burst)
+            _metrics[provider] = _ProviderMetrics()
+        return session, _buckets[provider], _metrics[provider]
+
+
+def _backoff(cfg: ProviderConfig, attempt: int, res: Optional[requests.Response]) -> float:
+    if res is not None:
+        retry_after = res.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(cfg.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+    # full jitter
+    return random.uniform(0, min(cfg.backoff_max, cfg.backoff_base * (2 ** attempt)))
+
+
+def http_request(provider: str, method: str, url: str, *, timeout=None, retries: int | None = None, **kwargs) -> requests.Response:
+    """
+    Send a request through the provider's pooled session.
+    Returns the last response (callers still check status_code); raises
+    the last transport error if every attempt failed, or
+    ProviderRateLimited if no token was available in time.
+    """
+    cfg = _config(provider)
+    session, bucket, metrics = _state(provider)
+
+    if timeout is None:
+        timeout = (cfg.connect_timeout, cfg.read_timeout)
+    budget = cfg.retries if retries is None else retries
+
+    attempt = 0
+    while True:
+        try:
+            waited = bucket.acquire(cfg.max_rate_wait)
+        except ProviderRateLimited:
+            with metrics.lock:
+                metrics.rate_limited += 1
+            raise
+        if waited:
+            with metrics.lock:
+                metrics.rate_wait_s += waited
+
+        res = None
+        error: Optional[Exception] = None
+        started = time.perf_counter()
+        try:
+            res = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        latency = time.perf_counter() - started
+
+        failed = error is not None or res.status_code >= 400
+        metrics.observe(latency, None if res is None else res.status_code, failed)
+
+        retryable = error is not None or res.status_code in cfg.retry_statuses
+        if (
+            isinstance(error, requests.ReadTimeout)
+            and method.upper() in _UNSAFE_METHODS
+            and not cfg.retry_unsafe_read_timeout
+        ):
+            retryable = False  # the request was sent; it may have been processed
+        if not retryable or attempt >= budget:
+            if error is not None:
+                raise error
+            return res
+
+        with metrics.lock:
+            metrics.retries += 1
+        delay = _backoff(cfg, attempt, res)
+        if res is not None:
+            # hand the pooled connection back (stream=True leaves it checked out)
+            res.close()
+        time.sleep(delay)
+        attempt += 1
+
+
+def http_get(provider: str, url: str, **kwargs) -> requests.Response:
+    return http_request(provider, "GET", url, **kwargs)
+
+
+def http_post(provider: str, url: str, **kwargs) -> requests.Response:
+    return http_request(provider, "POST", url, **kwargs)
+
+
+def provider_stats() -> Dict[str, Dict[str, Any]]:
+    with _registry_lock:
+        items = list(_metrics.items())
+    return {name: m.snapshot() for name, m in items}
@@ -0,0 +1,216 @@
+# backend/services/llm_gateway.py
+#
+# One shared OpenAI client for the whole backend.
+#
+# The client is created lazily on first use (cold paths never read the
+# key or open a pool), reused by every caller so they share warm
+# keep-alive connections, and every call records latency + token usage
+# under a label (see llm_stats).
+#
+#   resp = chat_completion("brain_user", model="gpt-4o-mini", messages=...)
+#   resp = await achat_completion("summarizer", model=..., messages=...)
+#   text = transcribe("stt", model="gpt-4o-transcribe", file=f).text
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "50"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "20"))
+
+
+class LLMGatewayError(Exception):
+    pass
+
+
+def openai_configured() -> bool:
+    return bool(OPENAI_API_KEY)
+
+
+# ---------------------------------------------------
+# Clients (lazy, one per process)
+# ---------------------------------------------------
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+
+def _http_settings():
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+        keepalive_expiry=60.0,
+    )
+    timeout = httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+    return httpx, limits, timeout
+
+
+def get_openai_client():
+    global _client
+    if _client is not None:
+        return _client
+
+    with _client_lock:
+        if _client is None:
+            if not OPENAI_API_KEY:
+                raise LLMGatewayError("Missing OPENAI_API_KEY")
+
+            from openai import OpenAI
+
+            httpx, limits, timeout = _http_settings()
+            _client = OpenAI(
+                api_key=OPENAI_API_KEY,
+                timeout=timeout,
+                max_retries=OPENAI_MAX_RETRIES,
+                http_client=httpx.Client(limits=limits, timeout=timeout),
+            )
+    return _client
+
+
+def get_async_openai_client():
+    global _async_client
+    if _async_client is not None:
+        return _async_client
+
+    with _client_lock:
+        if _async_client is None:
+            if not OPENAI_API_KEY:
+                raise LLMGatewayError("Missing OPENAI_API_KEY")
+
+            from openai import AsyncOpenAI
+
+            httpx, limits, timeout = _http_settings()
+            _async_client = AsyncOpenAI(
+                api_key=OPENAI_API_KEY,
+                timeout=timeout,
+                max_retries=OPENAI_MAX_RETRIES,
+                http_client=httpx.AsyncClient(limits=limits, timeout=timeout),
+            )
+    return _async_client
+
+
+# ---------------------------------------------------
+# Metrics
+# ---------------------------------------------------
+
+_stats: Dict[str, Dict[str, Any]] = {}
+_latencies: Dict[str, deque] = {}
+_stats_lock = threading.Lock()
+
+
+def _record(label: str, started: float, resp=None, error: bool = False):
+    latency = time.perf_counter() - started
+    usage = getattr(resp, "usage", None)
+
+    with _stats_lock:
+        s = _stats.setdefault(label, {
+            "calls": 0,
+            "errors": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "latency_sum": 0.0,
+            "latency_max": 0.0,
+        })
+        s["calls"] += 1
+        s["latency_sum"] += latency
+        s["latency_max"] = max(s["latency_max"], latency)
+        if error:
+            s["errors"] += 1
+        if usage is not None:
+            # chat usage: prompt/completion; transcription usage: input/output
+            s["prompt_tokens"] += int(getattr(usage, "prompt_tokens", None) or getattr(usage, "input_tokens", 0) or 0)
+            s["completion_tokens"] += int(getattr(usage, "completion_tokens", None) or getattr(usage, "output_tokens", 0) or 0)
+            s["total_tokens"] += int(getattr(usage, "total_tokens", 0) or 0)
+
+        _latencies.setdefault(label, deque(maxlen=256)).append(latency)
+
+
+def llm_stats() -> Dict[str, Dict[str, Any]]:
+    out = {}
+    with _stats_lock:
+        for label, s in _stats.items():
+            recent = sorted(_latencies.get(label) or [])
+            p95 = recent[min(len(recent) - 1, int(0.95 * len(recent)))] if recent else 0.0
+            out[label] = {
+                "calls": s["calls"],
+                "errors": s["errors"],
+                "prompt_tokens": s["prompt_tokens"],
+                "completion_tokens": s["completion_tokens"],
+                "total_tokens": s["total_tokens"],
+                "latency_ms": {
+                    "avg": round(s["latency_sum"] / s["calls"] * 1000, 1) if s["calls"] else 0.0,
+                    "p95": round(p95 * 1000, 1),
+                    "max": round(s["latency_max"] * 1000, 1),
+                },
+            }
+    return out
+
+
+# ---------------------------------------------------
+# Calls
+# ---------------------------------------------------
+
+def chat_completion(label: str, *, max_retries: int | None = None, **kwargs):
+    """
+    client.chat.completions.create(**kwargs), timed and counted under
+    `label`. `max_retries` overrides the client default for this call.
+    """
+    client = get_openai_client()
+    if max_retries is not None:
+        client = client.with_options(max_retries=max_retries)
+
+    started = time.perf_counter()
+    try:
+        resp = client.chat.completions.create(**kwargs)
+    except Exception:
+        _record(label, started, error=True)
+        raise
+    _record(label, started, resp)
+    return resp
+
+
+async def achat_completion(label: str, **kwargs):
+    started = time.perf_counter()
+    try:
+        resp = await get_async_openai_client().chat.completions.create(**kwargs)
+    except Exception:
+        _record(label, started, error=True)
+        raise
+    _record(label, started, resp)
+    return resp
+
+
+def transcribe(label: str, **kwargs):
+    """client.audio.transcriptions.create(**kwargs), timed under `label`."""
+    started = time.perf_counter()
+    try:
+        resp = get_openai_client().audio.transcriptions.create(**kwargs)
+    except Exception:
+        _record(label, started, error=True)
+        raise
+    _record(label, started, resp)
+    return resp
+
+
+async def atranscribe(label: str, **kwargs):
+    started = time.perf_counter()
+    try:
+        resp = await get_async_openai_client().audio.transcriptions.create(**kwargs)
+    except Exception:
+        _record(label, started, error=True)
+        raise
+    _record(label, started, resp)
+    return resp
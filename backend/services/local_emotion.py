@@ -0,0 +1,229 @@
+# backend/services/local_emotion.py
+#
+# On-box facial expression estimate, no network call.
+#
+# Runs only the detector + 2d106det landmark model from the AuraFace
+# pack (models/auraface), then reads expression off the landmark
+# geometry: mouth corner lift and width (smile / frown), mouth opening,
+# eye opening and brow height, all normalized by inter-ocular distance
+# after removing head roll. The mapping to a label and PAD is a
+# heuristic; it is meant to be cheap and steady, not to match a trained
+# classifier. Select it with AURORA_EMOTION_BACKEND=local.
+#
+# Detection and landmarks are run by hand rather than through
+# FaceAnalysis.get(): landmarks only for the largest face, and raw
+# carries det_ms / landmark_ms so the per-frame cost can be checked
+# (python bench_local_emotion.py).
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict
+
+import cv2
+import numpy as np
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DET_SIZE = int(os.getenv("AURORA_LOCAL_EMOTION_DET_SIZE", "320"))
+
+# 2d106det markup
+MOUTH = slice(52, 72)
+LEFT_EYE = slice(33, 43)
+RIGHT_EYE = slice(87, 97)
+LEFT_BROW = slice(43, 52)
+RIGHT_BROW = slice(97, 106)
+
+# typical relaxed-face values (normalized by inter-ocular distance)
+NEUTRAL = {
+    "corner_lift": 0.02,
+    "mouth_width": 0.90,
+    "mouth_open": 0.40,
+    "eye_open": 0.30,
+    "brow_raise": 0.40,
+}
+
+
+class LocalEmotionError(Exception):
+    pass
+
+
+# -------------------------------------------------------
+# MODEL (lazy, detection + 106 landmarks only)
+# -------------------------------------------------------
+
+_app = None
+_app_lock = threading.Lock()
+
+
+def _face_app():
+    global _app
+    if _app is not None:
+        return _app
+
+    with _app_lock:
+        if _app is None:
+            from insightface.app import FaceAnalysis
+
+            app = FaceAnalysis(
+                name="auraface",
+                root=_BACKEND_DIR,
+                allowed_modules=["detection", "landmark_2d_106"],
+            )
+            app.prepare(ctx_id=-1, det_size=(DET_SIZE, DET_SIZE))
+            _app = app
+    return _app
+
+
+def warm_up():
+    _face_app()
+
+
+# -------------------------------------------------------
+# GEOMETRY
+# -------------------------------------------------------
+
+def _clip(v: float, lo: float = -1.0, hi: float = 1.0) -> float:
+    return max(lo, min(hi, float(v)))
+
+
+def landmark_features(lmk: np.ndarray) -> Dict[str, float]:
+    """Expression features from one (106, 2) landmark array."""
+    left_eye = lmk[LEFT_EYE].mean(axis=0)
+    right_eye = lmk[RIGHT_EYE].mean(axis=0)
+
+    # de-roll around the eye midpoint so "up" means up on the face
+    dx, dy = right_eye - left_eye
+    angle = np.arctan2(dy, dx)
+    c, s = np.cos(-angle), np.sin(-angle)
+    rot = np.array([[c, -s], [s, c]], dtype=np.float32)
+    pts = (lmk - (left_eye + right_eye) / 2.0) @ rot.T
+
+    iod = float(np.hypot(dx, dy)) or 1.0
+
+    mouth = pts[MOUTH]
+    left_corner = mouth[np.argmin(mouth[:, 0])]
+    right_corner = mouth[np.argmax(mouth[:, 0])]
+    mouth_center_y = float(mouth[:, 1].mean())
+
+    def eye_open(eye: np.ndarray) -> float:
+        w = np.ptp(eye[:, 0]) or 1.0
+        return float(np.ptp(eye[:, 1]) / w)
+
+    eyes_y = (pts[LEFT_EYE][:, 1].mean() + pts[RIGHT_EYE][:, 1].mean()) / 2.0
+    brows_y = (pts[LEFT_BROW][:, 1].mean() + pts[RIGHT_BROW][:, 1].mean()) / 2.0
+
+    return {
+        # image y grows downward: corners above the mouth center -> positive
+        "corner_lift": (mouth_center_y - (left_corner[1] + right_corner[1]) / 2.0) / iod,
+        "mouth_width": float(right_corner[0] - left_corner[0]) / iod,
+        "mouth_open": float(np.ptp(mouth[:, 1])) / iod,
+        "eye_open": (eye_open(pts[LEFT_EYE]) + eye_open(pts[RIGHT_EYE])) / 2.0,
+        "brow_raise": float(eyes_y - brows_y) / iod,
+    }
+
+
+def _up(v: float) -> float:
+    return max(0.0, v)
+
+
+def _down(v: float) -> float:
+    return max(0.0, -v)
+
+
+def features_to_emotion(f: Dict[str, float]) -> Dict[str, Any]:
+    smile = _clip(((f["corner_lift"] - NEUTRAL["corner_lift"]) / 0.05
+                   + (f["mouth_width"] - NEUTRAL["mouth_width"]) / 0.15) / 2.0)
+    mouth_open = _clip((f["mouth_open"] - NEUTRAL["mouth_open"]) / 0.35)
+    eyes = _clip((f["eye_open"] - NEUTRAL["eye_open"]) / 0.12)
+    brows = _clip((f["brow_raise"] - NEUTRAL["brow_raise"]) / 0.10)
+
+    scores = {
+        "happy": _up(smile),
+        "surprised": (_up(mouth_open) + _up(brows) + _up(eyes)) / 3.0,
+        "sad": _down(smile) * (1.0 - _up(mouth_open)),
+        "angry": _down(brows) * (0.5 + 0.5 * _down(smile)),
+        "fearful": _up(brows) * _up(eyes) * (1.0 - _up(smile)),
+        "tired": _down(eyes) * (1.0 - _up(mouth_open)),
+    }
+    label, best = max(scores.items(), key=lambda kv: kv[1])
+    if best < 0.35:
+        label, best = "neutral", 1.0 - best
+
+    return {
+        "emotion": label,
+        "score": round(best, 3),
+        "valence": _clip(0.5 + 0.35 * smile - 0.15 * _down(brows), 0.0, 1.0),
+        "arousal": _clip(0.5 + 0.2 * mouth_open + 0.2 * eyes + 0.1 * abs(brows), 0.0, 1.0),
+        "dominance": _clip(0.5 + 0.2 * _down(brows) - 0.2 * _up(brows) * _up(eyes) + 0.1 * smile, 0.0, 1.0),
+        "scores": {k: round(v, 3) for k, v in scores.items()},
+    }
+
+
+# -------------------------------------------------------
+# ENTRY POINT
+# -------------------------------------------------------
+
+def analyze_image(img: np.ndarray) -> Dict[str, Any]:
+    """BGR image -> same shape as the HF / vision backends."""
+    from insightface.app.common import Face
+
+    app = _face_app()
+    started = time.perf_counter()
+
+    bboxes, kpss = app.det_model.detect(img, max_num=0, metric="default")
+    det_ms = (time.perf_counter() - started) * 1000
+
+    if bboxes is None or len(bboxes) == 0:
+        return {
+            "emotion": "neutral",
+            "confidence": 0.15,
+            "score": 0.15,
+            "valence": 0.5,
+            "arousal": 0.5,
+            "dominance": 0.5,
+            "raw": {"error": "no_face", "det_ms": round(det_ms, 2), "ms": round(det_ms, 2)},
+        }
+
+    # landmarks for the largest face only
+    i = int(np.argmax((bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])))
+    face = Face(
+        bbox=bboxes[i, 0:4],
+        kps=kpss[i] if kpss is not None else None,
+        det_score=bboxes[i, 4],
+    )
+    lmk_started = time.perf_counter()
+    landmarks = app.models["landmark_2d_106"].get(img, face)
+    lmk_ms = (time.perf_counter() - lmk_started) * 1000
+
+    features = landmark_features(np.asarray(landmarks, dtype=np.float32))
+    out = features_to_emotion(features)
+
+    return {
+        "emotion": out["emotion"],
+        "confidence": out["score"],
+        "score": out["score"],
+        "valence": out["valence"],
+        "arousal": out["arousal"],
+        "dominance": out["dominance"],
+        "raw": {
+            "features": {k: round(v, 4) for k, v in features.items()},
+            "scores": out["scores"],
+            "det_score": float(getattr(face, "det_score", 0.0)),
+            "det_ms": round(det_ms, 2),
+            "landmark_ms": round(lmk_ms, 2),
+            "ms": round((time.perf_counter() - started) * 1000, 2),
+        },
+    }
+
+
+def analyze_emotion(image_bytes: bytes) -> Dict[str, Any]:
+    if not image_bytes:
+        raise LocalEmotionError("Empty image")
+
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise LocalEmotionError("Could not decode image")
+    return analyze_image(img)
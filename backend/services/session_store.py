@@ -0,0 +1,320 @@
+# backend/services/session_store.py
+#
+# Bounded, session-keyed state for stateless HTTP endpoints.
+#
+# Each store is a namespace with a capacity and an idle TTL:
+#   - memory: OrderedDict LRU per process, O(1) get/put, expired entries
+#     are dropped lazily from the cold end
+#   - sqlite: one shared file for all workers on the host
+#     (AURORA_SESSION_STORE=sqlite); rows carry their last-touch time and
+#     are pruned every PRUNE_EVERY writes
+#
+# Values must be JSON-serializable (dicts in practice), so both backends
+# behave the same. update(key, fn) is an atomic read-modify-write (under
+# the store lock / BEGIN IMMEDIATE), for state several workers change.
+#
+#   contexts = session_store("voice_context", capacity=5000, ttl_seconds=1800)
+#   state = contexts.get(session_id) or {}
+#   contexts.put(session_id, state)
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SESSION_STORE_BACKEND = os.getenv("AURORA_SESSION_STORE", "memory").strip().lower()
+SESSION_STORE_DB = os.getenv(
+    "AURORA_SESSION_DB", os.path.join(_BACKEND_DIR, "cache", "sessions.sqlite3")
+)
+PRUNE_EVERY = 200
+SESSION_ID_MAX_LEN = 128
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+def clean_session_id(value: Optional[str]) -> Optional[str]:
+    """Client-supplied ids: trimmed, bounded, printable; None if unusable."""
+    sid = (value or "").strip()
+    if not sid or len(sid) > SESSION_ID_MAX_LEN or not sid.isprintable():
+        return None
+    return sid
+
+
+class _Stats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+
+# -------------------------------------------------------
+# MEMORY BACKEND
+# -------------------------------------------------------
+
+class MemorySessionStore:
+    def __init__(self, namespace: str, capacity: int, ttl_seconds: float):
+        self.namespace = namespace
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (touched, value)
+        self._lock = threading.Lock()
+        self._stats = _Stats()
+
+    def _expire(self, now: float):
+        # LRU order == last-touch order, so expired entries sit at the front
+        while self._items:
+            key, (touched, _) = next(iter(self._items.items()))
+            if now - touched < self.ttl_seconds:
+                break
+            self._items.popitem(last=False)
+            self._stats.expired += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            item = self._items.get(key)
+            if item is None:
+                self._stats.misses += 1
+                return None
+            self._items[key] = (now, item[1])
+            self._items.move_to_end(key)
+            self._stats.hits += 1
+            return item[1]
+
+    def put(self, key: str, value: Any):
+        now = time.time()
+        with self._lock:
+            self._items[key] = (now, value)
+            self._items.move_to_end(key)
+            self._expire(now)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+                self._stats.evictions += 1
+
+    def update(self, key: str, fn: Callable[[Optional[Any]], Any]) -> Any:
+        """Store and return fn(current value or None), atomically."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            item = self._items.get(key)
+            value = fn(item[1] if item is not None else None)
+            self._items[key] = (now, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+                self._stats.evictions += 1
+            return value
+
+    def delete(self, key: str):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "size": len(self._items),
+                "capacity": self.capacity,
+                "ttl_seconds": self.ttl_seconds,
+                **self._stats.to_dict(),
+            }
+
+
+# -------------------------------------------------------
+# SQLITE BACKEND (shared by all workers on one host)
+# -------------------------------------------------------
+
+class SQLiteSessionStore:
+    def __init__(self, namespace: str, capacity: int, ttl_seconds: float, path: str = SESSION_STORE_DB):
+        self.namespace = namespace
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._stats = _Stats()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_state ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " touched REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_session_state_touched"
+            " ON session_state (namespace, touched)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, touched FROM session_state WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+
+        if row is None:
+            self._stats.misses += 1
+            return None
+
+        if now - row[1] >= self.ttl_seconds:
+            conn.execute(
+                "DELETE FROM session_state WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            )
+            self._stats.expired += 1
+            self._stats.misses += 1
+            return None
+
+        conn.execute(
+            "UPDATE session_state SET touched = ? WHERE namespace = ? AND key = ?",
+            (now, self.namespace, key),
+        )
+        self._stats.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO session_state (namespace, key, value, touched)"
+            " VALUES (?, ?, ?, ?)",
+            (self.namespace, key, json.dumps(value), time.time()),
+        )
+
+        with self._lock:
+            self._writes += 1
+            due = self._writes % PRUNE_EVERY == 0
+        if due:
+            self.prune()
+
+    def update(self, key: str, fn: Callable[[Optional[Any]], Any]) -> Any:
+        """
+        Store and return fn(current value or None). BEGIN IMMEDIATE takes
+        the write lock before the read, so concurrent workers serialize
+        instead of overwriting each other.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value, touched FROM session_state WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            current = None
+            if row is not None and now - row[1] < self.ttl_seconds:
+                current = json.loads(row[0])
+            value = fn(current)
+            conn.execute(
+                "INSERT OR REPLACE INTO session_state (namespace, key, value, touched)"
+                " VALUES (?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value), now),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        with self._lock:
+            self._writes += 1
+            due = self._writes % PRUNE_EVERY == 0
+        if due:
+            self.prune()
+        return value
+
+    def delete(self, key: str):
+        self._conn().execute(
+            "DELETE FROM session_state WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        )
+
+    def prune(self):
+        conn = self._conn()
+        cur = conn.execute(
+            "DELETE FROM session_state WHERE namespace = ? AND touched < ?",
+            (self.namespace, time.time() - self.ttl_seconds),
+        )
+        self._stats.expired += max(cur.rowcount, 0)
+
+        cur = conn.execute(
+            "DELETE FROM session_state WHERE namespace = ? AND key IN ("
+            " SELECT key FROM session_state WHERE namespace = ?"
+            " ORDER BY touched DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self.capacity),
+        )
+        self._stats.evictions += max(cur.rowcount, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        size = self._conn().execute(
+            "SELECT COUNT(*) FROM session_state WHERE namespace = ?",
+            (self.namespace,),
+        ).fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "size": size,
+            "capacity": self.capacity,
+            "ttl_seconds": self.ttl_seconds,
+            **self._stats.to_dict(),
+        }
+
+
+# -------------------------------------------------------
+# REGISTRY
+# -------------------------------------------------------
+
+_stores: Dict[str, Any] = {}
+_stores_lock = threading.Lock()
+
+
+def session_store(namespace: str, *, capacity: int, ttl_seconds: float, backend: Optional[str] = None):
+    """One store per namespace per process; backend defaults to AURORA_SESSION_STORE."""
+    with _stores_lock:
+        store = _stores.get(namespace)
+        if store is None:
+            kind = (backend or SESSION_STORE_BACKEND)
+            if kind == "sqlite":
+                store = SQLiteSessionStore(namespace, capacity, ttl_seconds)
+            else:
+                store = MemorySessionStore(namespace, capacity, ttl_seconds)
+            _stores[namespace] = store
+        return store
+
+
+def session_store_stats() -> Dict[str, Dict[str, Any]]:
+    with _stores_lock:
+        stores = dict(_stores)
+    return {name: store.stats() for name, store in stores.items()}
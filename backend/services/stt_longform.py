@@ -0,0 +1,189 @@
+# backend/services/stt_longform.py
+#
+# Long-form speech-to-text: split at silence, transcribe chunks in
+# parallel, stitch in order.
+#
+# Cuts land in the quietest stretch between CHUNK_TARGET_S and
+# CHUNK_MAX_S. When there is no pause to cut at, the chunk is hard-cut
+# at CHUNK_MAX_S and both sides share OVERLAP_S of audio; the duplicated
+# words are removed again when stitching (only across those hard cuts,
+# so a real "no, no" at a pause survives). Retries are the OpenAI
+# client's (services/llm_gateway.py); a chunk that still fails raises
+# STTChunkError instead of leaving a silent hole in the transcript. One
+# note has at most STT_CHUNKS_PER_REQUEST chunks on the shared pool at a
+# time.
+
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from services.audio_preprocess import (
+    FRAME_SAMPLES,
+    SAMPLE_RATE,
+    encode_opus,
+    voiced_frames,
+)
+
+LONGFORM_MIN_SECONDS = float(os.getenv("AURORA_STT_LONGFORM_MIN_SECONDS", "45"))
+CHUNK_TARGET_S = 25.0
+CHUNK_MAX_S = 40.0
+OVERLAP_S = 1.0
+STT_WORKERS = int(os.getenv("AURORA_STT_WORKERS", "4"))
+STT_CHUNKS_PER_REQUEST = int(os.getenv("AURORA_STT_CHUNKS_PER_REQUEST", "2"))
+STITCH_MAX_WORDS = 12  # longest overlap we look for when de-duplicating
+
+# shared across requests so total concurrency stays bounded
+_stt_executor = ThreadPoolExecutor(max_workers=STT_WORKERS, thread_name_prefix="aurora-stt")
+
+
+class STTChunkError(Exception):
+    """A chunk failed after the client's retries; `partial` is the rest, stitched."""
+
+    def __init__(self, failed: List[int], partial: str = ""):
+        super().__init__(f"STT failed for chunk(s) {failed}")
+        self.failed = failed
+        self.partial = partial
+
+
+@dataclass
+class Chunk:
+    index: int
+    start: int   # samples, including leading overlap
+    end: int     # samples, including trailing overlap
+    overlaps_previous: bool = False  # hard cut: shares OVERLAP_S with the chunk before
+
+
+def is_longform(pcm: np.ndarray | None) -> bool:
+    return pcm is not None and len(pcm) / SAMPLE_RATE >= LONGFORM_MIN_SECONDS
+
+
+# -------------------------------------------------------
+# SPLITTING
+# -------------------------------------------------------
+
+def split_at_silence(pcm: np.ndarray) -> List[Chunk]:
+    mask = voiced_frames(pcm)
+    n_frames = len(mask)
+
+    frame_s = FRAME_SAMPLES / SAMPLE_RATE
+    target = int(CHUNK_TARGET_S / frame_s)
+    limit = int(CHUNK_MAX_S / frame_s)
+    overlap = int(OVERLAP_S * SAMPLE_RATE)
+
+    # frame-level cuts; True when the cut was forced mid-speech
+    cuts: List[tuple] = []
+    pos = 0
+    while n_frames - pos > limit:
+        window = mask[pos + target: pos + limit]
+        silent = np.flatnonzero(~window)
+        if len(silent):
+            # middle of the longest run of silence in the window
+            runs = np.split(silent, np.flatnonzero(np.diff(silent) != 1) + 1)
+            best = max(runs, key=len)
+            cut = pos + target + int(best[len(best) // 2])
+            cuts.append((cut, False))
+        else:
+            cut = pos + limit
+            cuts.append((cut, True))
+        pos = cut
+
+    bounds = [0] + [c for c, _ in cuts] + [n_frames]
+    hard = [False] + [h for _, h in cuts] + [False]
+
+    chunks = []
+    for i in range(len(bounds) - 1):
+        start = bounds[i] * FRAME_SAMPLES
+        end = len(pcm) if i == len(bounds) - 2 else bounds[i + 1] * FRAME_SAMPLES
+        if hard[i]:
+            start = max(0, start - overlap)
+        if hard[i + 1]:
+            end = min(len(pcm), end + overlap)
+        chunks.append(Chunk(index=i, start=start, end=end, overlaps_previous=hard[i]))
+    return chunks
+
+
+# -------------------------------------------------------
+# STITCHING
+# -------------------------------------------------------
+
+def _norm(word: str) -> str:
+    return "".join(ch for ch in word.lower() if ch.isalnum())
+
+
+def stitch(texts: List[str], overlaps: Optional[Sequence[bool]] = None) -> str:
+    """
+    Join chunk transcripts in order. Where overlaps[i] is True (chunk i
+    shares audio with chunk i-1), words repeated across that boundary
+    are dropped; other boundaries are joined as-is.
+    """
+    words: List[str] = []
+    for i, text in enumerate(texts):
+        new = (text or "").split()
+        if not new:
+            continue
+        drop = 0
+        if overlaps is not None and overlaps[i]:
+            for k in range(min(STITCH_MAX_WORDS, len(words), len(new)), 0, -1):
+                if [_norm(w) for w in words[-k:]] == [_norm(w) for w in new[:k]]:
+                    drop = k
+                    break
+        words.extend(new[drop:])
+    return " ".join(words)
+
+
+# -------------------------------------------------------
+# TRANSCRIPTION
+# -------------------------------------------------------
+
+def _transcribe_chunk(pcm: np.ndarray, chunk: Chunk, transcribe_file: Callable[[bytes, str], str]) -> str:
+    data = encode_opus(pcm[chunk.start:chunk.end])
+    try:
+        return transcribe_file(data, f"chunk_{chunk.index}.ogg")
+    except Exception as e:
+        print(f"\n!!!! STT CHUNK {chunk.index} FAILED !!!!")
+        print(str(e))
+        print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+        raise
+
+
+def transcribe_longform(pcm: np.ndarray, transcribe_file: Callable[[bytes, str], str]) -> str:
+    """
+    `transcribe_file(data, filename) -> text` is called once per chunk
+    on the shared STT pool; results are stitched in order. Raises
+    STTChunkError if any chunk failed.
+    At most STT_CHUNKS_PER_REQUEST chunks are queued at once, so one long
+    note can't hold every worker while other users wait.
+    """
+    chunks = split_at_silence(pcm)
+    slots = threading.BoundedSemaphore(max(1, STT_CHUNKS_PER_REQUEST))
+
+    futures = []
+    for c in chunks:
+        slots.acquire()
+        future = _stt_executor.submit(_transcribe_chunk, pcm, c, transcribe_file)
+        future.add_done_callback(lambda _: slots.release())
+        futures.append(future)
+
+    texts, failed = [], []
+    for c, f in zip(chunks, futures):
+        try:
+            texts.append(f.result())
+        except Exception:
+            texts.append("")
+            failed.append(c.index)
+
+    text = stitch(texts, [c.overlaps_previous for c in chunks])
+    if failed:
+        raise STTChunkError(failed, partial=text)
+    return text
+
+
+def transcribe_segment_async(pcm: np.ndarray, transcribe_file: Callable[[bytes, str], str]) -> Future:
+    """One already-bounded segment on the shared STT pool (live voice sessions)."""
+    return _stt_executor.submit(_transcribe_chunk, pcm, Chunk(index=0, start=0, end=len(pcm)), transcribe_file)
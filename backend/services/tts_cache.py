@@ -0,0 +1,449 @@
+# backend/services/tts_cache.py
+#
+# Content-addressed cache for synthesized speech.
+#
+# Key = sha256(text, voice id, model, voice settings, output format), so
+# the same utterance in the same voice is synthesized once and then
+# served from disk. Concurrent identical requests are coalesced into a
+# single upstream call (single-flight), for whole-file synthesis and for
+# streams alike: the first streaming miss starts one upstream pump that
+# writes a temp file, and every caller for that key tails it. Files live under
+# AURORA_TTS_CACHE_DIR and are evicted least-recently-used once the
+# cache exceeds its byte or entry limits.
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TTS_CACHE_ENABLED = os.getenv("AURORA_TTS_CACHE_ENABLED", "true").lower() == "true"
+TTS_CACHE_DIR = os.getenv("AURORA_TTS_CACHE_DIR", os.path.join(_BACKEND_DIR, "cache", "tts"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("AURORA_TTS_CACHE_MAX_MB", "512")) * 1024 * 1024
+TTS_CACHE_MAX_ENTRIES = int(os.getenv("AURORA_TTS_CACHE_MAX_ENTRIES", "20000"))
+STREAM_CHUNK_BYTES = 16 * 1024
+
+
+def tts_cache_key(
+    text: str,
+    *,
+    voice_id: str | None,
+    model_id: str,
+    voice_settings: Dict[str, Any],
+    output_format: str = "mp3",
+) -> str:
+    payload = {
+        "text": (text or "").strip(),
+        "voice_id": voice_id or "",
+        "model_id": model_id,
+        "voice_settings": voice_settings or {},
+        "output_format": output_format,
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def primed(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Pull the first chunk now so provider errors raise here, before a
+    200 response has been started; the rest streams lazily.
+    """
+    it = iter(chunks)
+    first = next(it, b"")
+
+    def _gen():
+        if first:
+            yield first
+        yield from it
+
+    return _gen()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[bytes] = None
+        self.error: Optional[BaseException] = None
+
+
+class _StreamFlight:
+    def __init__(self, tmp: str):
+        self.tmp = tmp
+        self.cond = threading.Condition()
+        self.size = 0
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.readers = 0              # guarded by TTSCache._lock
+        self.cancelled = False
+
+
+class TTSCache:
+    """
+    Disk-backed LRU with single-flight synthesis.
+    The LRU index is per process; the files are shared, so a worker that
+    misses in memory still checks disk before calling the provider.
+    """
+
+    def __init__(
+        self,
+        root: str = TTS_CACHE_DIR,
+        *,
+        max_bytes: int = TTS_CACHE_MAX_BYTES,
+        max_entries: int = TTS_CACHE_MAX_ENTRIES,
+        enabled: bool = TTS_CACHE_ENABLED,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._bytes = 0
+        self._loaded = False
+        self._inflight: Dict[str, _Flight] = {}
+        self._streams: Dict[str, _StreamFlight] = {}
+
+        self._metrics = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "evictions": 0,
+        }
+
+    # ---------------------------------------------------
+    # Paths / index
+    # ---------------------------------------------------
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.mp3")
+
+    def _load_index(self):
+        """Rebuild the LRU order from disk (oldest access first)."""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        entries = []
+        if os.path.isdir(self.root):
+            for dirpath, _, filenames in os.walk(self.root):
+                for name in filenames:
+                    if not name.endswith(".mp3"):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((st.st_atime, name[:-4], st.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._bytes += size
+
+        self._evict_locked()
+
+    def _touch_locked(self, key: str, size: int):
+        if key in self._index:
+            self._bytes -= self._index[key]
+        self._index[key] = size
+        self._index.move_to_end(key)
+        self._bytes += size
+
+    def _evict_locked(self):
+        while self._index and (self._bytes > self.max_bytes or len(self._index) > self.max_entries):
+            key, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self._metrics["evictions"] += 1
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
+
+    # ---------------------------------------------------
+    # Read / write
+    # ---------------------------------------------------
+
+    def get(self, key: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+
+        path = self.path_for(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                if key in self._index:
+                    self._bytes -= self._index.pop(key)
+            return None
+
+        if not data:
+            return None
+
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        with self._lock:
+            self._load_index()
+            self._touch_locked(key, len(data))
+
+        return data
+
+    def put(self, key: str, data: bytes):
+        if not self.enabled or not data:
+            return
+
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # atomic publish so readers never see a partial file
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            self._load_index()
+            self._touch_locked(key, len(data))
+            self._evict_locked()
+
+    # ---------------------------------------------------
+    # Single-flight
+    # ---------------------------------------------------
+
+    def get_or_synthesize(self, key: str, synthesize: Callable[[], bytes]) -> bytes:
+        """
+        Cached audio for `key`, or the result of `synthesize()`.
+        Concurrent callers for the same key share one upstream call;
+        its exception is re-raised to all of them.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            with self._lock:
+                self._metrics["hits"] += 1
+            return cached
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self._metrics["misses"] += 1
+            else:
+                self._metrics["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            data = synthesize()
+            flight.result = data
+            try:
+                self.put(key, data)
+            except Exception as e:
+                print("TTS CACHE WRITE ERROR:", repr(e))
+            return data
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._metrics["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    # ---------------------------------------------------
+    # Streaming
+    # ---------------------------------------------------
+
+    def stream(self, key: str, open_upstream: Callable[[], Iterable[bytes]]) -> Iterator[bytes]:
+        """
+        Yield cached audio in chunks, or tail the single upstream pump for
+        `key`: the first miss starts `open_upstream()` on a worker thread
+        that writes a temp file, published into the cache only once the
+        stream completes; concurrent callers for the same key read that
+        file as it grows instead of opening their own upstream call.
+        A client that disconnects only stops its own reader; when the
+        last reader goes, the upstream call is closed and nothing is cached.
+        """
+        path = self.path_for(key)
+
+        if self.enabled:
+            try:
+                f = open(path, "rb")
+            except OSError:
+                f = None
+
+            if f is not None:
+                with self._lock:
+                    self._metrics["hits"] += 1
+                    self._load_index()
+                    self._touch_locked(key, os.fstat(f.fileno()).st_size)
+                try:
+                    os.utime(path, None)
+                except OSError:
+                    pass
+                with f:
+                    while True:
+                        chunk = f.read(STREAM_CHUNK_BYTES)
+                        if not chunk:
+                            return
+                        yield chunk
+
+        if not self.enabled:
+            with self._lock:
+                self._metrics["misses"] += 1
+            yield from open_upstream()
+            return
+
+        with self._lock:
+            flight = self._streams.get(key)
+            leader = flight is None or flight.cancelled
+            if leader:
+                flight = _StreamFlight(f"{path}.{uuid.uuid4().hex}.tmp")
+                self._streams[key] = flight
+                self._metrics["misses"] += 1
+            else:
+                self._metrics["coalesced"] += 1
+            flight.readers += 1
+
+        if leader:
+            threading.Thread(
+                target=self._pump,
+                args=(key, flight, open_upstream),
+                name="aurora-tts-stream",
+                daemon=True,
+            ).start()
+
+        yield from self._tail(key, flight)
+
+    def _pump(self, key: str, flight: _StreamFlight, open_upstream: Callable[[], Iterable[bytes]]):
+        path = self.path_for(key)
+        complete = False
+
+        upstream = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            upstream = iter(open_upstream())
+            with open(flight.tmp, "wb") as out:
+                for chunk in upstream:
+                    if flight.cancelled:
+                        break
+                    if not chunk:
+                        continue
+                    out.write(chunk)
+                    out.flush()
+                    with flight.cond:
+                        flight.size += len(chunk)
+                        flight.cond.notify_all()
+
+            if flight.size > 0 and not flight.cancelled:
+                os.replace(flight.tmp, path)
+                complete = True
+                with self._lock:
+                    self._load_index()
+                    self._touch_locked(key, flight.size)
+                    self._evict_locked()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._metrics["errors"] += 1
+        finally:
+            # a generator upstream closes its HTTP response here
+            close = getattr(upstream, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception:
+                    pass
+            if not complete:
+                try:
+                    os.remove(flight.tmp)
+                except OSError:
+                    pass
+            with self._lock:
+                if self._streams.get(key) is flight:
+                    del self._streams[key]
+            with flight.cond:
+                flight.done = True
+                flight.cond.notify_all()
+
+    def _open_flight(self, key: str, flight: _StreamFlight):
+        # the temp file is renamed into place on success; an open handle
+        # survives that, a late open has to follow it
+        for candidate in (flight.tmp, self.path_for(key)):
+            try:
+                return open(candidate, "rb")
+            except OSError:
+                continue
+        raise flight.error or FileNotFoundError(flight.tmp)
+
+    def _tail(self, key: str, flight: _StreamFlight) -> Iterator[bytes]:
+        f = None
+        pos = 0
+        try:
+            while True:
+                with flight.cond:
+                    while flight.size <= pos and not flight.done:
+                        flight.cond.wait()
+                    size, error = flight.size, flight.error
+
+                if size > pos:
+                    if f is None:
+                        f = self._open_flight(key, flight)
+                    while pos < size:
+                        chunk = f.read(min(STREAM_CHUNK_BYTES, size - pos))
+                        if not chunk:
+                            raise OSError(f"TTS stream file shorter than expected: {pos}/{size}")
+                        pos += len(chunk)
+                        yield chunk
+                    continue
+
+                if error is not None:
+                    raise error
+                return
+        finally:
+            if f is not None:
+                f.close()
+            with self._lock:
+                flight.readers -= 1
+                if flight.readers <= 0 and not flight.done:
+                    flight.cancelled = True
+                    if self._streams.get(key) is flight:
+                        del self._streams[key]
+
+    # ---------------------------------------------------
+    # Metrics
+    # ---------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._load_index()
+            lookups = self._metrics["hits"] + self._metrics["misses"] + self._metrics["coalesced"]
+            return {
+                **self._metrics,
+                "hit_rate": round(self._metrics["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._index),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "enabled": self.enabled,
+            }
+
+
+tts_cache = TTSCache()
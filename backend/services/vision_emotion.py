@@ -1,25 +1,62 @@
 # backend/services/vision_emotion.py
 
-import os
 import io
+import os
 import base64
 import json
+import threading
 import time
-from typing import Dict, Any
+from dataclasses import dataclass, field
+from typing import Dict, Any, List
 from collections import deque
 
 import cv2
 import numpy as np
 from PIL import Image
-from openai import OpenAI
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from services.llm_gateway import chat_completion
+from services.frame_dedupe import DEDUPE_MAX_DISTANCE, dhash, frame_deduper, hamming
+from services.session_store import MemorySessionStore
+
+VISION_SESSIONS_MAX = int(os.getenv("AURORA_VISION_SESSIONS_MAX", "5000"))
+VISION_SESSION_TTL = float(os.getenv("AURORA_VISION_SESSION_TTL_SECONDS", "600"))
+RATE_LIMIT_COOLDOWN_S = float(os.getenv("AURORA_VISION_RATE_LIMIT_COOLDOWN", "5"))
+CONF_WINDOW = 5
+
+
+@dataclass
+class _VisionSession:
+    # rolling confidence history for smoothing + last good result for
+    # rate-limit fallback, per session so streams never mix
+    conf_history: deque = field(default_factory=lambda: deque(maxlen=CONF_WINDOW))
+    last_good: Dict[str, Any] | None = None
+
+
+_sessions = MemorySessionStore("vision_sessions", VISION_SESSIONS_MAX, VISION_SESSION_TTL)
+
+# the rate limit is per API key, so the cooldown is process-wide
+_rate_limited_until = 0.0
+_rate_lock = threading.Lock()
+
+
+def _session(session_key: str | None) -> _VisionSession:
+    if not session_key:
+        return _VisionSession()  # one-off call: nothing to smooth against
+    state = _sessions.get(session_key)
+    if state is None:
+        state = _VisionSession()
+        _sessions.put(session_key, state)
+    return state
 
-# Rolling confidence history for smoothing
-_conf_history = deque(maxlen=5)
 
-# Optional: last good result for rate-limit fallback
-_last_good_result: Dict[str, Any] | None = None
+def _rate_limited() -> bool:
+    return time.time() < _rate_limited_until
+
+
+def _start_cooldown():
+    global _rate_limited_until
+    with _rate_lock:
+        _rate_limited_until = max(_rate_limited_until, time.time() + RATE_LIMIT_COOLDOWN_S)
 
 # OpenCV Haar Cascade (face detector)
 FACE_CASCADE = cv2.CascadeClassifier(
@@ -40,12 +77,12 @@ def _clamp01(value, default: float = 0.5) -> float:
     return max(0.0, min(1.0, v))
 
 
-def _smooth_conf(value: float) -> float:
+def _smooth_conf(value: float, history: deque) -> float:
     """
     Smooth confidence scores to reduce jitter & prevent noisy emotion flips.
     """
-    _conf_history.append(value)
-    avg = sum(_conf_history) / len(_conf_history)
+    history.append(value)
+    avg = sum(history) / len(history)
     # Blend current value with rolling average
     return (avg + value) / 2.0
 
@@ -53,67 +90,131 @@ def _smooth_conf(value: float) -> float:
 # -------------------------------------------------------------
 # FACE CROP
 # -------------------------------------------------------------
-def _extract_face(image_bytes: bytes) -> bytes:
+# One decode (DCT-reduced for large JPEGs), detection on a small
+# grayscale copy, crop as a view into the decoded frame, one JPEG
+# encode at bounded size.
+
+DETECT_MAX_SIDE = 320     # Haar runs on this
+CROP_MAX_SIDE = 256       # what the vision model gets
+FRAME_MAX_SIDE = 512      # no-face fallback
+DECODE_MIN_SIDE = 640     # never decode below this
+JPEG_QUALITY = 85
+
+
+def _decode_flag(image_bytes: bytes) -> int:
+    # header only; lets libjpeg decode at 1/2 or 1/4 scale
+    try:
+        w, h = Image.open(io.BytesIO(image_bytes)).size
+    except Exception:
+        return cv2.IMREAD_COLOR
+    side = max(w, h)
+    if side >= DECODE_MIN_SIDE * 4:
+        return cv2.IMREAD_REDUCED_COLOR_4
+    if side >= DECODE_MIN_SIDE * 2:
+        return cv2.IMREAD_REDUCED_COLOR_2
+    return cv2.IMREAD_COLOR
+
+
+def _fit(img: np.ndarray, max_side: int) -> np.ndarray:
+    h, w = img.shape[:2]
+    scale = max_side / max(h, w)
+    if scale >= 1.0:
+        return img
+    return cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+def _encode_jpeg(img: np.ndarray) -> bytes:
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    if not ok:
+        raise EmotionServiceError("JPEG encode failed")
+    return buf.tobytes()
+
+
+def _extract_face(image_bytes: bytes):
     """
     Try to detect a single face and crop around it.
-    If detection fails, return the original image bytes.
+    Returns (jpeg bytes, grayscale crop). If detection fails, the frame
+    (bounded to FRAME_MAX_SIDE) and its grayscale view are returned.
     """
-    # PIL → numpy
-    img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-    img_np = np.array(img)
+    flag = _decode_flag(image_bytes)
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), flag)
+    if img is None:
+        raise EmotionServiceError("Could not decode image")
 
-    # Gray for detector
-    gray = cv2.cvtColor(img_np, cv2.COLOR_RGB2GRAY)
+    small = _fit(img, DETECT_MAX_SIDE)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    scale = img.shape[1] / small.shape[1]
+    min_side = max(24, int(80 / scale))
 
     faces = FACE_CASCADE.detectMultiScale(
         gray,
         scaleFactor=1.1,
         minNeighbors=5,
-        minSize=(80, 80),
+        minSize=(min_side, min_side),
     )
 
     if len(faces) == 0:
         print("⚠️ No face detected → using full frame")
-        return image_bytes  # fallback to whole image
+        if max(img.shape[:2]) <= FRAME_MAX_SIDE and flag == cv2.IMREAD_COLOR:
+            return image_bytes, gray  # already small: send as-is
+        return _encode_jpeg(_fit(img, FRAME_MAX_SIDE)), gray
 
-    # Take the first face
+    # Take the first face; views, no copies
     x, y, w, h = faces[0]
-    face_crop = img_np[y : y + h, x : x + w]
+    face_gray = gray[y : y + h, x : x + w]
+    X, Y, W, H = (int(round(v * scale)) for v in (x, y, w, h))
+    face_crop = img[Y : Y + H, X : X + W]
 
-    # Back to JPEG bytes
-    face_img = Image.fromarray(face_crop)
-    buf = io.BytesIO()
-    face_img.save(buf, format="JPEG", quality=90)
-    return buf.getvalue()
+    return _encode_jpeg(_fit(face_crop, CROP_MAX_SIDE)), face_gray
 
 
 # -------------------------------------------------------------
 # MAIN EMOTION ANALYZER (WITH FACE CROP + RATE LIMIT HANDLING)
 # -------------------------------------------------------------
-def analyze_emotion(image_bytes: bytes) -> Dict[str, Any]:
+def analyze_emotion(image_bytes: bytes, session_key: str | None = None) -> Dict[str, Any]:
     """
     Uses OpenAI GPT-4o-mini Vision to analyze facial emotion.
 
     - Crops to face first (when possible).
-    - Smooths confidence.
-    - Falls back to last good result when rate-limited.
+    - With a session_key, near-identical face crops reuse the previous
+      result (no API call) and the result carries `next_poll_ms`.
+    - Smooths confidence per session.
+    - When rate-limited, answers immediately from the session's last good
+      result (or neutral) and skips the API until the cooldown ends.
     """
-    global _last_good_result
-
     if not image_bytes:
         raise EmotionServiceError("Empty image")
 
     # Try face crop first
+    gray = None
     try:
-        image_bytes = _extract_face(image_bytes)
+        image_bytes, gray = _extract_face(image_bytes)
     except Exception as e:
         print("⚠️ Face crop failed:", e)
 
-    # Encode as base64 data URL
-    b64 = base64.b64encode(image_bytes).decode("utf-8")
-    data_url = f"data:image/jpeg;base64,{b64}"
+    phash = dhash(gray) if session_key and gray is not None and gray.size else None
+
+    if phash is not None:
+        cached = frame_deduper.check(session_key, phash)
+        if cached is not None:
+            return {
+                **cached,
+                "cached": True,
+                "next_poll_ms": frame_deduper.next_poll_ms(session_key),
+            }
+
+    result = _analyze_face(image_bytes, _session(session_key))
+
+    if session_key:
+        fresh = not result.get("stale") and "error" not in (result.get("raw") or {})
+        if phash is not None and fresh:
+            frame_deduper.remember(session_key, phash, result)
+        result = {**result, "cached": False, "next_poll_ms": frame_deduper.next_poll_ms(session_key)}
+
+    return result
+
 
-    system_prompt = """
+SYSTEM_PROMPT = """
 You are an emotion recognition module for Aurora.
 
 Return ONE of:
@@ -135,8 +236,36 @@ Output STRICT JSON:
 }
 """
 
+BATCH_PROMPT = (
+    "There are {n} images below, one face each, in order. "
+    'Return ONLY {{"results": [...]}} with exactly {n} JSON objects in the '
+    "same order, each in the format above."
+)
+VISION_BATCH_MAX = 8     # images per vision call
+
+
+def _fallback(state: _VisionSession, reason: str) -> Dict[str, Any]:
+    if state.last_good is not None:
+        return {**state.last_good, "stale": True}
+    return {
+        "emotion": "neutral",
+        "confidence": 0.15,
+        "score": 0.15,
+        "valence": 0.5,
+        "arousal": 0.5,
+        "dominance": 0.5,
+        "raw": {"error": reason},
+    }
+
+
+def _analyze_face(image_bytes: bytes, state: _VisionSession) -> Dict[str, Any]:
+    if _rate_limited():
+        return _fallback(state, "vision_rate_limited")
+
+    data_url = _data_url(image_bytes)
+
     messages = [
-        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": SYSTEM_PROMPT},
         {
             "role": "user",
             "content": [
@@ -149,55 +278,149 @@ Output STRICT JSON:
         },
     ]
 
-    MAX_RETRIES = 3
+    try:
+        # no SDK retries: a 429 must not sleep inside the request
+        resp = chat_completion(
+            "vision_emotion",
+            model="gpt-4o-mini",
+            messages=messages,
+            response_format={"type": "json_object"},
+            temperature=0.0,
+            max_tokens=150,
+            max_retries=0,
+        )
+
+        content = resp.choices[0].message.content
+        parsed = json.loads(content)
+
+        normalized = _normalize_output(parsed, state.conf_history)
+        state.last_good = normalized
+        return normalized
 
-    for attempt in range(MAX_RETRIES):
-        try:
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages,
-                response_format={"type": "json_object"},
-                temperature=0.0,
-                max_tokens=150,
-            )
+    except Exception as e:
+        err = str(e).lower()
+        print("Vision emotion error:", repr(e))
 
-            content = resp.choices[0].message.content
-            parsed = json.loads(content)
+        if "429" in err or "rate_limit" in err:
+            print("⚠️ Vision rate-limited — serving cached emotion")
+            _start_cooldown()
+            return _fallback(state, "vision_rate_limited")
+
+    fallback = _fallback(state, "vision_failed")
+    print("⚠️ Using hard fallback emotion:", fallback)
+    return fallback
+
+
+def _data_url(image_bytes: bytes) -> str:
+    return "data:image/jpeg;base64," + base64.b64encode(image_bytes).decode("utf-8")
+
+
+# -------------------------------------------------------------
+# BATCH (several frames, one vision call per VISION_BATCH_MAX)
+# -------------------------------------------------------------
+def _analyze_faces(crops: List[bytes], state: _VisionSession) -> List[Dict[str, Any]]:
+    if len(crops) == 1:
+        return [_analyze_face(crops[0], state)]
+    if _rate_limited():
+        return [_fallback(state, "vision_rate_limited") for _ in crops]
 
-            normalized = _normalize_output(parsed)
-            _last_good_result = normalized
-            return normalized
+    content = [{"type": "text", "text": BATCH_PROMPT.format(n=len(crops))}]
+    content += [{"type": "image_url", "image_url": {"url": _data_url(c)}} for c in crops]
 
+    try:
+        resp = chat_completion(
+            "vision_emotion_batch",
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": content},
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.0,
+            max_tokens=120 * len(crops) + 50,
+            max_retries=0,
+        )
+        parsed = json.loads(resp.choices[0].message.content).get("results")
+    except Exception as e:
+        err = str(e).lower()
+        print("Vision batch emotion error:", repr(e))
+        if "429" in err or "rate_limit" in err:
+            _start_cooldown()
+            return [_fallback(state, "vision_rate_limited") for _ in crops]
+        parsed = None
+
+    if not isinstance(parsed, list) or len(parsed) != len(crops):
+        # model didn't keep the shape: one call per frame instead
+        return [_analyze_face(c, state) for c in crops]
+
+    results = []
+    for item in parsed:
+        normalized = _normalize_output(item if isinstance(item, dict) else {}, state.conf_history)
+        state.last_good = normalized
+        results.append(normalized)
+    return results
+
+
+def analyze_emotion_batch(images: List[bytes], session_key: str | None = None) -> List[Dict[str, Any]]:
+    """
+    Frames in time order. Near-duplicates (of the session's last result
+    or of the previous frame in the batch) are not sent; the rest go out
+    VISION_BATCH_MAX images per call.
+    """
+    state = _session(session_key)
+    results: List[Dict[str, Any] | None] = [None] * len(images)
+    crops: Dict[int, bytes] = {}
+    hashes: Dict[int, int | None] = {}
+    same_as: Dict[int, int] = {}
+
+    last_sent = None  # (index, hash) of the previous frame we analyze
+    for i, image_bytes in enumerate(images):
+        if not image_bytes:
+            results[i] = {"error": "empty_frame"}
+            continue
+
+        gray = None
+        try:
+            crop, gray = _extract_face(image_bytes)
         except Exception as e:
-            err = str(e).lower()
-            print("Vision emotion error:", repr(e))
-
-            # Rate limit: use last_good_result if we have one
-            if "429" in err or "rate_limit" in err:
-                if _last_good_result is not None:
-                    print("⚠️ Vision rate-limited — using cached emotion")
-                    return _last_good_result
-                time.sleep(0.4 * (attempt + 1))
+            print("⚠️ Face crop failed:", e)
+            crop = image_bytes
+        phash = dhash(gray) if gray is not None and gray.size else None
+        hashes[i] = phash
+
+        if phash is not None and session_key:
+            cached = frame_deduper.check(session_key, phash)
+            if cached is not None:
+                results[i] = {**cached, "cached": True}
                 continue
 
-            # Non-retryable error → break out
-            break
+        if phash is not None and last_sent is not None and last_sent[1] is not None \
+                and hamming(last_sent[1], phash) <= DEDUPE_MAX_DISTANCE:
+            same_as[i] = last_sent[0]
+            continue
 
-    # Hard fallback
-    fallback = _last_good_result or {
-        "emotion": "neutral",
-        "confidence": 0.15,
-        "score": 0.15,
-        "valence": 0.5,
-        "arousal": 0.5,
-        "dominance": 0.5,
-        "raw": {"error": "vision_failed_or_rate_limited"},
-    }
-    print("⚠️ Using hard fallback emotion:", fallback)
-    return fallback
+        crops[i] = crop
+        last_sent = (i, phash)
+
+    order = list(crops)
+    for k in range(0, len(order), VISION_BATCH_MAX):
+        chunk = order[k:k + VISION_BATCH_MAX]
+        for i, result in zip(chunk, _analyze_faces([crops[i] for i in chunk], state)):
+            results[i] = {**result, "cached": False}
+            fresh = not result.get("stale") and "error" not in (result.get("raw") or {})
+            if session_key and hashes.get(i) is not None and fresh:
+                frame_deduper.remember(session_key, hashes[i], result)
+
+    for i, src in same_as.items():
+        results[i] = {**results[src], "cached": True}
+
+    if session_key:
+        poll = frame_deduper.next_poll_ms(session_key)
+        results = [{**r, "next_poll_ms": poll} if "emotion" in r else r for r in results]
+    return results
 
 
-def _normalize_output(parsed: Dict[str, Any]) -> Dict[str, Any]:
+def _normalize_output(parsed: Dict[str, Any], conf_history: deque) -> Dict[str, Any]:
     """
     Final cleanup:
     - Clamp values into [0,1]
@@ -211,7 +434,7 @@ def _normalize_output(parsed: Dict[str, Any]) -> Dict[str, Any]:
     if raw_conf < 0.40:
         emotion = "neutral"
 
-    smoothed_conf = _smooth_conf(raw_conf)
+    smoothed_conf = _smooth_conf(raw_conf, conf_history)
 
     result = {
         "emotion": emotion,
@@ -0,0 +1,336 @@
+# backend/services/voice_session.py
+#
+# One live, full-duplex voice conversation (see routes/aurora_voice_ws.py).
+#
+# Audio comes in as raw PCM16 frames (16 kHz mono, little-endian) while
+# the user is talking. Voice activity is tracked frame by frame:
+#
+#   - at short pauses the open segment is closed and sent to STT right
+#     away, so most of an utterance is already transcribed when it ends
+#   - END_OF_SPEECH_MS of trailing silence ends the utterance; the
+#     segment transcripts are stitched, the reply is generated and its
+#     MP3 is streamed back as binary frames while ElevenLabs renders it
+#   - speech detected while Aurora is talking (or an explicit
+#     {"type": "barge_in"}) cancels the reply in flight
+#
+# Every session owns its VoiceContext, so connections never share turns
+# or a locked name.
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from services.audio_preprocess import (
+    FRAME_MS,
+    MIN_SPEECH_MS,
+    PAD_MS,
+    SAMPLE_RATE,
+    StreamingVAD,
+)
+from services.aurora_speech import text_to_speech_stream
+from services.aurora_whisper import (
+    VoiceContext,
+    aurora_whisper_reply,
+    extract_explicit_name,
+    lock_name,
+    transcribe_audio_file,
+)
+from services.stt_longform import stitch, transcribe_segment_async
+
+END_OF_SPEECH_MS = 700        # trailing silence that ends an utterance
+SEGMENT_PAUSE_MS = 300        # pause long enough to close a segment early
+SEGMENT_MIN_S = 2.0           # ... once it holds at least this much audio
+SEGMENT_MAX_S = 20.0          # forced cut, even mid-word
+MAX_UTTERANCE_S = 90.0        # runaway mic guard
+BARGE_IN_MS = 150             # speech needed to interrupt Aurora
+
+# every turn is an LLM call plus a TTS render
+MAX_TURNS_PER_MIN = int(os.getenv("AURORA_VOICE_MAX_TURNS_PER_MIN", "12"))
+
+PRE_ROLL_FRAMES = PAD_MS // FRAME_MS
+
+
+class VoiceSession:
+    """
+    Transport-agnostic: the route hands in `send_json(dict)` and
+    `send_bytes(bytes)` and feeds whatever the client sends.
+    """
+
+    def __init__(self, send_json: Callable[[Dict[str, Any]], None], send_bytes: Callable[[bytes], None]):
+        self._send_json = send_json
+        self._send_bytes = send_bytes
+        self._send_lock = threading.Lock()
+
+        self.ctx = VoiceContext()
+        self.emotion = {"face_emotion": "", "valence": 0.5, "arousal": 0.5, "dominance": 0.5}
+
+        self._vad = StreamingVAD()
+        self._pre_roll: List[np.ndarray] = []
+        self._segment: List[np.ndarray] = []
+        self._segment_samples = 0
+        self._segment_voiced = 0
+        self._segments: List[Future] = []
+        self._utterance_samples = 0
+
+        self._in_speech = False
+        self._silence_frames = 0
+        self._barge_frames = 0
+
+        self._turn: Optional[threading.Thread] = None
+        self._cancel = threading.Event()
+        self._speaking = threading.Event()
+        self._closed = False
+
+        self._turn_times: deque = deque()
+        self.limit_exceeded: Optional[str] = None   # set -> the route closes the socket
+
+    # ---------------------------------------------------
+    # Outgoing
+    # ---------------------------------------------------
+
+    def send(self, message: Dict[str, Any]):
+        if self._closed:
+            return
+        with self._send_lock:
+            self._send_json(message)
+
+    def _send_audio(self, chunk: bytes):
+        with self._send_lock:
+            self._send_bytes(chunk)
+
+    # ---------------------------------------------------
+    # Incoming
+    # ---------------------------------------------------
+
+    def handle_control(self, msg: Dict[str, Any]):
+        kind = msg.get("type")
+
+        if kind in ("start", "emotion"):
+            self._update_emotion(msg)
+            if kind == "start":
+                self.send({"type": "ready", "sample_rate": SAMPLE_RATE, "encoding": "pcm_s16le"})
+
+        elif kind == "end_of_speech":
+            # push-to-talk clients decide themselves
+            if self._segment_samples or self._segments:
+                self._end_utterance()
+
+        elif kind == "barge_in":
+            self.barge_in()
+
+        elif kind == "reset":
+            self.barge_in()
+            self.ctx = VoiceContext()
+
+        elif kind == "ping":
+            self.send({"type": "pong"})
+
+        else:
+            self.send({"type": "error", "error": f"unknown message type: {kind}"})
+
+    def feed_audio(self, data: bytes):
+        if len(data) % 2:
+            data = data[:-1]
+        pcm = np.frombuffer(data, dtype=np.int16)
+        if not len(pcm):
+            return
+
+        flags = self._vad.push(pcm)
+
+        if not self._in_speech:
+            # keep a little audio from before the first voiced frame
+            self._pre_roll.append(pcm)
+            while len(self._pre_roll) > max(PRE_ROLL_FRAMES, 1):
+                self._pre_roll.pop(0)
+        else:
+            self._append(pcm)
+
+        for voiced in flags:
+            self._on_frame(voiced)
+
+    def _update_emotion(self, msg: Dict[str, Any]):
+        if "face_emotion" in msg:
+            self.emotion["face_emotion"] = str(msg.get("face_emotion") or "").strip()
+        for key in ("valence", "arousal", "dominance"):
+            if key in msg:
+                try:
+                    self.emotion[key] = float(msg[key])
+                except (TypeError, ValueError):
+                    pass
+
+    # ---------------------------------------------------
+    # Voice activity
+    # ---------------------------------------------------
+
+    def _on_frame(self, voiced: bool):
+        if voiced:
+            self._silence_frames = 0
+
+            if self._speaking.is_set():
+                self._barge_frames += 1
+                if self._barge_frames * FRAME_MS >= BARGE_IN_MS:
+                    self.barge_in()
+            else:
+                self._barge_frames = 0
+
+            if not self._in_speech:
+                self._in_speech = True
+                for chunk in self._pre_roll:
+                    self._append(chunk)
+                self._pre_roll = []
+            self._segment_voiced += 1
+            return
+
+        self._barge_frames = 0
+        if not self._in_speech:
+            return
+
+        self._silence_frames += 1
+        silence_ms = self._silence_frames * FRAME_MS
+
+        if silence_ms >= END_OF_SPEECH_MS:
+            self._end_utterance()
+        elif silence_ms >= SEGMENT_PAUSE_MS and self._segment_samples >= SEGMENT_MIN_S * SAMPLE_RATE:
+            self._close_segment()
+
+    def _append(self, pcm: np.ndarray):
+        self._segment.append(pcm)
+        self._segment_samples += len(pcm)
+        self._utterance_samples += len(pcm)
+
+        if self._utterance_samples >= MAX_UTTERANCE_S * SAMPLE_RATE:
+            self._end_utterance()
+        elif self._segment_samples >= SEGMENT_MAX_S * SAMPLE_RATE:
+            self._close_segment()
+
+    def _close_segment(self):
+        pcm = np.concatenate(self._segment) if self._segment else None
+        voiced_ms = self._segment_voiced * FRAME_MS
+
+        self._segment = []
+        self._segment_samples = 0
+        self._segment_voiced = 0
+
+        if pcm is None or voiced_ms < MIN_SPEECH_MS:
+            return
+        self._segments.append(transcribe_segment_async(pcm, self._transcribe))
+
+    @staticmethod
+    def _transcribe(data: bytes, filename: str) -> str:
+        return transcribe_audio_file(data, filename, "voice_ws_stt")
+
+    def _end_utterance(self):
+        self._close_segment()
+        segments = self._segments
+
+        self._segments = []
+        self._utterance_samples = 0
+        self._in_speech = False
+        self._silence_frames = 0
+
+        if not segments:
+            return
+        self._start_turn(segments)
+
+    # ---------------------------------------------------
+    # Turns
+    # ---------------------------------------------------
+
+    def barge_in(self):
+        if self._turn is not None and self._turn.is_alive():
+            self._cancel.set()
+
+    def _turn_allowed(self) -> bool:
+        now = time.monotonic()
+        while self._turn_times and now - self._turn_times[0] >= 60.0:
+            self._turn_times.popleft()
+        if len(self._turn_times) >= MAX_TURNS_PER_MIN:
+            return False
+        self._turn_times.append(now)
+        return True
+
+    def _start_turn(self, segments: List[Future]):
+        if not self._turn_allowed():
+            for f in segments:
+                f.cancel()
+            self.limit_exceeded = "too many turns"
+            self.send({"type": "error", "error": "turn rate limit exceeded"})
+            return
+
+        # a new utterance always wins over a reply still in flight
+        self.barge_in()
+
+        cancel = threading.Event()
+        self._cancel = cancel
+        self._turn = threading.Thread(
+            target=self._run_turn,
+            args=(segments, cancel, dict(self.emotion)),
+            name="aurora-voice-turn",
+            daemon=True,
+        )
+        self._turn.start()
+
+    def _run_turn(self, segments: List[Future], cancel: threading.Event, emotion: Dict[str, Any]):
+        try:
+            user_text = stitch([f.result() for f in segments]).strip()
+            if cancel.is_set():
+                return
+
+            self.send({"type": "transcript", "text": user_text, "final": True})
+            if len(user_text) < 2:
+                return
+
+            explicit_name = extract_explicit_name(user_text)
+            if explicit_name:
+                lock_name(explicit_name, self.ctx)
+                reply_text = f"It’s nice to meet you, {explicit_name.capitalize()}."
+            else:
+                reply_text = aurora_whisper_reply(user_text=user_text, ctx=self.ctx, **emotion)
+
+            if cancel.is_set():
+                return
+            self.send({"type": "reply_text", "text": reply_text})
+
+            self._speak(reply_text, cancel)
+
+        except Exception as e:
+            print("\n!!!! VOICE SESSION TURN ERROR !!!!")
+            print(repr(e))
+            print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
+            self.send({"type": "error", "error": "turn failed"})
+
+    def _speak(self, text: str, cancel: threading.Event):
+        chunks = text_to_speech_stream(text)
+        self._speaking.set()
+        self.send({"type": "audio_start", "format": "mp3"})
+        try:
+            for chunk in chunks:
+                if cancel.is_set() or self._closed:
+                    self.send({"type": "audio_cancelled"})
+                    return
+                self._send_audio(chunk)
+            self.send({"type": "audio_end"})
+        finally:
+            # detaches this reader; if no other caller is tailing the same
+            # text, the cache pump closes the ElevenLabs stream and drops
+            # the partial render (services/tts_cache.py)
+            chunks.close()
+            self._speaking.clear()
+
+    # ---------------------------------------------------
+    # Lifecycle
+    # ---------------------------------------------------
+
+    def close(self):
+        self._closed = True
+        self._cancel.set()
+        for f in self._segments:
+            f.cancel()
+        self._segments = []
@@ -0,0 +1,127 @@
+# backend/tests/test_converse_db_budget.py
+#
+# One converse turn must stay within TURN_COMMIT_BUDGET commits and
+# TURN_QUERY_BUDGET statements (aurora/db_budget.py).
+#
+# Needs a Postgres database: the app's DB_* env vars plus SECRET_KEY and
+# JWT_SECRET_KEY. Without them the whole module is skipped. Only the
+# network calls are stubbed (the OpenAI chat completion and ElevenLabs
+# TTS), so the budget covers the real reply path: memory retrieval,
+# history and the relationship row.
+#
+#   cd backend && python -m pytest -q tests
+
+import os
+import sys
+import uuid
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REQUIRED_ENV = ("SECRET_KEY", "JWT_SECRET_KEY", "DB_USER", "DB_PASSWORD", "DB_HOST", "DB_PORT", "DB_NAME")
+
+pytestmark = pytest.mark.skipif(
+    not all(os.getenv(k) for k in REQUIRED_ENV),
+    reason="needs the Postgres test database (DB_* env vars)",
+)
+
+# read at import time by the modules below
+os.environ.setdefault("AURORA_TEXT_EMOTION_WARMUP", "false")
+os.environ.setdefault("AURORA_EMOTION_TAGGING", "false")
+os.environ.setdefault("HF_TOXICITY_ENABLED", "false")
+
+
+@pytest.fixture
+def app():
+    from app import create_app
+    from extensions import db
+
+    app = create_app()
+    app.config["TESTING"] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def user(app):
+    from extensions import db
+    from users.models import User
+    from aurora.models_messages import AuroraMessage
+    from aurora.models_relationship import AuroraRelationship
+    from aurora.models_memory import AuroraUserMemory
+
+    u = User(full_name="Budget Test", email=f"budget-{uuid.uuid4().hex[:12]}@example.com")
+    db.session.add(u)
+    db.session.commit()
+    user_id = u.id
+
+    yield u
+
+    db.session.rollback()
+    for model in (AuroraUserMemory, AuroraMessage, AuroraRelationship):
+        model.query.filter_by(user_id=user_id).delete()
+    User.query.filter_by(id=user_id).delete()
+    db.session.commit()
+
+
+@pytest.fixture
+def turn_budgets(monkeypatch):
+    """Stub the network calls and record each turn's DBBudget."""
+    import aurora.brain_user as brain_user
+    import aurora.routes_user as routes_user
+    from aurora.db_budget import track_db_budget
+
+    budgets = []
+
+    @contextmanager
+    def recording(label="turn"):
+        with track_db_budget(label) as budget:
+            budgets.append(budget)
+            yield budget
+
+    completion = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content="I'm here with you."))],
+        usage=SimpleNamespace(prompt_tokens=0, completion_tokens=0, total_tokens=0),
+    )
+
+    monkeypatch.setattr(routes_user, "track_db_budget", recording)
+    monkeypatch.setattr(brain_user, "chat_completion", lambda *args, **kwargs: completion)
+    monkeypatch.setattr(routes_user, "start_user_speech", lambda **kwargs: None)
+    return budgets
+
+
+def _converse(client, token, message, session_id=None):
+    body = {"message": message}
+    if session_id:
+        body["session_id"] = session_id
+    resp = client.post(
+        "/api/user/aurora/converse",
+        json=body,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert resp.status_code == 200, resp.get_json()
+    return resp.get_json()
+
+
+def test_converse_turn_stays_within_db_budget(app, user, turn_budgets):
+    from aurora.db_budget import TURN_COMMIT_BUDGET, TURN_QUERY_BUDGET
+    from utils.jwt_token import generate_jwt_token
+
+    token = generate_jwt_token(str(user.id), user.email)
+    client = app.test_client()
+
+    # first turn: no relationship row yet, memory candidates present
+    first = _converse(client, token, "I'm stressed about switching careers into AI")
+    # follow-up turn in the same session
+    _converse(client, token, "I hope it works out", session_id=first["session_id"])
+
+    assert len(turn_budgets) == 2
+    for budget in turn_budgets:
+        assert budget.commits <= TURN_COMMIT_BUDGET, budget.to_dict()
+        assert budget.queries <= TURN_QUERY_BUDGET, budget.to_dict()
@@ -1,9 +1,6 @@
 # backend/videos/services/ai_explanations.py
 
-import os
-from openai import OpenAI
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from services.llm_gateway import chat_completion
 
 
 def generate_alert_explanation(payload: dict) -> str:
@@ -50,7 +47,8 @@ Explain what happened and why it matters.
 Keep it under 2 sentences.
 """
 
-    response = client.chat.completions.create(
+    response = chat_completion(
+        "alert_explanation",
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": system_prompt},
@@ -6,17 +6,7 @@ from typing import Optional, Tuple, Any, Dict
 
 from extensions import db
 from videos.models import AnalyticsAlert
-
-# If you already have a shared OpenAI client helper (recommended),
-# import it here instead of creating a new client.
-# Example:
-# from ai.openai_client import client
-
-try:
-    from openai import OpenAI
-    _openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-except Exception:
-    _openai_client = None
+from services.llm_gateway import chat_completion, openai_configured
 
 
 def _safe_ai_explanation(alert_type: str, payload: Dict[str, Any]) -> Optional[str]:
@@ -24,7 +14,7 @@ def _safe_ai_explanation(alert_type: str, payload: Dict[str, Any]) -> Optional[s
     Generates a short, human explanation for an analytics alert.
     Returns None if OpenAI isn't configured or call fails.
     """
-    if not _openai_client:
+    if not openai_configured():
         return None
 
     # Keep prompts small + structured (cheap + consistent)
@@ -56,7 +46,8 @@ def _safe_ai_explanation(alert_type: str, payload: Dict[str, Any]) -> Optional[s
     )
 
     try:
-        resp = _openai_client.chat.completions.create(
+        resp = chat_completion(
+            "analytics_alert",
             model=os.getenv("OPENAI_ALERT_MODEL", "gpt-4o-mini"),
             messages=[
                 {"role": "system", "content": system},